@@ -0,0 +1,90 @@
+"""Compare blockchain startup time as the chain grows.
+
+Eager loading parses every stored block into ``Block`` objects (the previous
+``BaseBlockchain._load_chain``); lazy loading opens the chain through the
+offset index and reads only the tip block.
+
+Usage:
+
+    cd fund-load-project
+    python benchmarks/bench_chain_loading.py [--blocks 1000 10000 100000]
+"""
+
+import argparse
+import tempfile
+import time
+
+from blockchain import BaseBlockchain, Block
+from chain_storage import SegmentedChainStorage
+from transactions import Transaction
+
+
+def write_synthetic_chain(path: str, blocks: int, transactions: int) -> None:
+    """Append hashed, linked blocks straight to segment storage."""
+
+    storage = SegmentedChainStorage(path)
+    previous_hash = "1"
+
+    for index in range(1, blocks + 1):
+        block = Block(
+            index=index,
+            previous_hash=previous_hash,
+            timestamp=1_700_000_000 + index,
+            transactions=[
+                Transaction(
+                    {
+                        "id": str(index * transactions + n),
+                        "customer_id": str(n),
+                        "load_amount": "$100.00",
+                        "time": "2000-01-01T00:00:00Z",
+                    }
+                )
+                for n in range(transactions)
+            ],
+        )
+        storage.append_block(block.to_dict())
+        previous_hash = block.hash
+
+    storage.close()
+
+
+def eager_open(path: str) -> Block:
+    storage = SegmentedChainStorage(path)
+    chain = [Block.from_dict(block_data) for block_data in storage.iter_blocks()]
+    storage.close()
+    return chain[-1]
+
+
+def lazy_open(path: str) -> Block:
+    blockchain = BaseBlockchain(storage_path=path)
+    tip = blockchain.chain[-1]
+    blockchain.close()
+    return tip
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--transactions", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'blocks':>8} {'eager s':>9} {'lazy s':>9}")
+
+    for blocks in args.blocks:
+        with tempfile.TemporaryDirectory() as path:
+            write_synthetic_chain(path, blocks, args.transactions)
+
+            start = time.perf_counter()
+            eager_tip = eager_open(path)
+            eager_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            lazy_tip = lazy_open(path)
+            lazy_seconds = time.perf_counter() - start
+
+            assert eager_tip.hash == lazy_tip.hash
+            print(f"{blocks:>8,} {eager_seconds:>9.3f} {lazy_seconds:>9.4f}")
+
+
+if __name__ == "__main__":
+    main()
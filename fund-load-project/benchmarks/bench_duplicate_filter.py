@@ -0,0 +1,71 @@
+"""Measure the memory and speed of duplicate transaction ID detection.
+
+Adds ``--ids`` distinct IDs to a ``BloomFilter`` first sized for
+``--capacity`` of them (all by default; fewer makes it grow) and to a Python
+``set`` (the exact alternative), reporting bytes per ID and IDs/sec, then
+probes as many unseen IDs to measure the false positive rate: the share of
+new IDs that would need an exact storage check.
+
+Usage:
+
+    cd fund-load-project
+    python benchmarks/bench_duplicate_filter.py [--ids 2000000] [--capacity N]
+        [--error-rate 0.001]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from bloom_filter import BloomFilter
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ids", type=int, default=2_000_000)
+    parser.add_argument("--capacity", type=int, help="initial filter capacity")
+    parser.add_argument("--error-rate", type=float, default=0.001)
+    args = parser.parse_args()
+
+    ids = [str(n) for n in range(args.ids)]
+    unseen_ids = [str(n) for n in range(args.ids, 2 * args.ids)]
+
+    start = time.perf_counter()
+    bloom_filter = BloomFilter(args.capacity or args.ids, args.error_rate)
+    for transaction_id in ids:
+        bloom_filter.add(transaction_id)
+    bloom_seconds = time.perf_counter() - start
+    bloom_bytes = bloom_filter.nbytes
+
+    # Copies of the strings, as IDs parsed from the input would be
+    start = time.perf_counter()
+    seen = {transaction_id.encode().decode() for transaction_id in ids}
+    set_seconds = time.perf_counter() - start
+    del seen
+
+    tracemalloc.start()
+    seen = {transaction_id.encode().decode() for transaction_id in ids}
+    # Measured while the set is still referenced
+    set_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del seen
+
+    false_positives = sum(
+        transaction_id in bloom_filter for transaction_id in unseen_ids
+    )
+
+    print(
+        f"{args.ids:,} IDs, target error rate {args.error_rate}, "
+        f"{len(bloom_filter.layers)} filter layers"
+    )
+    print(f"{'':>12} {'bytes/ID':>9} {'IDs/sec':>12}")
+    for name, retained, seconds in [
+        ("bloom", bloom_bytes, bloom_seconds),
+        ("set", set_bytes, set_seconds),
+    ]:
+        print(f"{name:>12} {retained / args.ids:>9.1f} {args.ids / seconds:>12,.0f}")
+    print(f"False positive rate: {false_positives / args.ids:.4%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Compare prime table startup time and memory.
+
+Trial division set (previous implementation), in-process bytearray sieve, and
+the memory-mapped on-disk cache once it has been written by a first process.
+
+Usage:
+
+    cd fund-load-project
+    python benchmarks/bench_prime_table.py [--limit 1000000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+from math import sqrt
+from typing import Any, Callable
+
+from prime_table import generate_prime_sieve, load_prime_sieve, write_prime_table
+
+
+def generate_prime_set(maximum: int) -> set[int]:
+    """Trial division prime set used by the validator before the sieve."""
+
+    primes = [2]
+
+    for num in range(3, maximum, 2):
+        _is_prime = True
+        square_root = sqrt(num)
+        for prime in primes:
+            if num % prime == 0:
+                _is_prime = False
+                break
+            if prime > square_root:
+                break
+        if _is_prime:
+            primes.append(num)
+
+    return {x for x in primes}
+
+
+def measure(build: Callable[[int], Any], limit: int) -> tuple[float, int]:
+    """Return (seconds, peak traced bytes) to build a prime table."""
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    build(limit)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "prime_table.bin")
+        write_prime_table(path, args.limit)
+
+        for name, build in (
+            ("trial division set", generate_prime_set),
+            ("bytearray sieve", generate_prime_sieve),
+            ("mmap cache (warm)", lambda limit: load_prime_sieve(path, limit)),
+        ):
+            elapsed, peak = measure(build, args.limit)
+            print(f"{name:>18}: {elapsed * 1000:9.3f} ms, peak {peak / 1024:9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Count Redis round trips per transaction for the storage access patterns.
+
+Replays the input file through ``RedisTimeSeriesStorage`` and the validator
+with the legacy access pattern (one JSON.SET + one ZADD per write and one
+JSON.GET per window member), the pipelined / JSON.MGET path, and the atomic
+server-side Lua validate-and-store call.
+
+Usage (requires a running Redis, see docker-compose):
+
+    cd fund-load-project
+    python benchmarks/bench_redis_round_trips.py [--host redis] [--port 6379]
+"""
+
+import argparse
+import json
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from redis.commands.json.path import Path
+
+from _constants import INPUT_FILE
+from redis_storage import RedisTimeSeriesStorage
+from transactions import Transaction
+from validator import TransactionValidator
+
+
+class LegacyRedisStorage(RedisTimeSeriesStorage):
+    """Storage access pattern prior to pipelining, kept for comparison."""
+
+    def store_customer_transaction(self, transaction: Transaction):
+        transaction_key = f"tx:{transaction.transaction_id}"
+        customer_key = f"customer:{transaction.customer_id}"
+        self.redis.json().set(transaction_key, Path.root_path(), transaction.to_dict())
+        self.redis.zadd(
+            customer_key, {transaction_key: transaction.transaction_timetamp}
+        )
+
+    def get_customer_transactions(
+        self, customer_id: str, min_transaction_time: int, max_transaction_time: int
+    ) -> list[Any]:
+        tx_keys = self.redis.zrevrangebyscore(  # type: ignore
+            f"customer:{customer_id}",
+            min=min_transaction_time,
+            max=max_transaction_time,
+        )
+        return [self.redis.json().get(key) for key in tx_keys]  # type: ignore
+
+
+@contextmanager
+def count_round_trips(storage: RedisTimeSeriesStorage) -> Iterator[list[int]]:
+    """Patch the connection class so every packed send increments a counter."""
+
+    counter = [0]
+    connection_class = storage.redis.connection_pool.connection_class
+    original = connection_class.send_packed_command
+
+    def send_packed_command(self, *args, **kwargs):  # type: ignore
+        counter[0] += 1
+        return original(self, *args, **kwargs)
+
+    connection_class.send_packed_command = send_packed_command  # type: ignore
+    try:
+        yield counter
+    finally:
+        connection_class.send_packed_command = original  # type: ignore
+
+
+def run(
+    storage: RedisTimeSeriesStorage, lines: list[str], atomic: bool = False
+) -> tuple[float, float]:
+    """Return (round trips per transaction, elapsed seconds)."""
+
+    storage.clear_all_transactions()
+    # Re-fetch windows from storage so every validation goes through Redis
+    validator = TransactionValidator(storage, rolling_aggregates=False)
+    validator.prime_set  # build the prime table outside the timed section
+
+    with count_round_trips(storage) as counter:
+        start = time.perf_counter()
+        for line in lines:
+            transaction = Transaction(json.loads(line))
+            if atomic:
+                validator.validate_and_store_transaction(transaction)
+            else:
+                storage.store_customer_transaction(transaction)
+                validator.validate_transaction(transaction)
+        elapsed = time.perf_counter() - start
+
+    return counter[0] / len(lines), elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="redis")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--input", default=INPUT_FILE)
+    args = parser.parse_args()
+
+    with open(args.input, "r") as f:
+        lines = [line.strip() for line in f if line.strip()]
+
+    for name, storage_class, atomic in (
+        ("legacy", LegacyRedisStorage, False),
+        ("pipelined", RedisTimeSeriesStorage, False),
+        ("atomic", RedisTimeSeriesStorage, True),
+    ):
+        storage = storage_class(host=args.host, port=args.port)
+        round_trips, elapsed = run(storage, lines, atomic)
+        print(
+            f"{name:>10}: {round_trips:6.2f} round trips/transaction, "
+            f"{len(lines) / elapsed:10.0f} transactions/sec"
+        )
+        storage.clear_all_transactions()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""Load-test the HTTP validation service and report throughput and tail latency.
+
+Sends the transactions of an input file, or of a seeded synthetic input from
+``generate_input.py``, to a running ``src.service`` over ``--connections``
+concurrent keep-alive connections, ``--batch`` transactions per request. All
+transactions of a customer go through the same connection in input order, so
+the service receives every customer's loads in order. Requests turned away
+with 503 are retried after ``--retry-pause-ms`` and counted.
+
+Reports requests and transactions per second, the latency percentiles of the
+requests (from sending to the full response) and the service's own batching
+figures from ``GET /stats``.
+
+Usage:
+
+    cd fund-load-project
+    python -m src.service --storage memory &
+    python benchmarks/bench_service.py [--connections 16] [--batch 1]
+        [--lines 100000] [--input inputs/input.txt] [--port 8080]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import zlib
+from typing import Any, Optional
+
+from generate_input import add_generator_arguments, config_from_args, generate_lines
+
+DEFAULT_CONNECTIONS = 16
+DEFAULT_RETRY_PAUSE_MS = 10.0
+
+
+class LoadResult:
+    def __init__(self):
+        # Seconds from sending each request to reading its response
+        self.latencies: list[float] = []
+        self.transactions = 0
+        self.accepted = 0
+        self.overloaded = 0
+        # Requests answered with 400, e.g. for --malformed-rate lines
+        self.invalid = 0
+
+
+async def request(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    method: str,
+    path: str,
+    body: bytes = b"",
+) -> tuple[int, bytes]:
+    """Send an HTTP/1.1 request on a kept-alive connection; (status, body)."""
+
+    head = (
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+    )
+    writer.write(head.encode("latin-1") + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+
+    return status, await reader.readexactly(length)
+
+
+async def run_connection(
+    host: str,
+    port: int,
+    lines: list[str],
+    batch: int,
+    retry_pause: float,
+    result: LoadResult,
+) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+
+    try:
+        for start in range(0, len(lines), batch):
+            chunk = lines[start : start + batch]
+            body = (chunk[0] if batch == 1 else "[" + ",".join(chunk) + "]").encode()
+
+            while True:
+                sent = time.perf_counter()
+                status, response = await request(
+                    reader, writer, "POST", "/transactions", body
+                )
+                if status != 503:
+                    break
+                result.overloaded += 1
+                await asyncio.sleep(retry_pause)
+
+            result.latencies.append(time.perf_counter() - sent)
+            if status == 400:
+                result.invalid += 1
+                continue
+            if status != 200:
+                raise RuntimeError(f"HTTP {status}: {response.decode()}")
+
+            results = json.loads(response)
+            for item in results if isinstance(results, list) else [results]:
+                result.transactions += 1
+                result.accepted += item["accepted"]
+    finally:
+        writer.close()
+
+
+def split_by_customer(lines: list[str], connections: int) -> list[list[str]]:
+    """Input lines per connection, each customer's on a single connection."""
+
+    split: list[list[str]] = [[] for _ in range(connections)]
+    for line in lines:
+        try:
+            customer_id = str(json.loads(line)["customer_id"])
+        except (ValueError, KeyError):
+            # Malformed, rejected by the service whichever connection sends it
+            customer_id = ""
+        split[zlib.crc32(customer_id.encode()) % connections].append(line)
+
+    return split
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+
+    index = min(int(len(sorted_values) * percent / 100), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+async def run_load(
+    host: str,
+    port: int,
+    lines: list[str],
+    connections: int,
+    batch: int,
+    retry_pause: float,
+) -> tuple[LoadResult, float, Optional[dict[str, Any]]]:
+    result = LoadResult()
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            run_connection(host, port, connection_lines, batch, retry_pause, result)
+            for connection_lines in split_by_customer(lines, connections)
+            if connection_lines
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+        _, body = await request(reader, writer, "GET", "/stats")
+        writer.close()
+        stats = json.loads(body)
+    except (OSError, ValueError):
+        stats = None
+
+    return result, elapsed, stats
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_generator_arguments(parser)
+    parser.set_defaults(lines=100_000)
+    parser.add_argument("--input", help="existing input file instead of generating")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS)
+    parser.add_argument("--batch", type=int, default=1, help="transactions per request")
+    parser.add_argument("--retry-pause-ms", type=float, default=DEFAULT_RETRY_PAUSE_MS)
+    args = parser.parse_args()
+
+    if args.input is not None:
+        with open(args.input) as f:
+            lines = [line.strip() for line in f if line.strip()]
+    else:
+        lines = list(generate_lines(config_from_args(args)))
+
+    result, elapsed, stats = asyncio.run(
+        run_load(
+            args.host,
+            args.port,
+            lines,
+            args.connections,
+            args.batch,
+            args.retry_pause_ms / 1000,
+        )
+    )
+
+    latencies = sorted(result.latencies)
+    print(
+        f"{result.transactions:,} transactions in {len(latencies):,} requests "
+        f"over {args.connections} connections in {elapsed:.2f}s"
+    )
+    print(
+        f"{result.transactions / elapsed:,.0f} transactions/s, "
+        f"{len(latencies) / elapsed:,.0f} requests/s, "
+        f"{result.accepted:,} accepted, {result.invalid:,} invalid requests, "
+        f"{result.overloaded:,} retried after 503"
+    )
+    print(
+        "Request latency: "
+        + ", ".join(
+            f"p{percent:g} {percentile(latencies, percent) * 1000:.2f}ms"
+            for percent in (50, 90, 99, 99.9)
+        )
+        + f", max {latencies[-1] * 1000 if latencies else 0:.2f}ms"
+    )
+    if stats is not None:
+        print(
+            f"Service: {stats['batches']:,} batches, mean {stats['mean_batch_size']} "
+            f"and max {stats['max_batch_size']} transactions per batch"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Measure customer-sharded validation throughput across worker counts.
+
+Writes a synthetic input file, then validates it end to end with
+``sharding.run_sharded`` and in-memory storage, using 1, 2, 4 and 8 worker
+processes. Output files and the blockchain are written to a temporary folder.
+Speedups are bounded by the available CPU cores, and by the parent process,
+which parses customer IDs, writes results and appends to the blockchain.
+
+Usage:
+
+    cd fund-load-project
+    python benchmarks/bench_sharding.py [--lines 200000] [--customers 5000]
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from _constants import PRIME_TABLE_FILE
+from blockchain import BaseBlockchain
+from result_writer import ValidationResultWriter
+from sharding import run_sharded
+
+
+def write_synthetic_input(path: Path, lines: int, customers: int) -> None:
+    """Write ``lines`` loads with unique IDs, a few minutes apart."""
+
+    with open(path, "w") as f:
+        for n in range(lines):
+            minutes = n * 3
+            f.write(
+                json.dumps(
+                    {
+                        "id": str(n),
+                        "customer_id": str(n % customers),
+                        "load_amount": f"${n % 3000}.{n % 100:02d}",
+                        "time": (
+                            f"2000-{1 + minutes // 43200 % 12:02d}-"
+                            f"{1 + minutes // 1440 % 28:02d}T"
+                            f"{minutes // 60 % 24:02d}:{minutes % 60:02d}:00Z"
+                        ),
+                    }
+                )
+                + "\n"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=200_000)
+    parser.add_argument("--customers", type=int, default=5_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = Path(directory) / "input.txt"
+        write_synthetic_input(input_path, args.lines, args.customers)
+
+        print(
+            f"{args.lines:,} lines, {args.customers:,} customers, "
+            f"{os.cpu_count()} CPUs"
+        )
+        print(f"{'workers':>8} {'seconds':>9} {'lines/sec':>12} {'speedup':>8}")
+
+        baseline = None
+        for workers in args.workers:
+            output_folder = Path(directory) / f"workers-{workers}"
+            output_folder.mkdir()
+
+            start = time.perf_counter()
+            with BaseBlockchain(
+                storage_path=str(output_folder / "blockchain"), batch_size=1000
+            ) as blockchain, ValidationResultWriter(output_folder) as result_writer:
+                run_sharded(
+                    str(input_path),
+                    workers,
+                    result_writer,
+                    blockchain,
+                    prime_table_path=PRIME_TABLE_FILE,
+                )
+            seconds = time.perf_counter() - start
+
+            baseline = baseline or seconds
+            print(
+                f"{workers:>8} {seconds:>9.2f} {args.lines / seconds:>12,.0f} "
+                f"{baseline / seconds:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
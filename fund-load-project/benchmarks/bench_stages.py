@@ -0,0 +1,247 @@
+"""Time each stage of transaction processing separately on a synthetic input.
+
+Generates a seeded input with ``generate_input.py`` (or reads ``--input``) and
+processes it like main's streaming loop, timing each stage on its own:
+
+- parse: ``json.loads`` and ``Transaction``; lines that fail are counted as
+  malformed and skipped
+- store: ``store_customer_transaction``
+- validate: ``validate_transaction``
+- write: ``ValidationResultWriter.write``, or ``append_validation_result``
+  (one open per line) with ``--writer append``
+- blockchain: ``BaseBlockchain.add_transaction``, including block sealing
+
+Results are saved as JSON with the commit and the generator settings, and
+compared stage by stage against an earlier result with ``--compare``.
+
+Usage:
+
+    cd fund-load-project
+    python benchmarks/bench_stages.py [--lines 1000000] [--storage memory]
+        [--output results.json] [--compare previous.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Optional
+
+from _constants import PRIME_TABLE_FILE
+from _utils import append_validation_result
+from blockchain import BaseBlockchain
+from generate_input import add_generator_arguments, config_from_args, write_input
+from memory_storage import InMemoryTimeSeriesStorage
+from redis_storage import RedisTimeSeriesStorage
+from result_writer import ValidationResultWriter
+from transactions import Transaction
+from validator import Success, TransactionValidator
+
+STAGES = ["parse", "store", "validate", "write", "blockchain"]
+
+# A stage slower than this many times its previous result is flagged
+REGRESSION_THRESHOLD = 1.1
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_stages(
+    input_path: str,
+    output_folder: Path,
+    storage_backend: str,
+    writer: str,
+    block_transactions: int,
+) -> tuple[dict[str, dict[str, float]], int]:
+    """Process an input file, returning per-stage timings and malformed lines."""
+
+    storage = (
+        InMemoryTimeSeriesStorage()
+        if storage_backend == "memory"
+        else RedisTimeSeriesStorage()
+    )
+    storage.clear_all_transactions()
+    validator = TransactionValidator(storage, prime_table_path=PRIME_TABLE_FILE)
+
+    seconds = dict.fromkeys(STAGES, 0.0)
+    items = dict.fromkeys(STAGES, 0)
+    malformed = 0
+    clock = time.perf_counter
+
+    if writer == "buffered":
+        result_writer = ValidationResultWriter(output_folder)
+        write = result_writer.write
+    else:
+        result_writer = None
+
+        def write(transaction: Transaction, result: Any) -> None:
+            append_validation_result(output_folder, transaction, result)
+
+    with BaseBlockchain(
+        storage_path=str(output_folder / "blockchain"), batch_size=block_transactions
+    ) as blockchain:
+        with open(input_path, "r") as f:
+            for line in f:
+                start = clock()
+                try:
+                    transaction = Transaction(json.loads(line))
+                except (ValueError, KeyError):
+                    malformed += 1
+                    continue
+                parsed = clock()
+                storage.store_customer_transaction(transaction)
+                stored = clock()
+                result = validator.validate_transaction(transaction)
+                validated = clock()
+                write(transaction, result)
+                written = clock()
+
+                seconds["parse"] += parsed - start
+                seconds["store"] += stored - parsed
+                seconds["validate"] += validated - stored
+                seconds["write"] += written - validated
+                items["parse"] += 1
+
+                if isinstance(result, Success):
+                    blockchain.add_transaction(transaction)
+                    seconds["blockchain"] += clock() - written
+                    items["blockchain"] += 1
+
+        # The final block is sealed on close
+        start = clock()
+    seconds["blockchain"] += clock() - start
+
+    if result_writer is not None:
+        # Buffered lines are written and synced on close
+        start = clock()
+        result_writer.close()
+        seconds["write"] += clock() - start
+
+    for stage in ["store", "validate", "write"]:
+        items[stage] = items["parse"]
+
+    return {
+        stage: {
+            "items": items[stage],
+            "seconds": round(seconds[stage], 6),
+            "per_second": (
+                round(items[stage] / seconds[stage], 1) if seconds[stage] else 0.0
+            ),
+            "mean_us": (
+                round(seconds[stage] / items[stage] * 1e6, 3) if items[stage] else 0.0
+            ),
+        }
+        for stage in STAGES
+    }, malformed
+
+
+def compare(result: dict[str, Any], previous: dict[str, Any]) -> None:
+    print(
+        f"\nAgainst {previous.get('commit')} ({previous.get('timestamp')}), "
+        "mean time per item:"
+    )
+    for setting in ["generator", "input", "storage", "writer", "block_transactions"]:
+        if result.get(setting) != previous.get(setting):
+            print(f"Warning: runs differ in {setting}, timings are not comparable")
+
+    for stage in STAGES:
+        before = previous["stages"].get(stage, {}).get("mean_us")
+        after = result["stages"][stage]["mean_us"]
+        if not before or not after:
+            continue
+
+        ratio = after / before
+        flag = "  <-- slower" if ratio > REGRESSION_THRESHOLD else ""
+        print(f"{stage:>12} {before:>9.2f}us -> {after:>9.2f}us {ratio:>6.2f}x{flag}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_generator_arguments(parser)
+    parser.add_argument("--input", help="existing input file instead of generating")
+    parser.add_argument("--storage", choices=["memory", "redis"], default="memory")
+    parser.add_argument("--writer", choices=["buffered", "append"], default="buffered")
+    parser.add_argument("--block-transactions", type=int, default=1)
+    parser.add_argument(
+        "--output",
+        help="result JSON file (default: bench_stages-<commit>.json)",
+    )
+    parser.add_argument("--compare", help="earlier result JSON file to compare to")
+    args = parser.parse_args()
+
+    commit = current_commit()
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.input is None:
+            input_path = os.path.join(directory, "input.txt")
+            config = config_from_args(args)
+            start = time.perf_counter()
+            write_input(input_path, config)
+            print(
+                f"Generated {args.lines:,} lines in {time.perf_counter() - start:.1f}s"
+            )
+            generator = config.to_dict()
+        else:
+            input_path = args.input
+            generator = None
+
+        start = time.perf_counter()
+        stages, malformed = run_stages(
+            input_path,
+            Path(directory),
+            args.storage,
+            args.writer,
+            args.block_transactions,
+        )
+        total_seconds = time.perf_counter() - start
+
+    result = {
+        "commit": commit,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "input": args.input,
+        "generator": generator,
+        "storage": args.storage,
+        "writer": args.writer,
+        "block_transactions": args.block_transactions,
+        "malformed_lines": malformed,
+        "total_seconds": round(total_seconds, 3),
+        "stages": stages,
+    }
+
+    print(f"{'stage':>12} {'items':>10} {'seconds':>9} {'items/sec':>12} {'mean':>10}")
+    for stage, timing in stages.items():
+        print(
+            f"{stage:>12} {timing['items']:>10,} {timing['seconds']:>9.2f} "
+            f"{timing['per_second']:>12,.0f} {timing['mean_us']:>8.2f}us"
+        )
+    print(f"Malformed lines: {malformed:,}, total {total_seconds:.1f}s")
+
+    output = args.output or f"bench_stages-{commit or 'unknown'}.json"
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Saved {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
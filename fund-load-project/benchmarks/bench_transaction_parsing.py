@@ -0,0 +1,93 @@
+"""Measure Transaction parse throughput and memory on a large synthetic input.
+
+Writes a seeded file of input-format lines (mixing "$" and "USD$" amounts),
+then times ``json.loads`` + ``Transaction`` over every line and reports the
+memory retained per parsed Transaction.
+
+Usage:
+
+    cd fund-load-project
+    python benchmarks/bench_transaction_parsing.py [--lines 500000]
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from _constants import DATETIME_FORMAT
+from transactions import Transaction
+
+
+def write_synthetic_input(path: str, lines: int, seed: int = 0) -> None:
+    """Write lines in the input.txt format, one minute apart."""
+
+    rng = random.Random(seed)
+    start = datetime(2000, 1, 1)
+
+    with open(path, "w") as f:
+        for i in range(lines):
+            currency = "USD$" if rng.random() < 0.01 else "$"
+            record = {
+                "id": str(i),
+                "customer_id": str(rng.randint(1, 1000)),
+                "load_amount": f"{currency}{rng.randint(1, 500_000) / 100:.2f}",
+                "time": (start + timedelta(minutes=i)).strftime(DATETIME_FORMAT),
+            }
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+
+def parse_file(path: str) -> int:
+    """Parse every line of path into a Transaction, return the line count."""
+
+    count = 0
+    with open(path, "r") as f:
+        for line in f:
+            Transaction(json.loads(line))
+            count += 1
+
+    return count
+
+
+def retained_bytes_per_transaction(path: str) -> float:
+    """Return traced memory held per Transaction when all lines are kept alive."""
+
+    tracemalloc.start()
+    with open(path, "r") as f:
+        transactions = [Transaction(json.loads(line)) for line in f]
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return retained / len(transactions)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "input.txt")
+        write_synthetic_input(path, args.lines)
+
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            count = parse_file(path)
+            best = min(best, time.perf_counter() - start)
+
+        per_transaction = retained_bytes_per_transaction(path)
+
+    print(
+        f"parsed {count} lines: {count / best:,.0f} lines/sec (best of {args.repeat})"
+    )
+    print(f"retained memory: {per_transaction:,.0f} bytes/transaction")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Measure blockchain verification throughput across worker counts.
+
+Writes a synthetic hashed chain to a temporary folder, then verifies it with
+``verify.verify_chain`` using 1, 2, 4 and 8 worker processes (1 runs in this
+process, without a pool). Speedups are bounded by the available CPU cores.
+
+Usage:
+
+    cd fund-load-project
+    python benchmarks/bench_verify.py [--blocks 20000] [--transactions 20]
+"""
+
+import argparse
+import os
+import tempfile
+
+from blockchain import BaseBlockchain
+from transactions import Transaction
+from verify import verify_chain
+
+
+def write_synthetic_chain(path: str, blocks: int, transactions: int) -> None:
+    """Seal ``blocks`` blocks of ``transactions`` transactions each."""
+
+    with BaseBlockchain(storage_path=path, batch_size=transactions) as blockchain:
+        for n in range(blocks * transactions):
+            blockchain.add_transaction(
+                Transaction(
+                    {
+                        "id": str(n),
+                        "customer_id": str(n % 1000),
+                        "load_amount": f"${n % 5000}.{n % 100:02d}",
+                        "time": "2000-01-01T00:00:00Z",
+                    }
+                )
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--blocks", type=int, default=20_000)
+    parser.add_argument("--transactions", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_synthetic_chain(directory, args.blocks, args.transactions)
+        size = sum(entry.stat().st_size for entry in os.scandir(directory))
+
+        print(
+            f"{args.blocks:,} blocks x {args.transactions} transactions "
+            f"({size / 1024 / 1024:.1f} MiB), {os.cpu_count()} CPUs"
+        )
+        print(f"{'workers':>8} {'seconds':>9} {'blocks/sec':>12} {'speedup':>8}")
+
+        baseline = None
+        for workers in args.workers:
+            report = verify_chain(directory, workers=workers)
+            assert report.is_valid, report.error
+
+            baseline = baseline or report.seconds
+            print(
+                f"{workers:>8} {report.seconds:>9.2f} "
+                f"{report.blocks_per_second:>12,.0f} "
+                f"{baseline / report.seconds:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
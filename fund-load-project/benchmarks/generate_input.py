@@ -0,0 +1,196 @@
+"""Generate a seeded synthetic input file in the input.txt format.
+
+Lines are ``{"id","customer_id","load_amount","time"}`` records in time order,
+with a configurable customer count, Zipf skew of the load per customer, share
+of prime transaction IDs, share of loads made on Mondays and rate of malformed
+lines. The same arguments and seed always produce the same file, and lines are
+streamed to disk, so 100M-line files need no more memory than 1K-line ones.
+
+Usage:
+
+    cd fund-load-project
+    python benchmarks/generate_input.py out.txt [--lines 1000000] [--customers 10000]
+        [--skew 1.1] [--prime-ratio 0.1] [--monday-share 0.3]
+        [--malformed-rate 0.001] [--seed 0]
+"""
+
+import argparse
+import itertools
+import json
+import random
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Iterator
+
+from _constants import DATETIME_FORMAT
+from prime_table import is_prime_miller_rabin
+
+START_TIME = datetime(2000, 1, 1)
+DEFAULT_LINES_PER_DAY = 2_000
+
+
+class GeneratorConfig:
+    def __init__(
+        self,
+        lines: int = 1_000_000,
+        customers: int = 10_000,
+        skew: float = 1.1,
+        prime_ratio: float = 0.1,
+        monday_share: float = 1 / 7,
+        malformed_rate: float = 0.0,
+        lines_per_day: int = DEFAULT_LINES_PER_DAY,
+        seed: int = 0,
+    ):
+        self.lines = lines
+        self.customers = customers
+        # Zipf exponent of the loads per customer; 0 spreads them evenly
+        self.skew = skew
+        self.prime_ratio = prime_ratio
+        self.monday_share = monday_share
+        self.malformed_rate = malformed_rate
+        # Average over the week; Mondays get more or fewer lines than other days
+        self.lines_per_day = lines_per_day
+        self.seed = seed
+
+    def to_dict(self) -> dict[str, float]:
+        return dict(vars(self))
+
+
+def _customer_picker(rng: random.Random, customers: int, skew: float):
+    """Draw customer IDs with Zipf weights 1 / rank ** skew."""
+
+    cumulative_weights = list(
+        itertools.accumulate(1 / rank**skew for rank in range(1, customers + 1))
+    )
+    total = cumulative_weights[-1]
+    # Customer IDs in a random order, so busy customers are not the low IDs
+    customer_ids = [str(n) for n in rng.sample(range(1, customers + 1), customers)]
+
+    def pick() -> str:
+        return customer_ids[bisect_left(cumulative_weights, rng.random() * total)]
+
+    return pick
+
+
+def _next_id(rng: random.Random, last_id: int, prime: bool) -> int:
+    """Next unique transaction ID above last_id, prime or not as asked."""
+
+    transaction_id = last_id + rng.randint(1, 3)
+    while is_prime_miller_rabin(transaction_id) != prime:
+        transaction_id += 1
+
+    return transaction_id
+
+
+def _day_line_counts(rng: random.Random, config: GeneratorConfig) -> Iterator[int]:
+    """Lines per day, weighted so Mondays hold ``monday_share`` of all lines."""
+
+    # A Monday weighs w against 1 for the other six days: share = w / (w + 6)
+    monday_weight = 6 * config.monday_share / (1 - config.monday_share)
+    week_weight = monday_weight + 6
+
+    day = START_TIME
+    while True:
+        weight = monday_weight if day.weekday() == 0 else 1
+        expected = config.lines_per_day * 7 * weight / week_weight
+        yield max(round(expected * rng.uniform(0.8, 1.2)), 0)
+        day += timedelta(days=1)
+
+
+def _malformed(rng: random.Random, record: dict[str, str]) -> str:
+    """A broken variant of a record, as seen from misbehaving producers."""
+
+    kind = rng.randrange(4)
+    if kind == 0:
+        line = json.dumps(record, separators=(",", ":"))
+        return line[: rng.randrange(1, len(line))]
+    if kind == 1:
+        del record[rng.choice(list(record))]
+    elif kind == 2:
+        record["load_amount"] = "$" + "x" * rng.randint(1, 5)
+    else:
+        record["time"] = record["time"].replace("T", " ")
+
+    return json.dumps(record, separators=(",", ":"))
+
+
+def generate_lines(config: GeneratorConfig) -> Iterator[str]:
+    """Yield input lines (without newline) for a generator configuration."""
+
+    rng = random.Random(config.seed)
+    pick_customer = _customer_picker(rng, config.customers, config.skew)
+
+    last_id = 0
+    produced = 0
+    day = START_TIME
+
+    for count in _day_line_counts(rng, config):
+        count = min(count, config.lines - produced)
+        seconds = sorted(rng.randrange(24 * 3600) for _ in range(count))
+
+        for second in seconds:
+            last_id = _next_id(rng, last_id, rng.random() < config.prime_ratio)
+            # Mostly small loads, a few up to the 5,000 daily limit and beyond
+            cents = min(int(rng.lognormvariate(11, 1.2)), 999_999)
+
+            record = {
+                "id": str(last_id),
+                "customer_id": pick_customer(),
+                "load_amount": f"${cents // 100}.{cents % 100:02d}",
+                "time": (day + timedelta(seconds=second)).strftime(DATETIME_FORMAT),
+            }
+
+            if config.malformed_rate and rng.random() < config.malformed_rate:
+                yield _malformed(rng, record)
+            else:
+                yield json.dumps(record, separators=(",", ":"))
+
+        produced += count
+        if produced >= config.lines:
+            return
+        day += timedelta(days=1)
+
+
+def write_input(path: str, config: GeneratorConfig) -> None:
+    with open(path, "w", buffering=1 << 20) as f:
+        for line in generate_lines(config):
+            f.write(line + "\n")
+
+
+def add_generator_arguments(parser: argparse.ArgumentParser) -> None:
+    defaults = GeneratorConfig()
+
+    parser.add_argument("--lines", type=int, default=defaults.lines)
+    parser.add_argument("--customers", type=int, default=defaults.customers)
+    parser.add_argument("--skew", type=float, default=defaults.skew)
+    parser.add_argument("--prime-ratio", type=float, default=defaults.prime_ratio)
+    parser.add_argument("--monday-share", type=float, default=defaults.monday_share)
+    parser.add_argument("--malformed-rate", type=float, default=defaults.malformed_rate)
+    parser.add_argument("--lines-per-day", type=int, default=defaults.lines_per_day)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def config_from_args(args: argparse.Namespace) -> GeneratorConfig:
+    return GeneratorConfig(
+        lines=args.lines,
+        customers=args.customers,
+        skew=args.skew,
+        prime_ratio=args.prime_ratio,
+        monday_share=args.monday_share,
+        malformed_rate=args.malformed_rate,
+        lines_per_day=args.lines_per_day,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", help="file to write")
+    add_generator_arguments(parser)
+    args = parser.parse_args()
+
+    write_input(args.path, config_from_args(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -18,6 +18,21 @@ AMOUNT_PATTERN = r"^(USD)?\$\d+\.\d{2}$"
 
 DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
 
+# Fast path for DATETIME_FORMAT with zero-padded fields, e.g. 2000-01-01T00:00:00Z
+# Groups: year, month, day, hour, minute, second
+DATETIME_PATTERN = (
+    r"^([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2}):([0-9]{2})Z$"
+)
+
 INPUT_FILE = "inputs/input.txt"
 
 OUTPUT_FOLDER = "outputs/"
+
+# Append-only blockchain segment files
+BLOCKCHAIN_FOLDER = OUTPUT_FOLDER + "blockchain/"
+
+# Blockchain layout written before segment storage, a single JSON array
+LEGACY_BLOCKCHAIN_FILE = OUTPUT_FOLDER + "blockchain.json"
+
+# Memory-mapped prime sieve cache, shared by validator processes
+PRIME_TABLE_FILE = ".cache/prime_table.bin"
@@ -5,9 +5,11 @@ from transactions import Transaction
 from validator import Failure, Result, Success
 
 
-def append_validation_result(
-    folder_path: Path, transaction: Transaction, accepted: Result
-):
+def format_validation_result(
+    transaction: Transaction, accepted: Result
+) -> tuple[str, str]:
+    """Return the output.txt and output_with_detail.jsonl lines for a result."""
+
     # Prepare dict in required format
     result: dict[str, Any] = {
         "id": transaction.transaction_id,
@@ -15,12 +17,6 @@ def append_validation_result(
         "accepted": True if isinstance(accepted, Success) else False,
     }
 
-    filepath = folder_path / "output.txt"
-
-    # Append JSON line to file
-    with open(filepath, "a") as f:
-        f.write(json.dumps(result, separators=(",", ":")) + "\n")
-
     # Prepare dict for detailed results
     detailed_results: dict[str, Any] = {
         **result,
@@ -29,11 +25,24 @@ def append_validation_result(
         ),
     }
 
-    filepath = folder_path / "output_with_detail.jsonl"
+    return (
+        json.dumps(result, separators=(",", ":")) + "\n",
+        json.dumps(detailed_results) + "\n",
+    )
+
+
+def append_validation_result(
+    folder_path: Path, transaction: Transaction, accepted: Result
+):
+    line, detailed_line = format_validation_result(transaction, accepted)
+
+    # Append JSON line to file
+    with open(folder_path / "output.txt", "a") as f:
+        f.write(line)
 
     # Append JSON line to file
-    with open(filepath, "a") as f:
-        f.write(json.dumps(detailed_results) + "\n")
+    with open(folder_path / "output_with_detail.jsonl", "a") as f:
+        f.write(detailed_line)
 
 
 def clean_directory(path: Path) -> None:
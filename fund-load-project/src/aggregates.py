@@ -0,0 +1,208 @@
+from collections import deque
+from datetime import date, datetime
+from typing import Any
+from transactions import EPOCH, ONE_SECOND, Transaction
+
+WEEK_SECONDS = 7 * 24 * 3600
+
+
+def weighted_cents(cents: int, transaction_date: date) -> int:
+    """Return load amount cents, doubled if the date is a Monday."""
+
+    # Double the amount if the transaction date is a Monday
+    if transaction_date.weekday() == 0:
+        cents *= 2
+
+    return cents
+
+
+class CustomerAggregate:
+    """Rolling daily and trailing 7 day aggregates for a single customer.
+
+    Entries are kept in timestamp order; sums are Monday-weighted integer cents
+    so that adding and expiring entries never accumulates float error.
+    """
+
+    def __init__(self):
+        # (timestamp, transaction key, weighted cents), oldest first
+        self.entries: deque[tuple[float, str, int]] = deque()
+        self.keys: set[str] = set()
+        self.last_timestamp = float("-inf")
+
+        self.day_start = 0
+        self.daily_count = 0
+        self.daily_total = 0
+        self.weekly_total = 0
+
+    def can_append(self, timestamp: float, transaction_key: str) -> bool:
+        """Whether an entry can be added incrementally (in order and not a re-store)."""
+        return timestamp >= self.last_timestamp and transaction_key not in self.keys
+
+    def is_out_of_order(self, timestamp: float) -> bool:
+        return timestamp < self.last_timestamp
+
+    def append(self, timestamp: float, transaction_key: str, cents: int) -> None:
+        self.entries.append((timestamp, transaction_key, cents))
+        self.keys.add(transaction_key)
+        self.last_timestamp = max(self.last_timestamp, timestamp)
+
+        self.weekly_total += cents
+        if timestamp >= self.day_start:
+            self.daily_count += 1
+            self.daily_total += cents
+
+    def slide(self, day_start: int, week_start: int) -> list[str]:
+        """Expire entries older than the windows starting at day_start / week_start.
+
+        Returns the transaction keys of the expired entries.
+        """
+
+        expired = []
+        while self.entries and self.entries[0][0] < week_start:
+            _, transaction_key, cents = self.entries.popleft()
+            self.keys.discard(transaction_key)
+            self.weekly_total -= cents
+            expired.append(transaction_key)
+
+        if day_start != self.day_start:
+            # A new day only holds the most recent entries, so scan from the right
+            self.day_start = day_start
+            self.daily_count = 0
+            self.daily_total = 0
+            for timestamp, _, cents in reversed(self.entries):
+                if timestamp < day_start:
+                    break
+                self.daily_count += 1
+                self.daily_total += cents
+
+        return expired
+
+
+class RollingAggregates:
+    """Per-customer rolling aggregates, updated as transactions are recorded.
+
+    A transaction ID reused by another customer overwrites the stored
+    ``tx:{id}`` record, which the windows of the earlier customer still list
+    at its own timestamp, but with the new record's amount and date. An
+    aggregate cannot hold such an entry, so the earlier customer's aggregate
+    is discarded and the customer validated against storage until the entry
+    leaves its window.
+    """
+
+    def __init__(self):
+        self.customers: dict[str, CustomerAggregate] = {}
+        # Transaction key -> customer whose aggregate holds it
+        self.owners: dict[str, str] = {}
+
+    def _release(self, transaction_keys: list[str], customer_id: str) -> None:
+        for transaction_key in transaction_keys:
+            if self.owners.get(transaction_key) == customer_id:
+                del self.owners[transaction_key]
+
+    def discard_overwritten(self, transaction: Transaction) -> None:
+        """Discard another customer's aggregate holding the key a stored transaction overwrote."""
+
+        owner = self.owners.get(f"tx:{transaction.transaction_id}")
+        if owner is not None and owner != transaction.customer_id:
+            self.discard_customer(owner)
+
+    def record_transaction(
+        self, transaction: Transaction, day_start: int
+    ) -> CustomerAggregate | None:
+        """Add a stored transaction to its customer's aggregate.
+
+        Returns None when the aggregate cannot be updated incrementally
+        (unknown customer or a re-stored transaction ID), in which case it must
+        be reseeded from storage with ``seed_customer``. Out-of-order
+        transactions must be checked with ``is_out_of_order`` beforehand.
+        """
+
+        self.discard_overwritten(transaction)
+
+        customer_id = transaction.customer_id
+        aggregate = self.customers.get(customer_id)
+        transaction_key = f"tx:{transaction.transaction_id}"
+        timestamp = transaction.transaction_timetamp
+
+        if aggregate is None or not aggregate.can_append(timestamp, transaction_key):
+            return None
+
+        aggregate.append(
+            timestamp,
+            transaction_key,
+            weighted_cents(transaction.load_amount_cents, transaction.transaction_date),
+        )
+        self.owners[transaction_key] = customer_id
+        self._release(
+            aggregate.slide(day_start, int(timestamp - WEEK_SECONDS)), customer_id
+        )
+
+        return aggregate
+
+    def is_out_of_order(self, transaction: Transaction) -> bool:
+        """Whether the transaction is older than the customer's latest recorded one."""
+
+        aggregate = self.customers.get(transaction.customer_id)
+
+        return aggregate is not None and aggregate.is_out_of_order(
+            transaction.transaction_timetamp
+        )
+
+    def discard_customer(self, customer_id: str) -> None:
+        aggregate = self.customers.pop(customer_id, None)
+        if aggregate is not None:
+            self._release(list(aggregate.keys), customer_id)
+
+    def seed_customer(
+        self,
+        transaction: Transaction,
+        day_start: int,
+        weekly_transactions: list[dict[str, Any]],
+    ) -> CustomerAggregate | None:
+        """Rebuild a customer's aggregate from its stored transactions.
+
+        ``weekly_transactions`` are those stored since the start of the
+        trailing 7 day window, including any later than the transaction.
+        Returns None, leaving the customer without aggregate, when some are
+        later (the aggregate could only be appended to from the latest one)
+        or when a transaction ID was since reused by another customer.
+        """
+
+        customer_id = transaction.customer_id
+        self.discard_customer(customer_id)
+
+        if any(tx["customer_id"] != customer_id for tx in weekly_transactions):
+            return None
+
+        aggregate = CustomerAggregate()
+
+        entries = []
+        for tx in weekly_transactions:
+            tx_datetime = datetime.fromisoformat(tx["transaction_datetime"])
+            timestamp = (tx_datetime - EPOCH) // ONE_SECOND
+            if timestamp > transaction.transaction_timetamp:
+                return None
+
+            entries.append(
+                (
+                    timestamp,
+                    f"tx:{tx['id']}",
+                    weighted_cents(round(tx["load_amount"] * 100), tx_datetime.date()),
+                )
+            )
+
+        for entry in sorted(entries):
+            aggregate.append(*entry)
+
+        aggregate.day_start = -1
+        aggregate.slide(day_start, int(transaction.transaction_timetamp - WEEK_SECONDS))
+
+        for transaction_key in aggregate.keys:
+            self.owners[transaction_key] = customer_id
+
+        self.customers[customer_id] = aggregate
+        return aggregate
+
+    def clear(self) -> None:
+        self.customers.clear()
+        self.owners.clear()
@@ -0,0 +1,382 @@
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+
+from memory_storage import InMemoryTimeSeriesStorage
+from prime_table import generate_prime_sieve
+from transactions import Transaction
+from validator import Failure, TransactionValidator
+
+DAY_SECONDS = 24 * 3600
+WEEK_SECONDS = 7 * DAY_SECONDS
+
+# IDs up to this bound are looked up in a sieve sized for the file (50 MB at most)
+BATCH_SIEVE_LIMIT = 100_000_000
+
+# Trial divisors applied to IDs beyond the sieve before Miller-Rabin
+SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47)
+
+# Lines in the exact layout of inputs/input.txt are split into columns with one
+# regex pass per chunk; any other line sends its chunk through Transaction.
+# Groups: id, customer_id, dollars, cents, time without the "Z" suffix
+CANONICAL_LINE_REGEX = re.compile(
+    rb'^\{"id":"([0-9]+)","customer_id":"([0-9]+)",'
+    rb'"load_amount":"(?:USD)?\$([0-9]+)\.([0-9]{2})",'
+    rb'"time":"([0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2})Z"\}$',
+    re.MULTILINE,
+)
+
+# Result codes; index 0 is accepted, others index the Failure messages
+RESULT_MESSAGES = [
+    "Transaction valid",
+    "Prime ID: more than one daily transaction",
+    "Prime ID: daily total exceeds 9,999",
+    "Normal ID: more than three daily transactions",
+    "Normal ID: daily total exceeds 5,000",
+    "Normal ID: weekly total exceeds 20,000",
+]
+
+
+class TransactionColumns:
+    """Columnar view of an input file, in input order."""
+
+    def __init__(
+        self,
+        transaction_ids: np.ndarray,
+        customer_ids: np.ndarray,
+        timestamps: np.ndarray,
+        cents: np.ndarray,
+    ):
+        self.transaction_ids = transaction_ids  # bytes, as written in the input
+        self.customer_ids = customer_ids  # bytes, as written in the input
+        self.timestamps = timestamps  # int64 Unix seconds (UTC)
+        self.cents = cents  # int64 load amount in cents
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def empty(cls) -> "TransactionColumns":
+        return cls(
+            np.array([], dtype="S"),
+            np.array([], dtype="S"),
+            np.array([], dtype=np.int64),
+            np.array([], dtype=np.int64),
+        )
+
+    @classmethod
+    def concatenate(cls, chunks: list["TransactionColumns"]) -> "TransactionColumns":
+        if not chunks:
+            return cls.empty()
+
+        return cls(
+            np.concatenate([chunk.transaction_ids for chunk in chunks]),
+            np.concatenate([chunk.customer_ids for chunk in chunks]),
+            np.concatenate([chunk.timestamps for chunk in chunks]),
+            np.concatenate([chunk.cents for chunk in chunks]),
+        )
+
+
+def _parse_canonical_chunk(chunk: bytes) -> TransactionColumns | None:
+    """Parse a chunk of canonical lines, or return None if any line is not canonical."""
+
+    rows = CANONICAL_LINE_REGEX.findall(chunk)
+
+    # One match per line at most, so equal counts mean every line matched
+    if len(rows) != chunk.count(b"\n") + (not chunk.endswith(b"\n")):
+        return None
+
+    if not rows:
+        return TransactionColumns.empty()
+
+    transaction_ids, customer_ids, dollars, cents, times = map(np.array, zip(*rows))
+
+    try:
+        datetimes = times.astype("datetime64[s]")
+    except ValueError:
+        # Out of range fields, e.g. 2000-02-30
+        return None
+
+    # numpy accepts year 0, which datetime rejects
+    if np.char.startswith(times, b"0000").any():
+        return None
+
+    return TransactionColumns(
+        transaction_ids,
+        customer_ids,
+        datetimes.astype(np.int64),
+        dollars.astype(np.int64) * 100 + cents.astype(np.int64),
+    )
+
+
+def _parse_chunk_with_transactions(chunk: bytes) -> TransactionColumns:
+    """Parse a chunk line by line through Transaction, with its exact validation."""
+
+    transactions = []
+    for raw_line in chunk.decode().splitlines():
+        line = raw_line.strip()
+        if not line:
+            continue
+        transactions.append(Transaction(json.loads(line)))
+
+    if not transactions:
+        return TransactionColumns.empty()
+
+    return TransactionColumns(
+        np.array([tx.transaction_id.encode() for tx in transactions], dtype="S"),
+        np.array([tx.customer_id.encode() for tx in transactions], dtype="S"),
+        np.array([tx.timestamp for tx in transactions], dtype=np.int64),
+        np.array([tx.load_amount_cents for tx in transactions], dtype=np.int64),
+    )
+
+
+def read_transaction_columns(
+    input_path: str, chunk_size: int = 1 << 24
+) -> TransactionColumns:
+    """Load an input file into columnar arrays, reading about chunk_size bytes at a time."""
+
+    chunks: list[TransactionColumns] = []
+
+    with open(input_path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            # Extend to the end of the current line
+            chunk += f.readline()
+
+            columns = _parse_canonical_chunk(chunk)
+            if columns is None:
+                columns = _parse_chunk_with_transactions(chunk)
+            chunks.append(columns)
+
+    return TransactionColumns.concatenate(chunks)
+
+
+def _prime_flags(
+    transaction_ids: np.ndarray, validator: TransactionValidator
+) -> np.ndarray:
+    """Vectorized prime check of transaction IDs against the validator's sieve."""
+
+    # Up to 18 digits always fits in int64
+    if len(transaction_ids) and np.char.str_len(transaction_ids).max() > 18:
+        return np.array(
+            [validator._is_prime(tx_id.decode()) for tx_id in transaction_ids]
+        )
+
+    numbers = transaction_ids.astype(np.int64)
+    largest = int(numbers.max(initial=0))
+
+    if validator.prime_limit <= largest < BATCH_SIEVE_LIMIT:
+        # One larger sieve is far cheaper than Miller-Rabin on every ID above the limit
+        sieve_limit = largest + 1
+        sieve = np.frombuffer(generate_prime_sieve(sieve_limit), dtype=np.uint8)
+    else:
+        sieve_limit = validator.prime_limit
+        sieve = np.frombuffer(validator.prime_sieve, dtype=np.uint8)
+
+    in_sieve = numbers < sieve_limit
+    flags = np.zeros(len(numbers), dtype=bool)
+
+    odd = in_sieve & (numbers % 2 == 1)
+    flags[odd] = sieve[numbers[odd] >> 1].astype(bool)
+    flags[numbers == 2] = True
+
+    # IDs beyond the sieve with a small factor are composite; the rest use
+    # Miller-Rabin one by one
+    candidates = np.flatnonzero(~in_sieve)
+    for small_prime in SMALL_PRIMES:
+        candidates = candidates[numbers[candidates] % small_prime != 0]
+
+    for i in candidates:
+        flags[i] = validator._is_prime(transaction_ids[i].decode())
+
+    return flags
+
+
+def _vectorized_result_codes(
+    columns: TransactionColumns, customer_codes: np.ndarray, prime: np.ndarray
+) -> np.ndarray:
+    """Apply the validation rules to every transaction at once.
+
+    Assumes each customer's transactions arrive in timestamp order with unique
+    IDs, so the stored window of a transaction is every earlier transaction of
+    the same customer within the window bounds.
+    """
+
+    timestamps = columns.timestamps
+    monday = (timestamps // DAY_SECONDS + 3) % 7 == 0
+    weighted = np.where(monday, columns.cents * 2, columns.cents)
+
+    # Sort by customer, then time, then arrival so ties keep arrival order
+    order = np.lexsort((np.arange(len(columns)), timestamps, customer_codes))
+
+    # Single sortable key per transaction: customer blocks of disjoint time ranges
+    offset = timestamps.min() - WEEK_SECONDS
+    span = timestamps.max() - offset + 1
+    keys = customer_codes[order] * span + (timestamps[order] - offset)
+
+    day_start = keys - timestamps[order] % DAY_SECONDS
+    week_start = keys - WEEK_SECONDS
+
+    position = np.arange(len(columns))
+    day_left = np.searchsorted(keys, day_start, side="left")
+    week_left = np.searchsorted(keys, week_start, side="left")
+
+    cumulative = np.concatenate(([0], np.cumsum(weighted[order])))
+    daily_count = position - day_left + 1
+    daily_total = cumulative[position + 1] - cumulative[day_left]
+    weekly_total = cumulative[position + 1] - cumulative[week_left]
+
+    sorted_prime = prime[order]
+    codes_sorted = np.select(
+        [
+            sorted_prime & (daily_count > 1),
+            sorted_prime & (daily_total > 999_900),
+            sorted_prime,
+            daily_count > 3,
+            daily_total > 500_000,
+            weekly_total > 2_000_000,
+        ],
+        [1, 2, 0, 3, 4, 5],
+        default=0,
+    )
+
+    codes = np.empty(len(columns), dtype=np.int8)
+    codes[order] = codes_sorted
+    return codes
+
+
+def _irregular_customers(
+    columns: TransactionColumns, customer_codes: np.ndarray
+) -> np.ndarray:
+    """Return a mask of customers with duplicate transaction IDs or out-of-order times.
+
+    Their storage windows depend on overwritten keys or on arrival order, so
+    they are replayed through the streaming validator instead.
+    """
+
+    irregular = np.zeros(customer_codes.max() + 1 if len(columns) else 0, dtype=bool)
+
+    _, id_inverse, id_counts = np.unique(
+        columns.transaction_ids, return_inverse=True, return_counts=True
+    )
+    irregular[customer_codes[id_counts[id_inverse] > 1]] = True
+
+    # Stable sort by customer keeps arrival order within each customer
+    order = np.argsort(customer_codes, kind="stable")
+    same_customer = customer_codes[order][1:] == customer_codes[order][:-1]
+    went_back = np.diff(columns.timestamps[order]) < 0
+    irregular[customer_codes[order][1:][same_customer & went_back]] = True
+
+    return irregular
+
+
+def _replay_result_codes(
+    columns: TransactionColumns, indices: np.ndarray, validator: TransactionValidator
+) -> np.ndarray:
+    """Run transactions through in-memory storage and the streaming validator."""
+
+    storage = InMemoryTimeSeriesStorage()
+    replay_validator = TransactionValidator(
+        storage,
+        prime_limit=validator.prime_limit,
+        prime_table_path=validator.prime_table_path,
+    )
+
+    codes = np.zeros(len(indices), dtype=np.int8)
+    for n, i in enumerate(indices):
+        cents = int(columns.cents[i])
+        transaction = Transaction(
+            {
+                "id": columns.transaction_ids[i].decode(),
+                "customer_id": columns.customer_ids[i].decode(),
+                "load_amount": f"${cents // 100}.{cents % 100:02d}",
+                "time": f"{columns.timestamps[i].astype('datetime64[s]')}Z",
+            }
+        )
+        storage.store_customer_transaction(transaction)
+        result = replay_validator.validate_transaction(transaction)
+
+        if isinstance(result, Failure):
+            codes[n] = RESULT_MESSAGES.index(result.message)
+
+    return codes
+
+
+def validate_columns(
+    columns: TransactionColumns, validator: TransactionValidator
+) -> np.ndarray:
+    """Return a result code (index into RESULT_MESSAGES) per transaction."""
+
+    if not len(columns):
+        return np.zeros(0, dtype=np.int8)
+
+    _, customer_codes = np.unique(columns.customer_ids, return_inverse=True)
+    customer_codes = customer_codes.astype(np.int64)
+    prime = _prime_flags(columns.transaction_ids, validator)
+
+    codes = _vectorized_result_codes(columns, customer_codes, prime)
+
+    irregular = _irregular_customers(columns, customer_codes)
+    if irregular.any():
+        indices = np.flatnonzero(irregular[customer_codes])
+        codes[indices] = _replay_result_codes(columns, indices, validator)
+
+    return codes
+
+
+def write_validation_results(
+    folder_path: Path,
+    columns: TransactionColumns,
+    codes: np.ndarray,
+    batch_lines: int = 1 << 20,
+) -> None:
+    """Write output.txt and output_with_detail.jsonl as append_validation_result does."""
+
+    # IDs are digits only, so formatting matches json.dumps byte for byte
+    accepted = [
+        b"true" if code == 0 else b"false" for code in range(len(RESULT_MESSAGES))
+    ]
+    details = [json.dumps(message).encode() for message in RESULT_MESSAGES]
+
+    with open(folder_path / "output.txt", "wb") as output, open(
+        folder_path / "output_with_detail.jsonl", "wb"
+    ) as detailed_output:
+        for start in range(0, len(columns), batch_lines):
+            rows = zip(
+                columns.transaction_ids[start : start + batch_lines].tolist(),
+                columns.customer_ids[start : start + batch_lines].tolist(),
+                codes[start : start + batch_lines].tolist(),
+            )
+            lines = []
+            detailed_lines = []
+            for tx_id, customer_id, code in rows:
+                lines.append(
+                    b'{"id":"%s","customer_id":"%s","accepted":%s}\n'
+                    % (tx_id, customer_id, accepted[code])
+                )
+                detailed_lines.append(
+                    b'{"id": "%s", "customer_id": "%s", "accepted": %s, "details": %s}\n'
+                    % (tx_id, customer_id, accepted[code], details[code])
+                )
+            output.write(b"".join(lines))
+            detailed_output.write(b"".join(detailed_lines))
+
+
+def validate_file(
+    input_path: str, output_folder: Path, validator: TransactionValidator
+) -> np.ndarray:
+    """Validate a whole input file offline and write the result files.
+
+    Produces the same output.txt and output_with_detail.jsonl as the streaming
+    path of ``main``; returns the result codes in input order.
+    """
+
+    columns = read_transaction_columns(input_path)
+    codes = validate_columns(columns, validator)
+    write_validation_results(output_folder, columns, codes)
+
+    return codes
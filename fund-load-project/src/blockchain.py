@@ -1,8 +1,14 @@
 from datetime import datetime
 import json
 import os
-from typing import Any, List, Optional
+import threading
+import time
+from typing import Any, Iterator, List, Optional, overload
 from abc import ABC
+from hashlib import sha256
+from chain_lookup import ChainLookupIndex
+from chain_storage import SegmentedChainStorage, migrate_legacy_chain
+from merkle import MerkleAccumulator, merkle_root
 from transactions import Transaction
 
 
@@ -13,101 +19,348 @@ class Block:
         previous_hash: str,
         timestamp: int,  # store timestamp as int (Unix epoch) for serialization
         transactions: List[Transaction],  # should be a list, not single transaction
+        merkle_root: Optional[str] = None,
+        block_hash: Optional[str] = None,
     ):
         self.index = index
         self.previous_hash = previous_hash
         self.timestamp = timestamp
         self.transactions = transactions
+        # Hashed once at seal time; loaded blocks keep their stored hashes
+        self.merkle_root = (
+            merkle_root if merkle_root is not None else self.compute_merkle_root()
+        )
+        self.hash = block_hash if block_hash is not None else self.compute_hash()
+
+    def compute_merkle_root(self) -> str:
+        """Merkle root over the canonical encoding of the transactions."""
+        return merkle_root(tx.to_canonical_bytes() for tx in self.transactions).hex()
+
+    def header_bytes(self) -> bytes:
+        """Compact header encoding covered by the block hash."""
+        return b"%d,%s,%d,%d,%s" % (
+            self.index,
+            self.previous_hash.encode(),
+            self.timestamp,
+            len(self.transactions),
+            self.merkle_root.encode(),
+        )
+
+    def compute_hash(self) -> str:
+        return sha256(self.header_bytes()).hexdigest()
 
     def to_dict(self) -> dict[str, Any]:
         return {
             "index": self.index,
             "previous_hash": self.previous_hash,
             "timestamp": self.timestamp,
+            "merkle_root": self.merkle_root,
+            "hash": self.hash,
             "transactions": [tx.to_dict() for tx in self.transactions],
         }
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "Block":
         transactions = [Transaction.from_dict(tx) for tx in data["transactions"]]
+        # Blocks written before hashing are hashed on load
         return cls(
             index=data["index"],
             previous_hash=data["previous_hash"],
             timestamp=data["timestamp"],
             transactions=transactions,
+            merkle_root=data.get("merkle_root"),
+            block_hash=data.get("hash"),
         )
 
 
+class LazyChain:
+    """Read-only sequence of the stored blocks, materialized on access.
+
+    Blocks are located through the storage offset index. The tip is cached so
+    sealing the next block does not re-read it.
+    """
+
+    def __init__(self, storage: SegmentedChainStorage):
+        self.storage = storage
+        self._tip: Optional[Block] = None
+
+    def __len__(self) -> int:
+        return self.storage.block_count
+
+    @overload
+    def __getitem__(self, position: int) -> Block: ...
+
+    @overload
+    def __getitem__(self, position: slice) -> List[Block]: ...
+
+    def __getitem__(self, position: int | slice) -> Block | List[Block]:
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+
+        length = len(self)
+        if position < 0:
+            position += length
+
+        # A block being sealed is stored before it becomes the tip, so the
+        # cached tip may be the block before the last stored one
+        tip = self._tip
+        if tip is not None and tip.index == position + 1:
+            return tip
+
+        block = Block.from_dict(self.storage.read_block(position))
+        if position == length - 1 and (tip is None or tip.index < block.index):
+            self._tip = block
+
+        return block
+
+    def __iter__(self) -> Iterator[Block]:
+        for position in range(len(self)):
+            yield self[position]
+
+    def append(self, block: Block) -> None:
+        """Record a block just written to storage as the new tip."""
+        if self._tip is None or self._tip.index < block.index:
+            self._tip = block
+
+
 class BaseBlockchain(ABC):
     def __init__(
         self,
         storage_path: str,
         batch_size: int = 1,
+        legacy_storage_path: Optional[str] = None,
+        max_block_bytes: Optional[int] = None,
+        max_block_age: Optional[float] = None,
+        background_sealing: bool = False,
     ):
         self.storage_path = storage_path
+        # A block is sealed when any limit is reached: transactions, bytes, age (s)
         self.batch_size = batch_size
-        self.chain: List[Block] = self._load_chain()
+        self.max_block_bytes = max_block_bytes
+        self.max_block_age = max_block_age
+        # Append-only segment files: sealing a block writes only that block
+        self.storage = SegmentedChainStorage(storage_path)
+
+        if (
+            legacy_storage_path is not None
+            and os.path.exists(legacy_storage_path)
+            and self.storage.is_empty()
+        ):
+            migrated = migrate_legacy_chain(legacy_storage_path, self.storage)
+            print(f"Migrated {migrated} blocks from {legacy_storage_path}.")
+
+        # Blocks are read from storage on access; opening is O(1) in chain length
+        self.chain = LazyChain(self.storage)
+        # Transaction ID and customer ID lookups, caught up with stored blocks
+        self.lookup = ChainLookupIndex(storage_path)
+        self.lookup.catch_up(self.storage)
         self.current_transactions: List[Transaction] = []
+        # Merkle tree of the pending transactions, built as they are added
+        self.current_merkle = MerkleAccumulator()
+        self.current_bytes = 0
+        # Monotonic time the oldest pending transaction was added
+        self.pending_since: Optional[float] = None
         self.last_block_time = datetime.now()
 
+        # Guards the pending transactions and the chain against the sealer thread
+        self.lock = threading.Condition(threading.RLock())
+        # Held for a whole seal, so checkpoints never see a half-sealed block
+        self.seal_lock = threading.Lock()
+        self.sealer: Optional[threading.Thread] = None
+        self.sealer_error: Optional[BaseException] = None
+        self.stopping = False
+
         if not self.chain:
             # Genesis block with timestamp as int Unix epoch
             self.create_block(
                 previous_hash="1", timestamp=int(datetime.now().timestamp())
             )
 
+        if background_sealing:
+            # Seal blocks off the validation hot path
+            self.sealer = threading.Thread(
+                target=self._run_sealer, name="block-sealer", daemon=True
+            )
+            self.sealer.start()
+
         print(f"Initialized blockchain with {len(self.chain)} blocks.")
 
-    def _load_chain(self) -> List[Block]:
-        """Load blockchain from storage"""
-        if not os.path.exists(self.storage_path):
-            os.makedirs(os.path.dirname(self.storage_path), exist_ok=True)
-            return []
+    def __enter__(self) -> "BaseBlockchain":
+        return self
 
-        try:
-            with open(self.storage_path, "r") as f:
-                chain_data = json.load(f)
-                return [Block.from_dict(block_data) for block_data in chain_data]
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
-
-    def save_chain(self):
-        """Save blockchain to storage"""
-        chain_data = [block.to_dict() for block in self.chain]
-        with open(self.storage_path, "w") as f:
-            json.dump(chain_data, f, indent=2)
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def save_block(self, block: Block):
+        """Append a sealed block to storage"""
+        self.storage.append_block(block.to_dict())
+
+    def close(self):
+        """Stop the sealer, seal pending transactions and close the storage"""
+        if self.sealer is not None:
+            with self.lock:
+                self.stopping = True
+                self.lock.notify()
+            self.sealer.join()
+            self.sealer = None
+
+        # Final flush so pending transactions are not lost on shutdown
+        self._seal_pending_block()
+        self.lookup.close()
+        self.storage.close()
 
     def create_block(self, previous_hash: str, timestamp: int) -> Optional[Block]:
-        if not self.current_transactions:
-            return None
+        with self.seal_lock:
+            return self._create_block(previous_hash, timestamp)
+
+    def _create_block(self, previous_hash: str, timestamp: int) -> Optional[Block]:
+        # Only one thread seals at a time: the caller of add_transaction, or the
+        # sealer thread when background sealing is on
+        with self.lock:
+            if not self.current_transactions:
+                return None
+
+            transactions = self.current_transactions
+            accumulator = self.current_merkle
+            self.current_transactions = []
+            self.current_merkle = MerkleAccumulator()
+            self.current_bytes = 0
+            self.pending_since = None
+            index = len(self.chain) + 1
 
+        # Written without the lock so add_transaction is never blocked on I/O
         block = Block(
-            index=len(self.chain) + 1,
+            index=index,
             previous_hash=previous_hash,
             timestamp=timestamp,
-            transactions=self.current_transactions.copy(),
+            transactions=transactions,
+            merkle_root=(
+                accumulator.root().hex()
+                if accumulator.leaf_count == len(transactions)
+                else None
+            ),
         )
-        self.current_transactions = []
-        self.chain.append(block)
-        self.save_chain()
-        self.last_block_time = datetime.now()
+        self.save_block(block)
+        self.lookup.add_block(
+            block.index,
+            ((tx.transaction_id, tx.customer_id) for tx in block.transactions),
+        )
+
+        with self.lock:
+            self.chain.append(block)
+            self.last_block_time = datetime.now()
         return block
 
+    def _seal_pending_block(self) -> Optional[Block]:
+        previous_hash = self.chain[-1].hash if self.chain else "1"
+        timestamp = int(datetime.now().timestamp())
+        return self.create_block(previous_hash=previous_hash, timestamp=timestamp)
+
+    def _pending_age(self) -> float:
+        if self.pending_since is None:
+            return 0.0
+        return time.monotonic() - self.pending_since
+
     def should_create_block(self) -> bool:
         """Determine if a new block should be created based on conditions"""
+        if not self.current_transactions:
+            return False
+
         size_condition = len(self.current_transactions) >= self.batch_size
-        return size_condition
+
+        bytes_condition = (
+            self.max_block_bytes is not None
+            and self.current_bytes >= self.max_block_bytes
+        )
+
+        age_condition = (
+            self.max_block_age is not None and self._pending_age() >= self.max_block_age
+        )
+
+        return size_condition or bytes_condition or age_condition
+
+    def _seconds_until_sealing(self) -> Optional[float]:
+        """Time until the pending block reaches its max age, None if not aging."""
+        if self.max_block_age is None or self.pending_since is None:
+            return None
+        return max(self.max_block_age - self._pending_age(), 0.0)
+
+    def _run_sealer(self):
+        try:
+            while True:
+                with self.lock:
+                    while not self.stopping and not self.should_create_block():
+                        self.lock.wait(timeout=self._seconds_until_sealing())
+                    if self.stopping:
+                        return
+
+                self._seal_pending_block()
+        except BaseException as error:
+            # Surfaced to the producer on its next add_transaction
+            self.sealer_error = error
 
     def get_chain(self):
-        return [block.to_dict() for block in self.chain]
+        with self.lock:
+            chain = list(self.chain)
+        return [block.to_dict() for block in chain]
+
+    def locate_transaction(self, transaction_id: str) -> List[tuple[int, int]]:
+        """(block index, position in block) of each on-chain transaction with this ID"""
+        return self.lookup.find_transaction(transaction_id)
+
+    def get_customer_transactions(self, customer_id: str) -> List[Transaction]:
+        """All on-chain transactions of a customer, in chain order"""
+        return [
+            tx
+            for block_index in self.lookup.find_customer_blocks(customer_id)
+            for tx in self.chain[block_index - 1].transactions
+            if tx.customer_id == customer_id
+        ]
+
+    def checkpoint_state(self) -> tuple[int, List[Transaction]]:
+        """Sync the stored chain; returns its block count and the pending transactions."""
+
+        with self.seal_lock, self.lock:
+            self.storage.sync()
+            self.lookup.commit()
+            return len(self.chain), list(self.current_transactions)
+
+    def restore_pending(self, transactions: List[Transaction]) -> None:
+        """Add back the pending transactions of a checkpoint, without sealing."""
+
+        with self.lock:
+            for transaction in transactions:
+                self._add_pending(transaction)
+
+    def _add_pending(self, transaction: Transaction) -> None:
+        if self.pending_since is None:
+            self.pending_since = time.monotonic()
+
+        self.current_transactions.append(transaction)
+        self.current_merkle.append(transaction.to_canonical_bytes())
+
+        if self.max_block_bytes is not None:
+            self.current_bytes += len(
+                json.dumps(transaction.to_dict(), separators=(",", ":"))
+            )
 
     def add_transaction(self, transaction: Transaction) -> bool:
         # For example, just add transaction without validation
-        self.current_transactions.append(transaction)
+        if self.sealer_error is not None:
+            raise RuntimeError("Block sealer stopped") from self.sealer_error
+
+        with self.lock:
+            self._add_pending(transaction)
+
+            seal = self.should_create_block()
+
+            if self.sealer is not None:
+                # Wake the sealer to seal now, or to start the age timer
+                if seal or len(self.current_transactions) == 1:
+                    self.lock.notify()
+                return True
 
-        if self.should_create_block():
-            previous_hash = self.chain[-1].previous_hash if self.chain else "1"
-            timestamp = int(datetime.now().timestamp())
-            self.create_block(previous_hash=previous_hash, timestamp=timestamp)
+        if seal:
+            self._seal_pending_block()
 
         return True
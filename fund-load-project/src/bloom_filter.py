@@ -0,0 +1,117 @@
+import math
+from hashlib import blake2b
+
+DEFAULT_CAPACITY = 10_000_000
+DEFAULT_ERROR_RATE = 0.001
+
+# Each new layer holds GROWTH times the items of the previous one, at
+# TIGHTENING times its error rate
+GROWTH = 2
+TIGHTENING = 0.5
+
+
+class _BloomLayer:
+    """Fixed-size Bloom filter layer, backed by a bytearray bit set."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+
+        # Optimal bit count and number of hash functions for the target rate
+        self.size = max(
+            math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2), 8
+        )
+        self.hash_count = max(round(self.size / capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def contains(self, h1: int, h2: int) -> bool:
+        bits, size = self.bits, self.size
+
+        for _ in range(self.hash_count):
+            position = h1 % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+            h1 += h2
+
+        return True
+
+    def add(self, h1: int, h2: int) -> bool:
+        bits, size = self.bits, self.size
+        seen = True
+
+        for _ in range(self.hash_count):
+            position = h1 % size
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                seen = False
+            h1 += h2
+
+        if not seen:
+            self.count += 1
+
+        return seen
+
+
+class BloomFilter:
+    """Scalable Bloom filter over strings (Almeida et al., 2007).
+
+    Never reports a false negative, and a false positive happens at most at
+    about ``error_rate`` however many items are added: the first layer is
+    sized for ``capacity`` items, and each time the newest layer is full a
+    layer twice as large, at half its error rate, is added. Sized for the
+    defaults it takes about 2 bytes per item.
+    """
+
+    def __init__(
+        self, capacity: int = DEFAULT_CAPACITY, error_rate: float = DEFAULT_ERROR_RATE
+    ):
+        self.capacity = capacity
+        self.error_rate = error_rate
+
+        # Layer error rates error_rate * (1 - TIGHTENING) * TIGHTENING**i add
+        # up to less than error_rate
+        self.layers = [_BloomLayer(capacity, error_rate * (1 - TIGHTENING))]
+        self.count = 0
+
+    @property
+    def nbytes(self) -> int:
+        return sum(len(layer.bits) for layer in self.layers)
+
+    def _hashes(self, item: str) -> tuple[int, int]:
+        # Double hashing: positions h1 + i * h2 from one 128 bit digest
+        digest = blake2b(item.encode(), digest_size=16).digest()
+        return (
+            int.from_bytes(digest[:8], "little"),
+            int.from_bytes(digest[8:], "little") | 1,
+        )
+
+    def __contains__(self, item: str) -> bool:
+        h1, h2 = self._hashes(item)
+        return any(layer.contains(h1, h2) for layer in self.layers)
+
+    def add(self, item: str) -> bool:
+        """Add an item; returns whether it may have been added before."""
+
+        h1, h2 = self._hashes(item)
+        newest = self.layers[-1]
+
+        for layer in self.layers[:-1]:
+            if layer.contains(h1, h2):
+                return True
+
+        if newest.add(h1, h2):
+            return True
+
+        self.count += 1
+        if newest.count >= newest.capacity:
+            last_error_rate = (
+                self.error_rate
+                * (1 - TIGHTENING)
+                * TIGHTENING ** (len(self.layers) - 1)
+            )
+            self.layers.append(
+                _BloomLayer(newest.capacity * GROWTH, last_error_rate * TIGHTENING)
+            )
+
+        return False
@@ -0,0 +1,152 @@
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Iterable
+
+from chain_storage import SegmentedChainStorage
+
+LOOKUP_FILE = "lookup.sqlite"
+
+# Rows are written as blocks are sealed and committed every few blocks; the
+# index is derived from the chain, so blocks lost before a commit are indexed
+# again from storage when the index is opened.
+DEFAULT_COMMIT_EVERY = 1000
+
+LOOKUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chain_transactions (
+    transaction_id TEXT NOT NULL,
+    customer_id TEXT NOT NULL,
+    block_index INTEGER NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chain_transactions_by_id
+    ON chain_transactions (transaction_id);
+CREATE INDEX IF NOT EXISTS chain_transactions_by_customer
+    ON chain_transactions (customer_id, block_index);
+CREATE TABLE IF NOT EXISTS lookup_state (
+    indexed_blocks INTEGER NOT NULL
+);
+"""
+
+
+class ChainLookupIndex:
+    """Persistent transaction ID and customer ID index over the blockchain.
+
+    Backed by SQLite B-tree indexes, so lookups are O(log n) in the number of
+    on-chain transactions instead of a scan over every block.
+    """
+
+    def __init__(self, directory: str, commit_every: int = DEFAULT_COMMIT_EVERY):
+        self.commit_every = commit_every
+        # The sealer thread writes while other threads query
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            Path(directory) / LOOKUP_FILE, check_same_thread=False
+        )
+        # Rebuildable from the chain, so durability is traded for write speed
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.executescript(LOOKUP_SCHEMA)
+
+        row = self.connection.execute(
+            "SELECT indexed_blocks FROM lookup_state"
+        ).fetchone()
+        if row is None:
+            self.connection.execute("INSERT INTO lookup_state VALUES (0)")
+            self.indexed_blocks = 0
+        else:
+            self.indexed_blocks = row[0]
+
+        self.uncommitted_blocks = 0
+
+    def add_block(
+        self, block_index: int, transactions: Iterable[tuple[str, str]]
+    ) -> None:
+        """Index the (transaction ID, customer ID) pairs of a sealed block."""
+
+        with self.lock:
+            if block_index <= self.indexed_blocks:
+                return
+
+            self.connection.executemany(
+                "INSERT INTO chain_transactions VALUES (?, ?, ?, ?)",
+                (
+                    (transaction_id, customer_id, block_index, position)
+                    for position, (transaction_id, customer_id) in enumerate(
+                        transactions
+                    )
+                ),
+            )
+            self.indexed_blocks = block_index
+            self.connection.execute(
+                "UPDATE lookup_state SET indexed_blocks = ?", (block_index,)
+            )
+
+            self.uncommitted_blocks += 1
+            if self.uncommitted_blocks >= self.commit_every:
+                self._commit()
+
+    def catch_up(self, storage: SegmentedChainStorage) -> int:
+        """Bring the index in line with the stored chain; returns blocks indexed."""
+
+        block_count = storage.block_count
+
+        with self.lock:
+            if self.indexed_blocks > block_count:
+                # The chain lost its torn tail when it was reopened
+                self.connection.execute(
+                    "DELETE FROM chain_transactions WHERE block_index > ?",
+                    (block_count,),
+                )
+                self.indexed_blocks = block_count
+                self.connection.execute(
+                    "UPDATE lookup_state SET indexed_blocks = ?", (block_count,)
+                )
+
+            start = self.indexed_blocks
+
+        for position in range(start, block_count):
+            block_data = storage.read_block(position)
+            self.add_block(position + 1, _block_transactions(block_data))
+
+        self.commit()
+        return block_count - start
+
+    def find_transaction(self, transaction_id: str) -> list[tuple[int, int]]:
+        """(block index, position in block) of every transaction with this ID."""
+
+        with self.lock:
+            return self.connection.execute(
+                "SELECT block_index, position FROM chain_transactions"
+                " WHERE transaction_id = ? ORDER BY block_index, position",
+                (transaction_id,),
+            ).fetchall()
+
+    def find_customer_blocks(self, customer_id: str) -> list[int]:
+        """Indexes of the blocks holding transactions of a customer, in order."""
+
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT DISTINCT block_index FROM chain_transactions"
+                " WHERE customer_id = ? ORDER BY block_index",
+                (customer_id,),
+            ).fetchall()
+
+        return [block_index for (block_index,) in rows]
+
+    def _commit(self) -> None:
+        self.connection.commit()
+        self.uncommitted_blocks = 0
+
+    def commit(self) -> None:
+        with self.lock:
+            self._commit()
+
+    def close(self) -> None:
+        with self.lock:
+            self._commit()
+            self.connection.close()
+
+
+def _block_transactions(block_data: dict[str, Any]) -> list[tuple[str, str]]:
+    return [(tx["id"], tx["customer_id"]) for tx in block_data["transactions"]]
@@ -0,0 +1,343 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from pathlib import Path
+from typing import Any, IO, Iterator
+
+from _constants import BLOCKCHAIN_FOLDER, LEGACY_BLOCKCHAIN_FILE
+
+# Segment files hold one compact JSON block per line, in chain order
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+
+DEFAULT_MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+
+# Sidecar offset index: one fixed-size record per block, in chain order, with
+# the segment number, byte offset and length of the block's line
+INDEX_FILE = "index.bin"
+INDEX_RECORD = struct.Struct("<IQI")
+
+
+def list_segment_paths(directory: str | Path) -> list[Path]:
+    """Segment files of a chain folder, oldest first, without opening them."""
+    return sorted(Path(directory).glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"))
+
+
+def _segment_number(path: Path) -> int:
+    return int(path.name[len(SEGMENT_PREFIX) : -len(SEGMENT_SUFFIX)])
+
+
+class SegmentedChainStorage:
+    """Append-only block storage in rotating JSONL segment files.
+
+    Sealing a block appends a single line to the newest segment, which is
+    rotated once it grows past ``max_segment_bytes``, and one record to the
+    offset index, so any block can be read without scanning the chain. A
+    partially written last line (e.g. after a crash) is truncated and the index
+    is brought back in line with the segments when the storage is opened.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES,
+        fsync: bool = False,
+    ):
+        self.directory = Path(directory)
+        self.max_segment_bytes = max_segment_bytes
+        self.fsync = fsync
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._segment: IO[bytes] | None = None
+        self._segment_number = 0
+
+        # Read-only maps of segment files, remapped when a segment has grown
+        self._maps: dict[int, mmap.mmap] = {}
+        self._maps_lock = threading.Lock()
+
+        segments = self.segment_paths()
+        if segments:
+            self._truncate_partial_line(segments[-1])
+
+        self._index = open(self.directory / INDEX_FILE, "ab+")
+        self._index_reader: int | None = None
+        self._repair_index()
+
+    def segment_paths(self) -> list[Path]:
+        """Segment files, oldest first."""
+        return list_segment_paths(self.directory)
+
+    def _segment_path(self, number: int) -> Path:
+        return self.directory / f"{SEGMENT_PREFIX}{number:06d}{SEGMENT_SUFFIX}"
+
+    @staticmethod
+    def _truncate_partial_line(path: Path, chunk_size: int = 1 << 16) -> None:
+        with open(path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+
+            # Scan back from the end for the last complete line
+            while position > 0:
+                start = max(position - chunk_size, 0)
+                f.seek(start)
+                chunk = f.read(position - start)
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+
+            if position != end:
+                f.truncate(position)
+
+    @property
+    def block_count(self) -> int:
+        return self._index_size // INDEX_RECORD.size
+
+    def _read_index_record(self, position: int) -> tuple[int, int, int]:
+        # Separate read-only descriptor, reopened if blocks are read after close
+        if self._index_reader is None:
+            self._index_reader = os.open(self.directory / INDEX_FILE, os.O_RDONLY)
+
+        return INDEX_RECORD.unpack(
+            os.pread(
+                self._index_reader,
+                INDEX_RECORD.size,
+                position * INDEX_RECORD.size,
+            )
+        )
+
+    def _repair_index(self) -> None:
+        """Drop index records past the segment data and index unindexed lines.
+
+        Unindexed lines come from a crash between the two appends, or from
+        chains written before the index existed.
+        """
+
+        self._index_size = self._index.seek(0, os.SEEK_END)
+        count = self.block_count
+
+        sizes = {
+            _segment_number(path): path.stat().st_size for path in self.segment_paths()
+        }
+
+        while count:
+            number, offset, length = self._read_index_record(count - 1)
+            if offset + length <= sizes.get(number, -1):
+                break
+            count -= 1
+
+        self._index.truncate(count * INDEX_RECORD.size)
+        self._index_size = count * INDEX_RECORD.size
+
+        if count:
+            number, offset, length = self._read_index_record(count - 1)
+            resume = (number, offset + length)
+        else:
+            resume = (0, 0)
+
+        records = []
+        for path in self.segment_paths():
+            number = _segment_number(path)
+            if number < resume[0]:
+                continue
+
+            start = resume[1] if number == resume[0] else 0
+            with open(path, "rb") as f:
+                f.seek(start)
+                for line in f:
+                    records.append(INDEX_RECORD.pack(number, start, len(line)))
+                    start += len(line)
+
+        if records:
+            self._write_index(b"".join(records))
+
+    def _write_index(self, records: bytes) -> None:
+        self._index.write(records)
+        self._index.flush()
+        if self.fsync:
+            os.fsync(self._index.fileno())
+        self._index_size += len(records)
+
+    def _open_segment(self) -> IO[bytes]:
+        segments = self.segment_paths()
+
+        if not segments:
+            number = 1
+        elif segments[-1].stat().st_size >= self.max_segment_bytes:
+            number = _segment_number(segments[-1]) + 1
+        else:
+            number = _segment_number(segments[-1])
+
+        self._segment_number = number
+        return open(self._segment_path(number), "ab")
+
+    def append_block(self, block_data: dict[str, Any]) -> None:
+        """Append one block record to the newest segment and the index."""
+
+        if self._segment is None:
+            self._segment = self._open_segment()
+
+        line = json.dumps(block_data, separators=(",", ":")).encode() + b"\n"
+        offset = self._segment.tell()
+
+        self._segment.write(line)
+        self._segment.flush()
+        if self.fsync:
+            os.fsync(self._segment.fileno())
+
+        # Indexed only once the block line is written
+        self._write_index(INDEX_RECORD.pack(self._segment_number, offset, len(line)))
+
+        if self._segment.tell() >= self.max_segment_bytes:
+            # Next block starts a new segment
+            self._segment.close()
+            self._segment = None
+
+    def sync(self) -> None:
+        """Flush the open segment and the index to disk."""
+
+        if self._segment is not None:
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+
+        self._index.flush()
+        os.fsync(self._index.fileno())
+
+    def truncate(self, block_count: int) -> None:
+        """Drop every block after the first ``block_count`` from the chain."""
+
+        if block_count >= self.block_count:
+            return
+
+        number, offset, _ = self._read_index_record(block_count)
+
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+        with self._maps_lock:
+            for segment_map in self._maps.values():
+                segment_map.close()
+            self._maps.clear()
+
+        for path in self.segment_paths():
+            if _segment_number(path) > number:
+                path.unlink()
+
+        if offset:
+            os.truncate(self._segment_path(number), offset)
+        else:
+            self._segment_path(number).unlink()
+
+        self._index.truncate(block_count * INDEX_RECORD.size)
+        self._index_size = block_count * INDEX_RECORD.size
+        self.sync()
+
+    def _read_segment(self, number: int, offset: int, length: int) -> bytes:
+        """Read bytes of a segment through a cached read-only memory map."""
+
+        with self._maps_lock:
+            segment_map = self._maps.get(number)
+
+            # Remap the active segment once it has grown past the mapped size
+            if segment_map is None or len(segment_map) < offset + length:
+                if segment_map is not None:
+                    segment_map.close()
+                with open(self._segment_path(number), "rb") as f:
+                    segment_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._maps[number] = segment_map
+
+            return segment_map[offset : offset + length]
+
+    def read_block(self, position: int) -> dict[str, Any]:
+        """Read the block at a 0-based chain position through the offset index."""
+
+        if not 0 <= position < self.block_count:
+            raise IndexError(f"block position {position} out of range")
+
+        return json.loads(self._read_segment(*self._read_index_record(position)))
+
+    def iter_blocks(self) -> Iterator[dict[str, Any]]:
+        """Yield every stored block record in chain order."""
+
+        for path in self.segment_paths():
+            with open(path, "rb") as f:
+                for line in f:
+                    yield json.loads(line)
+
+    def is_empty(self) -> bool:
+        return self.block_count == 0
+
+    def close(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+        with self._maps_lock:
+            for segment_map in self._maps.values():
+                segment_map.close()
+            self._maps.clear()
+
+        self._index.close()
+        if self._index_reader is not None:
+            os.close(self._index_reader)
+            self._index_reader = None
+
+
+def migrate_legacy_chain(legacy_path: str, storage: SegmentedChainStorage) -> int:
+    """Copy the blocks of a legacy ``blockchain.json`` array into segment storage.
+
+    Returns the number of migrated blocks; the legacy file is left in place.
+    """
+
+    with open(legacy_path, "r") as f:
+        chain_data = json.load(f)
+
+    for block_data in chain_data:
+        storage.append_block(block_data)
+
+    return len(chain_data)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Migrate a legacy blockchain.json into an empty segment folder."""
+
+    parser = argparse.ArgumentParser(
+        description="Migrate a blockchain.json chain into segment storage."
+    )
+    parser.add_argument(
+        "legacy_path",
+        nargs="?",
+        default=LEGACY_BLOCKCHAIN_FILE,
+        help="legacy single-file chain (default: %(default)s)",
+    )
+    parser.add_argument(
+        "path",
+        nargs="?",
+        default=BLOCKCHAIN_FOLDER,
+        help="blockchain segment folder (default: %(default)s)",
+    )
+    args = parser.parse_args(argv)
+
+    storage = SegmentedChainStorage(args.path)
+    try:
+        if not storage.is_empty():
+            print(f"{args.path} already holds {storage.block_count} blocks.")
+            return 1
+
+        migrated = migrate_legacy_chain(args.legacy_path, storage)
+    finally:
+        storage.close()
+
+    print(f"Migrated {migrated} blocks from {args.legacy_path} to {args.path}.")
+    return 0
+
+
+if __name__ == "__main__":
+
+    sys.exit(main())
@@ -0,0 +1,219 @@
+import os
+import pickle
+from pathlib import Path
+from typing import IO, Any, Iterator, Optional
+
+from blockchain import BaseBlockchain
+from bloom_filter import BloomFilter
+from chain_storage import SegmentedChainStorage
+from result_writer import ValidationResultWriter
+from storage import TransactionStorage
+from transactions import Transaction
+
+CHECKPOINT_FILE = "checkpoint.pickle"
+JOURNAL_FILE = "checkpoint.journal"
+
+DEFAULT_CHECKPOINT_EVERY = 10_000
+
+
+class Checkpoint:
+    """State of an interrupted run, consistent as of one input line.
+
+    Everything the run wrote past this point (output lines, sealed blocks,
+    journal records, storage writes) may or may not have reached disk, and is
+    redone on resume.
+    """
+
+    def __init__(
+        self,
+        input_offset: int,
+        processed_lines: int,
+        output_sizes: dict[str, int],
+        block_count: int,
+        pending_transactions: list[Transaction],
+        journal_size: int,
+        settings: dict[str, Any],
+    ):
+        # Byte offset of the first input line not yet processed
+        self.input_offset = input_offset
+        self.processed_lines = processed_lines
+        self.output_sizes = output_sizes
+        self.block_count = block_count
+        # Accepted transactions not yet sealed into a block
+        self.pending_transactions = pending_transactions
+        # Journal bytes holding the transactions stored up to this point
+        self.journal_size = journal_size
+        # Options the run must be resumed with, by option name, including the
+        # identity of the input file the offset points into
+        self.settings = settings
+
+
+class CheckpointJournal:
+    """Append-only log of the transactions a run stored, in order.
+
+    Each checkpoint appends the transactions stored since the previous one,
+    so a checkpoint costs time in proportion to the lines processed since
+    the last one, whatever the size of the storage. On resume, storage and
+    the duplicate filter are rebuilt by replaying the log.
+    """
+
+    def __init__(self, folder_path: Path, size: int = 0):
+        path = folder_path / JOURNAL_FILE
+        if size:
+            # Drop records appended after the checkpoint being resumed
+            os.truncate(path, size)
+
+        self.file: IO[bytes] = open(path, "ab" if size else "wb")
+        # Stored since the last checkpoint, appended by the next one
+        self.unsaved: list[Transaction] = []
+
+    def __enter__(self) -> "CheckpointJournal":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def record(self, transaction: Transaction) -> None:
+        self.unsaved.append(transaction)
+
+    def sync(self) -> int:
+        """Append the recorded transactions and sync; returns the journal size."""
+
+        if self.unsaved:
+            pickle.dump(self.unsaved, self.file, protocol=pickle.HIGHEST_PROTOCOL)
+            self.unsaved = []
+
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+        return self.file.tell()
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def input_identity(path: str) -> tuple[str, int, int, int, int]:
+    """Path, device, inode, size and modification time of an input file.
+
+    A checkpoint's input offset is only valid for the very same file.
+    """
+
+    stat = os.stat(path)
+    return (
+        os.path.abspath(path),
+        stat.st_dev,
+        stat.st_ino,
+        stat.st_size,
+        stat.st_mtime_ns,
+    )
+
+
+def take_checkpoint(
+    input_offset: int,
+    processed_lines: int,
+    journal: CheckpointJournal,
+    result_writer: ValidationResultWriter,
+    blockchain: BaseBlockchain,
+    settings: dict[str, Any],
+) -> Checkpoint:
+    """Sync the outputs, the chain and the journal, then capture the state that goes with them."""
+
+    block_count, pending_transactions = blockchain.checkpoint_state()
+
+    return Checkpoint(
+        input_offset=input_offset,
+        processed_lines=processed_lines,
+        output_sizes=result_writer.sync(),
+        block_count=block_count,
+        pending_transactions=pending_transactions,
+        journal_size=journal.sync(),
+        settings=settings,
+    )
+
+
+def save_checkpoint(folder_path: Path, checkpoint: Checkpoint) -> None:
+    """Atomically replace the checkpoint file of an output folder."""
+
+    path = folder_path / CHECKPOINT_FILE
+    temporary_path = path.with_suffix(".tmp")
+
+    with open(temporary_path, "wb") as f:
+        pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(temporary_path, path)
+
+    # Make the rename itself durable
+    directory = os.open(folder_path, os.O_RDONLY)
+    try:
+        os.fsync(directory)
+    finally:
+        os.close(directory)
+
+
+def load_checkpoint(folder_path: Path) -> Optional[Checkpoint]:
+    """The checkpoint of an output folder, None if there is none."""
+
+    try:
+        with open(folder_path / CHECKPOINT_FILE, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def remove_checkpoint(folder_path: Path) -> None:
+    (folder_path / CHECKPOINT_FILE).unlink(missing_ok=True)
+    (folder_path / JOURNAL_FILE).unlink(missing_ok=True)
+
+
+def read_journal(folder_path: Path, size: int) -> Iterator[list[Transaction]]:
+    """Batches of stored transactions from the first ``size`` bytes of a journal."""
+
+    with open(folder_path / JOURNAL_FILE, "rb") as f:
+        while f.tell() < size:
+            yield pickle.load(f)
+
+
+def replay_journal(
+    checkpoint: Checkpoint,
+    folder_path: Path,
+    storage: TransactionStorage,
+    duplicate_filter: Optional[BloomFilter] = None,
+) -> int:
+    """Store the transactions stored up to a checkpoint again, in their order.
+
+    Storage must have been cleared, which also undoes writes made after the
+    checkpoint that Redis kept. Returns the number of replayed transactions.
+    """
+
+    replayed = 0
+    for transactions in read_journal(folder_path, checkpoint.journal_size):
+        storage.store_customer_transactions(transactions)
+
+        # A repeated ID is never stored, so the filter saw each of these once
+        if duplicate_filter is not None:
+            for transaction in transactions:
+                duplicate_filter.add(transaction.transaction_id)
+
+        replayed += len(transactions)
+
+    return replayed
+
+
+def rewind_outputs(
+    checkpoint: Checkpoint, folder_path: Path, blockchain_folder: str
+) -> None:
+    """Truncate output files and the stored chain back to a checkpoint.
+
+    Must run before the output files and the blockchain are opened.
+    """
+
+    for name, size in checkpoint.output_sizes.items():
+        os.truncate(folder_path / name, size)
+
+    storage = SegmentedChainStorage(blockchain_folder)
+    try:
+        storage.truncate(checkpoint.block_count)
+    finally:
+        storage.close()
@@ -0,0 +1,159 @@
+import os
+import select
+import sys
+import time
+from typing import Callable, Iterator, Optional
+
+STDIN = "-"
+
+# Follow polling starts at the minimum interval after the last new data and
+# doubles up to the maximum while the file stays idle
+MIN_POLL_INTERVAL = 0.0005
+MAX_POLL_INTERVAL = 0.1
+
+READ_SIZE = 1 << 16
+
+# A line and the perf_counter_ns time its bytes were read
+TimedLine = tuple[bytes, int]
+
+
+def _split_lines(buffer: bytes, chunk: bytes) -> tuple[list[bytes], bytes]:
+    """Complete lines of buffer + chunk, and the incomplete rest."""
+
+    lines = (buffer + chunk).split(b"\n")
+    return lines, lines.pop()
+
+
+def read_stdin_lines(
+    on_idle: Callable[[], None] = lambda: None,
+) -> Iterator[TimedLine]:
+    """Lines from stdin as they arrive, until it is closed.
+
+    ``on_idle`` is called whenever no input is ready, before blocking on it.
+    """
+
+    fd = sys.stdin.fileno()
+    buffer = b""
+
+    while True:
+        if not select.select([fd], [], [], 0)[0]:
+            on_idle()
+
+        chunk = os.read(fd, READ_SIZE)
+        if not chunk:
+            break
+
+        arrival = time.perf_counter_ns()
+        lines, buffer = _split_lines(buffer, chunk)
+        for line in lines:
+            yield line, arrival
+
+    # Last line without a newline
+    if buffer:
+        yield buffer, time.perf_counter_ns()
+
+
+class FileFollower:
+    """Reads a file from its start and keeps reading lines appended to it.
+
+    Handles the two ways logs are rotated: when the path is renamed away and
+    recreated, the old file is read to its end before the new one is opened;
+    when the file is truncated in place (copytruncate), it is read again from
+    its start. A line is only returned once its newline was written.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        on_idle: Callable[[], None] = lambda: None,
+        idle_timeout: Optional[float] = None,
+    ):
+        self.path = path
+        self.on_idle = on_idle
+        # Stop after this many seconds without new data; None follows forever
+        self.idle_timeout = idle_timeout
+        self.fd: Optional[int] = None
+        self.position = 0
+        self.rotations = 0
+
+    def _open(self) -> None:
+        self.fd = os.open(self.path, os.O_RDONLY)
+        self.position = 0
+
+    def _rotated(self) -> bool:
+        """Whether the path now names another file than the one being read."""
+
+        try:
+            path_stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Renamed away and not recreated yet
+            return False
+
+        file_stat = os.fstat(self.fd)
+        return (path_stat.st_dev, path_stat.st_ino) != (
+            file_stat.st_dev,
+            file_stat.st_ino,
+        )
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __iter__(self) -> Iterator[TimedLine]:
+        self._open()
+        buffer = b""
+        poll_interval = MIN_POLL_INTERVAL
+        idle_since = None
+
+        try:
+            while True:
+                chunk = os.read(self.fd, READ_SIZE)
+
+                if chunk:
+                    arrival = time.perf_counter_ns()
+                    self.position += len(chunk)
+                    lines, buffer = _split_lines(buffer, chunk)
+                    for line in lines:
+                        yield line, arrival
+
+                    poll_interval = MIN_POLL_INTERVAL
+                    idle_since = None
+                    continue
+
+                # At the end of the file: nothing more until it grows
+                if idle_since is None:
+                    self.on_idle()
+                    idle_since = time.monotonic()
+
+                if self._rotated():
+                    # The old file was read to its end above and is complete
+                    if buffer:
+                        yield buffer, time.perf_counter_ns()
+                    self.close()
+                    self._open()
+                    buffer = b""
+                    self.rotations += 1
+                    continue
+
+                if os.fstat(self.fd).st_size < self.position:
+                    # Truncated in place; whatever was written since is read
+                    os.lseek(self.fd, 0, os.SEEK_SET)
+                    self.position = 0
+                    buffer = b""
+                    self.rotations += 1
+                    continue
+
+                if (
+                    self.idle_timeout is not None
+                    and time.monotonic() - idle_since >= self.idle_timeout
+                ):
+                    # Done following; a last line without newline is complete
+                    if buffer:
+                        yield buffer, time.perf_counter_ns()
+                    break
+
+                time.sleep(poll_interval)
+                poll_interval = min(poll_interval * 2, MAX_POLL_INTERVAL)
+        finally:
+            self.close()
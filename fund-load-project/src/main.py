@@ -1,24 +1,70 @@
+import argparse
+import asyncio
 import json
+import os
+import signal
+import sys
+import time
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from _constants import INPUT_FILE, OUTPUT_FOLDER
-from _utils import (
-    append_validation_result,
-    clean_directory,
+from typing import Any, Iterator
+from _constants import (
+    BLOCKCHAIN_FOLDER,
+    INPUT_FILE,
+    OUTPUT_FOLDER,
+    PRIME_TABLE_FILE,
 )
+from _utils import clean_directory
+from bloom_filter import DEFAULT_CAPACITY, BloomFilter
+from checkpoint import (
+    DEFAULT_CHECKPOINT_EVERY,
+    Checkpoint,
+    CheckpointJournal,
+    input_identity,
+    load_checkpoint,
+    remove_checkpoint,
+    replay_journal,
+    rewind_outputs,
+    save_checkpoint,
+    take_checkpoint,
+)
+from pipeline import DEFAULT_BATCH_SIZE, run_pipeline
+from live_input import STDIN, FileFollower, read_stdin_lines
+from metrics import DEFAULT_METRICS_INTERVAL, METRICS_FILE, Metrics, MetricsExporter
+from profiling import (
+    DEFAULT_SAMPLE_INTERVAL,
+    DEFAULT_TOP_FUNCTIONS,
+    PROFILE_REPORT_FILE,
+    PROFILE_STACKS_FILE,
+    create_profiler,
+)
+from redis_storage import AsyncRedisTimeSeriesStorage
+from sharding import run_sharded
+from result_writer import ValidationResultWriter
 from transactions import Transaction
 from validator import Success, TransactionValidator
+from storage import TransactionStorage
 from redis_storage import RedisTimeSeriesStorage
+from memory_storage import InMemoryTimeSeriesStorage
 from blockchain import BaseBlockchain
 
 
 def process_transaction_line(
-    line: str,
-    storage: RedisTimeSeriesStorage,
+    line: str | bytes,
+    storage: TransactionStorage,
     validator: TransactionValidator,
-    output_folder: Path,
+    result_writer: ValidationResultWriter,
     blockchain: BaseBlockchain,
-) -> None:
-    """Parse a line as a transaction, validate it, store result, and append to blockchain if valid."""
+    atomic: bool = False,
+    metrics: Metrics | None = None,
+) -> Transaction | None:
+    """Parse a line as a transaction, validate it, store result, and append to blockchain if valid.
+
+    Returns the transaction if it was stored, None for a rejected duplicate.
+    """
+
+    clock = time.perf_counter_ns
+    start = clock()
 
     # Parse JSON line to dictionary
     transaction_dict = json.loads(line)
@@ -26,47 +72,613 @@ def process_transaction_line(
     # Create Transaction object
     transaction = Transaction(transaction_dict)
 
-    # Store transaction in Redis
-    storage.store_customer_transaction(transaction)
+    parsed = validate_start = clock()
+    store_time = None
+
+    duplicate = validator.check_duplicate(transaction)
+
+    if duplicate is not None:
+        # Not stored, so the first transaction with this ID is kept
+        result = duplicate
+    elif atomic:
+        # Store and validate in one atomic call inside Redis
+        result = validator.validate_and_store_transaction(transaction)
+    else:
+        # Store transaction in Redis
+        storage.store_customer_transaction(transaction)
+        validate_start = clock()
+        store_time = validate_start - parsed
+
+        # Validate transaction
+        result = validator.validate_transaction(transaction)
 
-    # Validate transaction
-    result = validator.validate_transaction(transaction)
+    validated = clock()
 
     # Append to JSONL file with accepted status
-    append_validation_result(output_folder, transaction, result)
+    result_writer.write(transaction, result)
+
+    written = clock()
+    blockchain_time = None
 
     # If transaction is valid, add to blockchain
     if isinstance(result, Success):
         blockchain.add_transaction(transaction)
+        blockchain_time = clock() - written
+
+    if metrics is not None:
+        metrics.record_transaction(
+            result,
+            parse=parsed - start,
+            store=store_time,
+            validate=validated - validate_start,
+            write=written - validated,
+            blockchain=blockchain_time,
+        )
+
+    return transaction if duplicate is None else None
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse command line options for the main entry point."""
+
+    parser = argparse.ArgumentParser(description="Validate and record fund loads.")
+    parser.add_argument(
+        "--input",
+        default=INPUT_FILE,
+        metavar="PATH",
+        help=(
+            "newline-delimited transactions to load, or - for stdin with the "
+            "streaming engine (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help=(
+            "keep reading lines appended to the input file, like tail -f, "
+            "reopening it when rotated"
+        ),
+    )
+    parser.add_argument(
+        "--follow-timeout",
+        type=float,
+        default=None,
+        metavar="S",
+        help="with --follow, stop after S seconds without new lines",
+    )
+    parser.add_argument(
+        "--storage",
+        choices=["redis", "memory"],
+        default="redis",
+        help="transaction storage backend (memory needs no Redis server)",
+    )
+
+    parser.add_argument(
+        "--engine",
+        choices=["streaming", "async", "sharded", "batch"],
+        default="streaming",
+        help=(
+            "validate line by line, in an asyncio pipeline of concurrent stages, "
+            "across worker processes owning shards of customers, "
+            "or the whole file at once with NumPy (no storage or blockchain)"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        metavar="N",
+        help="worker processes of the sharded engine (default: CPU count)",
+    )
+    parser.add_argument(
+        "--atomic",
+        action="store_true",
+        help="validate and store each transaction in one atomic Redis Lua call",
+    )
+
+    parser.add_argument(
+        "--reject-duplicates",
+        action="store_true",
+        help="reject transactions whose ID was already loaded, without storing them",
+    )
+    parser.add_argument(
+        "--duplicate-capacity",
+        type=int,
+        default=DEFAULT_CAPACITY,
+        metavar="N",
+        help=(
+            "transaction IDs the duplicate Bloom filter is first sized for; it "
+            "grows by doubling past them (default: %(default)s)"
+        ),
+    )
+
+    parser.add_argument(
+        "--flush-every",
+        type=int,
+        default=None,
+        metavar="N",
+        help="flush the output files every N results (default: only on exit)",
+    )
+    parser.add_argument(
+        "--flush-interval-ms",
+        type=int,
+        default=None,
+        metavar="T",
+        help=(
+            "flush the output files when a result is written T ms or more after "
+            "the last flush; live input also flushes whenever it runs dry"
+        ),
+    )
+    parser.add_argument(
+        "--fsync",
+        action="store_true",
+        help="fsync the output files on every flush, not only on exit",
+    )
+    parser.add_argument(
+        "--block-transactions",
+        type=int,
+        default=1,
+        metavar="N",
+        help="seal a block once it holds N transactions (default: 1)",
+    )
+    parser.add_argument(
+        "--block-bytes",
+        type=int,
+        default=None,
+        metavar="B",
+        help="seal a block once its transactions encode to B bytes",
+    )
+    parser.add_argument(
+        "--block-age-ms",
+        type=int,
+        default=None,
+        metavar="T",
+        help="seal a block T ms after its first transaction was added",
+    )
+    parser.add_argument(
+        "--background-sealer",
+        action="store_true",
+        help="seal blocks in a background thread instead of while validating",
+    )
+
+    parser.add_argument(
+        "--pipeline-batch",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        metavar="N",
+        help="lines per batch between async pipeline stages (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--stats-interval",
+        type=float,
+        default=None,
+        metavar="S",
+        help="print async pipeline queue depths and throughput every S seconds",
+    )
+
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=DEFAULT_METRICS_INTERVAL,
+        metavar="S",
+        help=(
+            f"write stage latency metrics to {OUTPUT_FOLDER}{METRICS_FILE} "
+            "every S seconds, streaming engine (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--checkpoint-every",
+        type=int,
+        nargs="?",
+        const=DEFAULT_CHECKPOINT_EVERY,
+        default=None,
+        metavar="N",
+        help=(
+            "checkpoint progress every N transactions so an interrupted run can "
+            f"be resumed (default N: {DEFAULT_CHECKPOINT_EVERY})"
+        ),
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="resume from the last checkpoint instead of starting from scratch",
+    )
+
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=None,
+        metavar="N",
+        help="stop after the first N transactions, streaming engine",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=["cprofile", "sampling"],
+        default=None,
+        help=(
+            "profile the streaming engine with cProfile (every call, slower) or "
+            f"by sampling its stack, writing {PROFILE_STACKS_FILE} for "
+            f"flamegraphs and a {PROFILE_REPORT_FILE} report to {OUTPUT_FOLDER}"
+        ),
+    )
+    parser.add_argument(
+        "--profile-interval-ms",
+        type=float,
+        default=DEFAULT_SAMPLE_INTERVAL * 1000,
+        metavar="T",
+        help="sampling profiler interval (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=DEFAULT_TOP_FUNCTIONS,
+        metavar="N",
+        help="functions listed in the profile report (default: %(default)s)",
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.atomic and args.storage != "redis":
+        parser.error("--atomic requires --storage redis")
+
+    if args.engine == "batch" and args.atomic:
+        parser.error("--atomic is not available with --engine batch")
+
+    if args.engine == "batch" and args.reject_duplicates:
+        parser.error("--reject-duplicates is not available with --engine batch")
+
+    if (args.checkpoint_every is not None or args.resume) and (
+        args.engine != "streaming"
+    ):
+        parser.error("--checkpoint-every and --resume require --engine streaming")
+
+    if (args.limit is not None or args.profile is not None) and (
+        args.engine != "streaming"
+    ):
+        parser.error("--limit and --profile require --engine streaming")
+
+    live_input = args.input == STDIN or args.follow
+
+    if live_input and args.engine != "streaming":
+        parser.error("--input - and --follow require --engine streaming")
+
+    if args.input == STDIN and args.follow:
+        parser.error("--follow needs an input file, not stdin")
+
+    if args.follow_timeout is not None and not args.follow:
+        parser.error("--follow-timeout requires --follow")
+
+    if live_input and (args.checkpoint_every is not None or args.resume):
+        parser.error("--checkpoint-every and --resume need a regular input file")
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    return args
+
+
+def create_storage(backend: str) -> TransactionStorage:
+    """Instantiate the transaction storage backend selected on the command line."""
+
+    if backend == "memory":
+        return InMemoryTimeSeriesStorage()
+
+    return RedisTimeSeriesStorage()
+
+
+@contextmanager
+def exit_on_sigterm() -> Iterator[None]:
+    """Turn SIGTERM into SystemExit so open writers are flushed and closed."""
+
+    def handle_sigterm(signum: int, frame: object) -> None:
+        sys.exit(128 + signum)
 
+    previous_handler = signal.signal(signal.SIGTERM, handle_sigterm)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
 
-def main() -> None:
+
+async def run_async_engine(
+    args: argparse.Namespace,
+    storage: TransactionStorage,
+    validator: TransactionValidator,
+    result_writer: ValidationResultWriter,
+    blockchain: BaseBlockchain,
+) -> None:
+    """Process the input file through the asyncio stage pipeline."""
+
+    # Atomic Redis validation is sent in pipelined batches by the asyncio client
+    async_storage = AsyncRedisTimeSeriesStorage() if args.atomic else None
+
+    try:
+        stats = await run_pipeline(
+            args.input,
+            storage,
+            validator,
+            result_writer,
+            blockchain,
+            atomic=args.atomic,
+            async_storage=async_storage,
+            batch_size=args.pipeline_batch,
+            stats_interval=args.stats_interval,
+        )
+    finally:
+        if async_storage is not None:
+            await async_storage.close()
+
+    print(stats.report())
+
+
+def checkpoint_settings(args: argparse.Namespace) -> dict[str, Any]:
+    """Options a checkpointed run must be resumed with, by option name."""
+
+    return {
+        "--input": input_identity(args.input),
+        "--storage": args.storage,
+        "--reject-duplicates": args.reject_duplicates,
+        "--block-transactions": args.block_transactions,
+        "--block-bytes": args.block_bytes,
+        "--block-age-ms": args.block_age_ms,
+    }
+
+
+def run_streaming_engine(
+    args: argparse.Namespace,
+    storage: TransactionStorage,
+    validator: TransactionValidator,
+    result_writer: ValidationResultWriter,
+    blockchain: BaseBlockchain,
+    output_folder: Path,
+    checkpoint: Checkpoint | None = None,
+    metrics: Metrics | None = None,
+) -> None:
+    """Process the input file line by line, from a checkpoint if given."""
+
+    input_offset = checkpoint.input_offset if checkpoint is not None else 0
+    processed_lines = checkpoint.processed_lines if checkpoint is not None else 0
+
+    # Stored transactions since the start of the run, appended at checkpoints
+    journal = (
+        CheckpointJournal(
+            output_folder, checkpoint.journal_size if checkpoint is not None else 0
+        )
+        if args.checkpoint_every is not None
+        else None
+    )
+    settings = checkpoint_settings(args) if journal is not None else {}
+
+    with open(args.input, "rb") as f, journal or nullcontext():
+        f.seek(input_offset)
+        for raw_line in f:
+            input_offset += len(raw_line)
+            line = raw_line.strip()
+            if not line:
+                continue
+            stored = process_transaction_line(
+                line,
+                storage,
+                validator,
+                result_writer,
+                blockchain,
+                args.atomic,
+                metrics,
+            )
+            processed_lines += 1
+
+            if args.limit is not None and processed_lines >= args.limit:
+                break
+
+            if journal is None:
+                continue
+
+            if stored is not None:
+                journal.record(stored)
+
+            if processed_lines % args.checkpoint_every == 0:
+                save_checkpoint(
+                    output_folder,
+                    take_checkpoint(
+                        input_offset,
+                        processed_lines,
+                        journal,
+                        result_writer,
+                        blockchain,
+                        settings,
+                    ),
+                )
+
+
+def run_live_input(
+    args: argparse.Namespace,
+    storage: TransactionStorage,
+    validator: TransactionValidator,
+    result_writer: ValidationResultWriter,
+    blockchain: BaseBlockchain,
+    metrics: Metrics,
+) -> None:
+    """Process lines from stdin or a followed file as they arrive."""
+
+    # Results are flushed whenever the input runs dry, so they are visible
+    # while waiting for more, without a flush per line during bursts
+    if args.input == STDIN:
+        lines = read_stdin_lines(on_idle=result_writer.flush)
+    else:
+        lines = FileFollower(
+            args.input, on_idle=result_writer.flush, idle_timeout=args.follow_timeout
+        )
+
+    clock = time.perf_counter_ns
+    processed_lines = 0
+
+    for raw_line, arrival in lines:
+        line = raw_line.strip()
+        if not line:
+            continue
+        process_transaction_line(
+            line,
+            storage,
+            validator,
+            result_writer,
+            blockchain,
+            args.atomic,
+            metrics,
+        )
+        metrics.record_latency(clock() - arrival)
+        processed_lines += 1
+
+        if args.limit is not None and processed_lines >= args.limit:
+            break
+
+
+def run_batch_engine(input_path: str, output_folder: Path) -> None:
+    """Validate the whole input file offline with the vectorized NumPy engine."""
+
+    # Optional dependency, only needed for this engine
+    from batch_validator import validate_file
+
+    # Storage is only used to replay customers with irregular histories
+    validator = TransactionValidator(
+        InMemoryTimeSeriesStorage(), prime_table_path=PRIME_TABLE_FILE
+    )
+
+    print("Starting batch transaction validation...")
+
+    codes = validate_file(input_path, output_folder, validator)
+
+    print(f"Finished validating {len(codes)} transactions.")
+
+
+def main(argv: list[str] | None = None) -> None:
     """Main entry point: orchestrates reading, validating, and recording transactions."""
 
+    args = parse_args(argv)
+
     output_folder = Path(OUTPUT_FOLDER)
 
-    # clean output folder and start fresh
-    clean_directory(output_folder)
+    checkpoint = load_checkpoint(output_folder) if args.resume else None
+
+    if checkpoint is None:
+        if args.resume:
+            print("No checkpoint found, starting from the beginning.")
+
+        # clean output folder and start fresh
+        clean_directory(output_folder)
+    else:
+        # Resuming with other options would give other results than one run
+        for option, value in checkpoint_settings(args).items():
+            if checkpoint.settings.get(option) != value:
+                sys.exit(
+                    f"The checkpoint was taken with another {option}"
+                    + (" or input file contents." if option == "--input" else ".")
+                )
+
+        # Anything written after the checkpoint is redone
+        rewind_outputs(checkpoint, output_folder, BLOCKCHAIN_FOLDER)
+        print(f"Resuming after {checkpoint.processed_lines} transactions.")
 
-    storage = RedisTimeSeriesStorage()
+    if args.engine == "batch":
+        run_batch_engine(args.input, output_folder)
+        return
+
+    storage = create_storage(args.storage)
     storage.clear_all_transactions()
 
-    validator = TransactionValidator(storage)
+    validator = TransactionValidator(
+        storage,
+        prime_table_path=PRIME_TABLE_FILE,
+        duplicate_filter=(
+            BloomFilter(args.duplicate_capacity) if args.reject_duplicates else None
+        ),
+    )
+    if checkpoint is not None:
+        # Storage as of the checkpoint: Redis writes made after it are gone
+        # with the clear above. Rolling aggregates are reseeded from storage.
+        replayed = replay_journal(
+            checkpoint, output_folder, storage, validator.duplicate_filter
+        )
+        print(f"Restored {replayed} stored transactions.")
 
     blockchain = BaseBlockchain(
-        storage_path=OUTPUT_FOLDER + "blockchain.json",
+        storage_path=BLOCKCHAIN_FOLDER,
+        batch_size=args.block_transactions,
+        max_block_bytes=args.block_bytes,
+        max_block_age=(
+            args.block_age_ms / 1000 if args.block_age_ms is not None else None
+        ),
+        background_sealing=args.background_sealer,
+    )
+    if checkpoint is not None:
+        blockchain.restore_pending(checkpoint.pending_transactions)
+
+    flush_interval = (
+        args.flush_interval_ms / 1000 if args.flush_interval_ms is not None else None
     )
 
     print("Starting transaction processing...")
 
-    with open(INPUT_FILE, "r") as f:
-        for raw_line in f:
-            line = raw_line.strip()
-            if not line:
-                continue
-            process_transaction_line(
-                line, storage, validator, output_folder, blockchain
+    # Pending transactions are sealed into a final block when the chain closes
+    with exit_on_sigterm(), blockchain, ValidationResultWriter(
+        output_folder,
+        flush_every=args.flush_every,
+        flush_interval=flush_interval,
+        fsync=args.fsync,
+    ) as result_writer:
+        if args.engine == "async":
+            asyncio.run(
+                run_async_engine(args, storage, validator, result_writer, blockchain)
             )
+        elif args.engine == "sharded":
+            # Workers own their storage; the one above only cleared the backend
+            run_sharded(
+                args.input,
+                args.workers,
+                result_writer,
+                blockchain,
+                storage_backend=args.storage,
+                atomic=args.atomic,
+                prime_table_path=PRIME_TABLE_FILE,
+                duplicate_capacity=(
+                    args.duplicate_capacity if args.reject_duplicates else None
+                ),
+            )
+        else:
+            metrics = Metrics()
+            profiler = (
+                create_profiler(args.profile, args.profile_interval_ms / 1000)
+                if args.profile is not None
+                else nullcontext()
+            )
+            with MetricsExporter(
+                metrics, output_folder / METRICS_FILE, args.metrics_interval
+            ), profiler:
+                if args.input == STDIN or args.follow:
+                    run_live_input(
+                        args, storage, validator, result_writer, blockchain, metrics
+                    )
+                else:
+                    run_streaming_engine(
+                        args,
+                        storage,
+                        validator,
+                        result_writer,
+                        blockchain,
+                        output_folder,
+                        checkpoint,
+                        metrics,
+                    )
+            print(metrics.summary())
+
+            if args.profile is not None:
+                print(profiler.save(output_folder, args.profile_top))
+                print(
+                    f"Profile written to {OUTPUT_FOLDER}{PROFILE_STACKS_FILE} "
+                    f"and {OUTPUT_FOLDER}{PROFILE_REPORT_FILE}."
+                )
+
+    # A finished run has nothing to resume
+    remove_checkpoint(output_folder)
 
     print("Finished processing all transactions.")
 
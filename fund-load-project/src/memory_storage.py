@@ -0,0 +1,91 @@
+from bisect import bisect_left, bisect_right
+from typing import Any
+from transactions import Transaction
+
+
+class InMemoryTimeSeriesStorage:
+    """In-process time series storage for transactions.
+
+    Mirrors the key layout of ``RedisTimeSeriesStorage``: transactions are
+    stored once by ``tx:{id}`` and each customer keeps a timestamp-sorted index
+    of transaction keys, queried with bisect instead of a sorted set.
+    """
+
+    def __init__(self):
+        self.transactions: dict[str, dict[str, Any]] = {}
+        # customer key -> parallel sorted arrays of timestamps and transaction keys
+        self.customer_timestamps: dict[str, list[float]] = {}
+        self.customer_keys: dict[str, list[str]] = {}
+        # customer key -> transaction key -> timestamp, for O(1) membership checks
+        self.customer_scores: dict[str, dict[str, float]] = {}
+
+    def store_customer_transaction(self, transaction: Transaction):
+        """Store transaction with time-series indexing"""
+        transaction_key = f"tx:{transaction.transaction_id}"
+        customer_key = f"customer:{transaction.customer_id}"
+
+        # Store full transaction (overwrites like a JSON.SET on the same key)
+        self.transactions[transaction_key] = transaction.to_dict()
+
+        timestamps = self.customer_timestamps.setdefault(customer_key, [])
+        keys = self.customer_keys.setdefault(customer_key, [])
+        scores = self.customer_scores.setdefault(customer_key, {})
+
+        # Re-adding a member updates its score, as ZADD does
+        if transaction_key in scores:
+            position = self._find_position(
+                timestamps, keys, scores[transaction_key], transaction_key
+            )
+            del timestamps[position]
+            del keys[position]
+
+        timestamp = transaction.transaction_timetamp
+        position = self._find_position(timestamps, keys, timestamp, transaction_key)
+
+        timestamps.insert(position, timestamp)
+        keys.insert(position, transaction_key)
+        scores[transaction_key] = timestamp
+
+    def store_customer_transactions(self, transactions: list[Transaction]):
+        """Store transactions in order"""
+        for transaction in transactions:
+            self.store_customer_transaction(transaction)
+
+    @staticmethod
+    def _find_position(
+        timestamps: list[float], keys: list[str], timestamp: float, key: str
+    ) -> int:
+        """Bisect for (timestamp, key); equal scores are ordered by member like a sorted set."""
+
+        start = bisect_left(timestamps, timestamp)
+        end = bisect_right(timestamps, timestamp, lo=start)
+
+        return bisect_left(keys, key, lo=start, hi=end)
+
+    def get_customer_transactions(
+        self, customer_id: str, min_transaction_time: int, max_transaction_time: int
+    ) -> list[Any]:
+        """Get customer's transactions between two timestamps, latest first."""
+
+        customer_key = f"customer:{customer_id}"
+        timestamps = self.customer_timestamps.get(customer_key, [])
+        keys = self.customer_keys.get(customer_key, [])
+
+        start = bisect_left(timestamps, min_transaction_time)
+        end = bisect_right(timestamps, max_transaction_time)
+
+        return [self.transactions[key] for key in reversed(keys[start:end])]
+
+    def has_transaction(self, transaction_id: str) -> bool:
+        """Whether a transaction with this ID is stored"""
+        return f"tx:{transaction_id}" in self.transactions
+
+    def clear_all_transactions(self):
+        """Delete all data from memory"""
+
+        self.transactions.clear()
+        self.customer_timestamps.clear()
+        self.customer_keys.clear()
+        self.customer_scores.clear()
+
+        print("Cleared all transactions and customer data from memory")
@@ -0,0 +1,62 @@
+from hashlib import sha256
+from typing import Iterable
+
+# Domain separation prefixes (RFC 6962), so a leaf can never pass for a node
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+EMPTY_ROOT = sha256(b"").digest()
+
+
+def leaf_hash(data: bytes) -> bytes:
+    return sha256(LEAF_PREFIX + data).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return sha256(NODE_PREFIX + left + right).digest()
+
+
+class MerkleAccumulator:
+    """Incremental RFC 6962 Merkle tree root.
+
+    Keeps the roots of the perfect subtrees covering the leaves so far (one per
+    set bit of the leaf count), so appending a leaf costs O(log n) hashes and
+    every leaf and interior node is hashed once.
+    """
+
+    def __init__(self):
+        # (subtree size, subtree root), sizes strictly decreasing
+        self.subtrees: list[tuple[int, bytes]] = []
+        self.leaf_count = 0
+
+    def append(self, data: bytes) -> None:
+        size, root = 1, leaf_hash(data)
+
+        # Merge equal sized subtrees like carries in a binary counter
+        while self.subtrees and self.subtrees[-1][0] == size:
+            left_size, left = self.subtrees.pop()
+            size, root = left_size + size, node_hash(left, root)
+
+        self.subtrees.append((size, root))
+        self.leaf_count += 1
+
+    def root(self) -> bytes:
+        if not self.subtrees:
+            return EMPTY_ROOT
+
+        # Fold the smaller right-hand subtrees into the larger left ones
+        root = self.subtrees[-1][1]
+        for _, left in reversed(self.subtrees[:-1]):
+            root = node_hash(left, root)
+
+        return root
+
+
+def merkle_root(leaves: Iterable[bytes]) -> bytes:
+    """Merkle tree root of the leaf data, in order."""
+
+    accumulator = MerkleAccumulator()
+    for data in leaves:
+        accumulator.append(data)
+
+    return accumulator.root()
@@ -0,0 +1,294 @@
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from validator import Failure, Result
+
+METRICS_FILE = "metrics.prom"
+DEFAULT_METRICS_INTERVAL = 10.0
+
+STAGES = ["parse", "store", "validate", "write", "blockchain", "transaction"]
+
+# HDR-style log-linear buckets: every power of two is split into 16 buckets,
+# so a recorded value is off by at most 1/16 (6.25%) of itself
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+# Up to 2**40 ns (about 18 minutes); longer values land in the last bucket
+MAX_SHIFT = 40 - SUB_BUCKET_BITS
+BUCKET_COUNT = (MAX_SHIFT + 2) * SUB_BUCKETS
+
+
+def _bucket_index(value: int) -> int:
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    if shift <= 0:
+        return value
+
+    return min(shift * SUB_BUCKETS + (value >> shift), BUCKET_COUNT - 1)
+
+
+def _bucket_upper_bound(index: int) -> int:
+    """Smallest value above the bucket (exclusive upper bound)."""
+
+    if index < 2 * SUB_BUCKETS:
+        return index + 1
+
+    shift = index // SUB_BUCKETS - 1
+    return (index - shift * SUB_BUCKETS + 1) << shift
+
+
+class LatencyHistogram:
+    """Fixed-memory histogram of nanosecond latencies with bounded relative error."""
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, nanoseconds: int) -> None:
+        # _bucket_index inlined, this runs several times per transaction
+        shift = nanoseconds.bit_length() - SUB_BUCKET_BITS - 1
+        if shift <= 0:
+            self.counts[nanoseconds] += 1
+        else:
+            index = shift * SUB_BUCKETS + (nanoseconds >> shift)
+            self.counts[index if index < BUCKET_COUNT else BUCKET_COUNT - 1] += 1
+        self.count += 1
+        self.total += nanoseconds
+        if nanoseconds > self.max:
+            self.max = nanoseconds
+
+    def percentile(self, percent: float) -> int:
+        """Upper bound of the value below which ``percent`` of records fall."""
+
+        if not self.count:
+            return 0
+
+        rank = max(self.count * percent / 100, 1)
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(_bucket_upper_bound(index), self.max)
+
+        return self.max
+
+    def cumulative_counts(self) -> list[tuple[int, int]]:
+        """(upper bound ns, records below it) at each power of two up to the max."""
+
+        cumulative = []
+        seen = 0
+        boundary = SUB_BUCKETS * 2
+
+        for index, count in enumerate(self.counts):
+            if index >= SUB_BUCKETS * 2 and index % SUB_BUCKETS == 0:
+                # First bucket of a new power of two: boundary reached
+                cumulative.append((boundary, seen))
+                boundary *= 2
+                if boundary > self.max * 2:
+                    break
+            seen += count
+
+        return cumulative
+
+
+def _format_duration(nanoseconds: float) -> str:
+    if nanoseconds < 1e6:
+        return f"{nanoseconds / 1e3:.1f}us"
+    if nanoseconds < 1e9:
+        return f"{nanoseconds / 1e6:.1f}ms"
+
+    return f"{nanoseconds / 1e9:.1f}s"
+
+
+def _histogram_lines(name: str, labels: str, histogram: LatencyHistogram) -> list[str]:
+    """Prometheus samples of a histogram; ``labels`` are 'name="value",' pairs."""
+
+    count = histogram.count
+    lines = [
+        f'{name}_bucket{{{labels}le="{upper_bound / 1e9:.9g}"}} {below}'
+        for upper_bound, below in histogram.cumulative_counts()
+    ]
+    suffix = f"{{{labels.rstrip(',')}}}" if labels else ""
+
+    return lines + [
+        f'{name}_bucket{{{labels}le="+Inf"}} {count}',
+        f"{name}_sum{suffix} {histogram.total / 1e9:.9g}",
+        f"{name}_count{suffix} {count}",
+    ]
+
+
+class Metrics:
+    """Counters and per-stage latency histograms of the streaming engine.
+
+    Updated from the processing thread only; the exporter thread reads
+    snapshots, which may be a few records apart between metrics.
+    """
+
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.transactions = 0
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        # Failure message, or None for accepted transactions -> count
+        self.results: dict[Optional[str], int] = {}
+
+        # Bound once, as record_transaction runs for every transaction
+        self._record = LatencyHistogram.record
+        self._parse, self._store, self._validate, self._write = (
+            self.histograms[stage] for stage in STAGES[:4]
+        )
+        self._blockchain = self.histograms["blockchain"]
+        self._transaction = self.histograms["transaction"]
+
+        # From reading a line of live input to its result being written
+        self.latency = LatencyHistogram()
+
+    def record_transaction(
+        self,
+        result: Result,
+        parse: int,
+        store: Optional[int],
+        validate: int,
+        write: int,
+        blockchain: Optional[int],
+    ) -> None:
+        """Record the stage durations (ns) of a transaction; None if skipped."""
+
+        record = self._record
+        record(self._parse, parse)
+        if store is not None:
+            record(self._store, store)
+        record(self._validate, validate)
+        record(self._write, write)
+        if blockchain is not None:
+            record(self._blockchain, blockchain)
+        record(
+            self._transaction,
+            parse + (store or 0) + validate + write + (blockchain or 0),
+        )
+
+        key = result.message if isinstance(result, Failure) else None
+        results = self.results
+        results[key] = results.get(key, 0) + 1
+        self.transactions += 1
+
+    def record_latency(self, nanoseconds: int) -> None:
+        self._record(self.latency, nanoseconds)
+
+    def _sorted_results(self) -> list[tuple[Optional[str], int]]:
+        """Accepted first, then failures by message."""
+
+        # Copied in one call, as the processing thread may add keys meanwhile
+        results = self.results.copy()
+        return sorted(
+            results.items(), key=lambda item: (item[0] is not None, item[0] or "")
+        )
+
+    def to_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+
+        lines = [
+            "# HELP fund_load_transactions_total Transactions processed.",
+            "# TYPE fund_load_transactions_total counter",
+            f"fund_load_transactions_total {self.transactions}",
+            "# HELP fund_load_results_total Validation results by outcome and reason.",
+            "# TYPE fund_load_results_total counter",
+        ]
+
+        for reason, count in self._sorted_results():
+            accepted = reason is None
+            reason = (reason or "").replace("\\", "\\\\").replace('"', '\\"')
+            lines.append(
+                f'fund_load_results_total{{accepted="{str(accepted).lower()}",'
+                f'reason="{reason}"}} {count}'
+            )
+
+        lines += [
+            "# HELP fund_load_stage_seconds Time spent per transaction in each stage.",
+            "# TYPE fund_load_stage_seconds histogram",
+        ]
+        for stage, histogram in self.histograms.items():
+            lines += _histogram_lines(
+                "fund_load_stage_seconds", f'stage="{stage}",', histogram
+            )
+
+        if self.latency.count:
+            lines += [
+                "# HELP fund_load_latency_seconds Time from reading a line of live "
+                "input to writing its result.",
+                "# TYPE fund_load_latency_seconds histogram",
+            ]
+            lines += _histogram_lines("fund_load_latency_seconds", "", self.latency)
+
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: Path) -> None:
+        """Atomically replace a Prometheus text file (textfile collector style)."""
+
+        temporary_path = path.with_suffix(".tmp")
+        temporary_path.write_text(self.to_prometheus())
+        os.replace(temporary_path, path)
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self.start_time
+        lines = [
+            f"Processed {self.transactions} transactions in {elapsed:.1f}s",
+            f"  {'stage':<12} {'count':>9} {'mean':>9} {'p50':>9} "
+            f"{'p90':>9} {'p99':>9} {'max':>9}",
+        ]
+
+        rows = list(self.histograms.items()) + [("end_to_end", self.latency)]
+        for stage, histogram in rows:
+            if not histogram.count:
+                continue
+            values = [
+                histogram.total / histogram.count,
+                histogram.percentile(50),
+                histogram.percentile(90),
+                histogram.percentile(99),
+                histogram.max,
+            ]
+            lines.append(
+                f"  {stage:<12} {histogram.count:>9}"
+                + "".join(f" {_format_duration(value):>9}" for value in values)
+            )
+
+        for reason, count in self._sorted_results():
+            lines.append(
+                f"  {'rejected' if reason else 'accepted':<12} {count:>9}"
+                + (f"  {reason}" if reason else "")
+            )
+
+        return "\n".join(lines)
+
+
+class MetricsExporter:
+    """Background thread writing the metrics file every ``interval`` seconds,
+    and once more when stopped."""
+
+    def __init__(self, metrics: Metrics, path: Path, interval: float):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(
+            target=self._run, name="metrics-exporter", daemon=True
+        )
+
+    def __enter__(self) -> "MetricsExporter":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self.stopped.wait(self.interval):
+            self.metrics.write_prometheus(self.path)
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+        self.metrics.write_prometheus(self.path)
@@ -0,0 +1,299 @@
+import asyncio
+import json
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from blockchain import BaseBlockchain
+from redis_storage import AsyncRedisTimeSeriesStorage
+from result_writer import ValidationResultWriter
+from storage import TransactionStorage
+from transactions import Transaction
+from validator import Result, Success, TransactionValidator
+
+# Lines travel between stages in batches to keep per-item queue overhead low;
+# queues hold at most DEFAULT_QUEUE_SIZE batches (backpressure on the reader)
+DEFAULT_BATCH_SIZE = 256
+DEFAULT_QUEUE_SIZE = 8
+
+
+class BatchValidationError(Exception):
+    """Validation of a batch failed partway, e.g. because storage went away.
+
+    ``results`` are those of the transactions validated, and stored, before
+    the failure, which is the exception's ``__cause__``.
+    """
+
+    def __init__(self, results: list[Result]):
+        super().__init__(f"validation failed after {len(results)} transactions")
+        self.results = results
+
+
+class StageStats:
+    """Items processed by a pipeline stage and time spent processing them."""
+
+    def __init__(self, name: str, queue: Optional[asyncio.Queue] = None):
+        self.name = name
+        # Input queue of the stage, None for the reader
+        self.queue = queue
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.max_queue_depth = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
+
+    @property
+    def throughput(self) -> float:
+        """Items per second of busy time."""
+        return self.items / self.busy_seconds if self.busy_seconds else 0.0
+
+
+class PipelineStats:
+    def __init__(self):
+        self.stages: dict[str, StageStats] = {}
+        self.start_time = time.perf_counter()
+
+    def add_stage(self, name: str, queue: Optional[asyncio.Queue] = None) -> None:
+        self.stages[name] = StageStats(name, queue)
+
+    def record(self, name: str, items: int, busy_seconds: float) -> None:
+        stage = self.stages[name]
+        stage.items += items
+        stage.busy_seconds += busy_seconds
+        stage.max_queue_depth = max(stage.max_queue_depth, stage.queue_depth)
+
+    def report(self) -> str:
+        elapsed = time.perf_counter() - self.start_time
+        lines = [f"Pipeline after {elapsed:.1f}s:"]
+
+        for stage in self.stages.values():
+            lines.append(
+                f"  {stage.name:<10} {stage.items:>9} items "
+                f"{stage.throughput:>11,.0f} items/s busy "
+                f"queue {stage.queue_depth}/{stage.max_queue_depth} batches (now/max)"
+            )
+
+        return "\n".join(lines)
+
+
+async def _report_periodically(stats: PipelineStats, interval: float) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        print(stats.report())
+
+
+def _validate_batch(
+    transactions: list[Transaction],
+    storage: TransactionStorage,
+    validator: TransactionValidator,
+    atomic: bool,
+) -> list[Result]:
+    """Store and validate a batch in order, as main's streaming loop does."""
+
+    results: list[Result] = []
+    try:
+        for transaction in transactions:
+            duplicate = validator.check_duplicate(transaction)
+            if duplicate is not None:
+                results.append(duplicate)
+            elif atomic:
+                results.append(validator.validate_and_store_transaction(transaction))
+            else:
+                storage.store_customer_transaction(transaction)
+                results.append(validator.validate_transaction(transaction))
+    except Exception as error:
+        raise BatchValidationError(results) from error
+
+    return results
+
+
+async def validate_batch(
+    transactions: list[Transaction],
+    storage: TransactionStorage,
+    validator: TransactionValidator,
+    atomic: bool = False,
+    async_storage: Optional[AsyncRedisTimeSeriesStorage] = None,
+) -> list[Result]:
+    """Store and validate a batch in order without blocking the event loop.
+
+    With ``async_storage`` the batch is one pipelined round trip of atomic
+    Redis script calls, otherwise it is validated in a worker thread, and a
+    failure partway raises BatchValidationError with the results so far.
+    """
+
+    if async_storage is None:
+        return await asyncio.to_thread(
+            _validate_batch, transactions, storage, validator, atomic
+        )
+
+    # The batch is stored as a whole, so repeats within it are not in
+    # storage yet when checked
+    unstored_ids: set[str] = set()
+    duplicates = [
+        validator.check_duplicate(transaction, unstored_ids)
+        for transaction in transactions
+    ]
+
+    failure_messages = iter(
+        await async_storage.validate_and_store_transactions(
+            [
+                (transaction, validator.atomic_validation_args(transaction))
+                for transaction, duplicate in zip(transactions, duplicates)
+                if duplicate is None
+            ]
+        )
+    )
+
+    return [
+        (
+            duplicate
+            if duplicate is not None
+            else validator.result_from_failure_message(next(failure_messages))
+        )
+        for duplicate in duplicates
+    ]
+
+
+async def run_pipeline(
+    input_path: str,
+    storage: TransactionStorage,
+    validator: TransactionValidator,
+    result_writer: ValidationResultWriter,
+    blockchain: BaseBlockchain,
+    atomic: bool = False,
+    async_storage: Optional[AsyncRedisTimeSeriesStorage] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    queue_size: int = DEFAULT_QUEUE_SIZE,
+    stats_interval: Optional[float] = None,
+) -> PipelineStats:
+    """Process an input file through reader, parser, validator, writer and
+    blockchain stages running concurrently, connected by bounded queues.
+
+    Every stage is a single consumer handling batches in input order, so
+    per-customer order and the order of output.txt are those of the input.
+    Validation, result writing and blockchain appends run in worker threads
+    while the other stages keep going. With ``async_storage``, validation is
+    instead one pipelined round trip of atomic Redis script calls per batch.
+    Without it, storage calls are made with the synchronous client from the
+    validation thread: the validator's window reads interleave with its
+    aggregate updates, transaction by transaction.
+    """
+
+    parse_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    validate_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    write_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    blockchain_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    stats = PipelineStats()
+    stats.add_stage("reader")
+    stats.add_stage("parser", parse_queue)
+    stats.add_stage("validator", validate_queue)
+    stats.add_stage("writer", write_queue)
+    stats.add_stage("blockchain", blockchain_queue)
+
+    async def stage(
+        name: str,
+        source: asyncio.Queue,
+        sink: Optional[asyncio.Queue],
+        process: Callable[[Any], Awaitable[tuple[Any, int]]],
+    ) -> None:
+        # None marks the end of the input and is passed down the pipeline
+        while (batch := await source.get()) is not None:
+            start = time.perf_counter()
+            output, items = await process(batch)
+            stats.record(name, items, time.perf_counter() - start)
+
+            if sink is not None:
+                await sink.put(output)
+
+        if sink is not None:
+            await sink.put(None)
+
+    async def read() -> None:
+        with open(input_path, "r") as f:
+            while True:
+                start = time.perf_counter()
+                batch = [
+                    line for line in (f.readline() for _ in range(batch_size)) if line
+                ]
+                stats.record("reader", len(batch), time.perf_counter() - start)
+
+                if not batch:
+                    break
+                await parse_queue.put(batch)
+
+        await parse_queue.put(None)
+
+    async def parse(lines: list[str]) -> tuple[list[Transaction], int]:
+        transactions = [
+            Transaction(json.loads(line.strip())) for line in lines if line.strip()
+        ]
+        return transactions, len(transactions)
+
+    async def validate(
+        transactions: list[Transaction],
+    ) -> tuple[tuple[list[Transaction], list[Result]], int]:
+        try:
+            results = await validate_batch(
+                transactions, storage, validator, atomic, async_storage
+            )
+        except BatchValidationError as error:
+            # The run stops; report what went wrong
+            raise error.__cause__ from None
+        return (transactions, results), len(transactions)
+
+    def write_results(
+        transactions: list[Transaction], results: list[Result]
+    ) -> list[Transaction]:
+        accepted = []
+
+        for transaction, result in zip(transactions, results):
+            result_writer.write(transaction, result)
+            if isinstance(result, Success):
+                accepted.append(transaction)
+
+        return accepted
+
+    def add_transactions(accepted: list[Transaction]) -> None:
+        for transaction in accepted:
+            blockchain.add_transaction(transaction)
+
+    # File writes and block sealing block, so they run in worker threads; each
+    # stage is a single consumer, so the writer and the chain are only ever
+    # used by one thread at a time
+    async def write(
+        validated: tuple[list[Transaction], list[Result]],
+    ) -> tuple[list[Transaction], int]:
+        transactions, results = validated
+        accepted = await asyncio.to_thread(write_results, transactions, results)
+
+        return accepted, len(transactions)
+
+    async def append(accepted: list[Transaction]) -> tuple[None, int]:
+        await asyncio.to_thread(add_transactions, accepted)
+
+        return None, len(accepted)
+
+    reporter = (
+        asyncio.create_task(_report_periodically(stats, stats_interval))
+        if stats_interval
+        else None
+    )
+
+    try:
+        # A failing stage cancels the others instead of leaving them blocked
+        async with asyncio.TaskGroup() as group:
+            group.create_task(read())
+            group.create_task(stage("parser", parse_queue, validate_queue, parse))
+            group.create_task(stage("validator", validate_queue, write_queue, validate))
+            group.create_task(stage("writer", write_queue, blockchain_queue, write))
+            group.create_task(stage("blockchain", blockchain_queue, None, append))
+    except* Exception as group:
+        # Surface the failing stage's error as the streaming loop would
+        raise group.exceptions[0]
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+
+    return stats
@@ -0,0 +1,153 @@
+import mmap
+import os
+import struct
+import tempfile
+
+# Sieve tables are bytearrays when built in-process and read-only memoryviews
+# over a memory-mapped file when loaded from the on-disk cache
+PrimeSieve = bytearray | memoryview
+
+# Cache file header: magic, format version, prime limit the sieve was built for
+PRIME_TABLE_MAGIC = b"PSIEVE"
+PRIME_TABLE_VERSION = 1
+PRIME_TABLE_HEADER = struct.Struct("<6sHQ")
+
+
+def generate_prime_sieve(maximum: int) -> bytearray:
+    """Sieve of Eratosthenes over the odd numbers below maximum.
+
+    ``sieve[i]`` is 1 if ``2 * i + 1`` is prime, so the table takes one byte per
+    two integers and is read with ``is_prime_in_sieve``.
+    """
+    from math import isqrt
+
+    size = maximum // 2
+    sieve = bytearray([1]) * size
+
+    if size:
+        sieve[0] = 0  # 1 is not prime
+
+    for i in range(1, (isqrt(max(maximum - 1, 0)) - 1) // 2 + 1):
+        if sieve[i]:
+            prime = 2 * i + 1
+            # Cross out odd multiples starting at prime squared
+            start = prime * prime // 2
+            sieve[start::prime] = bytes(len(range(start, size, prime)))
+
+    return sieve
+
+
+def is_prime_in_sieve(sieve: PrimeSieve, n: int) -> bool:
+    """Look up n in a table built by ``generate_prime_sieve`` (n below its maximum)."""
+
+    if n % 2 == 0:
+        return n == 2
+
+    return bool(sieve[n >> 1])
+
+
+# Witnesses making Miller-Rabin deterministic for n < 3.3 * 10**24
+MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def is_prime_miller_rabin(n: int) -> bool:
+    """Deterministic Miller-Rabin primality test, for numbers beyond the sieve."""
+
+    if n < 2:
+        return False
+
+    for base in MILLER_RABIN_BASES:
+        if n % base == 0:
+            return n == base
+
+    # Write n - 1 as d * 2**r with d odd
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+
+    for base in MILLER_RABIN_BASES:
+        x = pow(base, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(r - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+
+    return True
+
+
+def write_prime_table(path: str, maximum: int) -> None:
+    """Build the sieve for maximum and atomically write it to path."""
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    sieve = generate_prime_sieve(maximum)
+
+    # Write to a temporary file and rename so readers never see a partial table
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".prime_table.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(
+                PRIME_TABLE_HEADER.pack(PRIME_TABLE_MAGIC, PRIME_TABLE_VERSION, maximum)
+            )
+            f.write(sieve)
+        # mkstemp creates owner-only files; the table is meant to be shared
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def _map_prime_table(path: str, maximum: int) -> memoryview | None:
+    """Memory-map a cached table, or return None if it is missing, stale or too small."""
+
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        # ValueError: empty file cannot be mapped
+        return None
+
+    if len(mapped) < PRIME_TABLE_HEADER.size:
+        mapped.close()
+        return None
+
+    magic, version, table_maximum = PRIME_TABLE_HEADER.unpack_from(mapped)
+    size = len(mapped) - PRIME_TABLE_HEADER.size
+
+    if (
+        magic != PRIME_TABLE_MAGIC
+        or version != PRIME_TABLE_VERSION
+        or table_maximum < maximum
+        or size != table_maximum // 2
+    ):
+        mapped.close()
+        return None
+
+    # The view keeps the mapping alive; pages are shared between processes
+    return memoryview(mapped)[PRIME_TABLE_HEADER.size :]
+
+
+def load_prime_sieve(path: str, maximum: int) -> PrimeSieve:
+    """Return a read-only memory-mapped sieve covering at least maximum.
+
+    The table is (re)generated when the cache file is missing, from another
+    format version, or was built for a smaller limit.
+    """
+
+    sieve = _map_prime_table(path, maximum)
+
+    if sieve is None:
+        write_prime_table(path, maximum)
+        sieve = _map_prime_table(path, maximum)
+
+    if sieve is None:
+        raise ValueError(f"Invalid prime table file: {path}")
+
+    return sieve
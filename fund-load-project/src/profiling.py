@@ -0,0 +1,220 @@
+import cProfile
+import io
+import os
+import pstats
+import signal
+from abc import ABC, abstractmethod
+from collections import Counter, defaultdict
+from pathlib import Path
+from types import CodeType, FrameType
+from typing import Optional
+
+PROFILE_STACKS_FILE = "profile.collapsed"
+PROFILE_REPORT_FILE = "profile.txt"
+PROFILE_STATS_FILE = "profile.pstats"
+
+DEFAULT_SAMPLE_INTERVAL = 0.001
+DEFAULT_TOP_FUNCTIONS = 25
+
+# Call graph paths deeper than this, or worth less than this share of the
+# profiled time, are left out of the collapsed stacks of a cProfile run
+MAX_STACK_DEPTH = 64
+MIN_STACK_SHARE = 1e-5
+
+
+def _function_label(filename: str, line_number: int, name: str) -> str:
+    """Flamegraph frame name; collapsed stacks use ';' between frames."""
+
+    if filename == "~":
+        # Built-in functions, e.g. "<built-in method time.strptime>"
+        label = name
+    else:
+        label = f"{name} ({os.path.basename(filename)}:{line_number})"
+
+    return label.replace(";", ":")
+
+
+def _code_label(code: CodeType) -> str:
+    return _function_label(code.co_filename, code.co_firstlineno, code.co_name)
+
+
+class Profiler(ABC):
+    """Profiles the thread that starts it, until stopped."""
+
+    @abstractmethod
+    def start(self) -> None: ...
+
+    @abstractmethod
+    def stop(self) -> None: ...
+
+    @abstractmethod
+    def collapsed_stacks(self) -> dict[str, int]:
+        """Stacks as 'outer;inner;innermost' -> weight, as read by flamegraph.pl."""
+
+    @abstractmethod
+    def report(self, top: int) -> str:
+        """The ``top`` functions with the most time spent in their own code."""
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.stop()
+
+    def save(self, folder_path: Path, top: int) -> str:
+        """Write the collapsed stacks and the report to a folder; returns the report."""
+
+        with open(folder_path / PROFILE_STACKS_FILE, "w") as f:
+            for stack, weight in sorted(self.collapsed_stacks().items()):
+                f.write(f"{stack} {weight}\n")
+
+        report = self.report(top)
+        (folder_path / PROFILE_REPORT_FILE).write_text(report)
+
+        return report
+
+
+class DeterministicProfiler(Profiler):
+    """cProfile: every call is timed, at the cost of a slower run.
+
+    cProfile keeps call counts and times per caller and callee pair, not full
+    stacks, so collapsed stacks are rebuilt from the call graph: the time of a
+    function is split across its callers in proportion to the time spent in
+    each call. Weights are in microseconds.
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self.profile.enable()
+
+    def stop(self) -> None:
+        self.profile.disable()
+
+    def collapsed_stacks(self) -> dict[str, int]:
+        stats = pstats.Stats(self.profile).stats
+
+        roots = []
+        children = defaultdict(list)
+        for function, (_, _, _, cumulative, callers) in stats.items():
+            if not callers:
+                roots.append(function)
+            for caller, (_, _, _, edge_cumulative) in callers.items():
+                children[caller].append((function, edge_cumulative))
+
+        total = sum(stats[function][3] for function in roots)
+        minimum = total * MIN_STACK_SHARE
+        stacks: Counter[str] = Counter()
+
+        def visit(function: tuple, stack: str, path: set, seconds: float) -> None:
+            own_time, cumulative = stats[function][2], stats[function][3]
+            share = min(seconds / cumulative, 1.0) if cumulative else 0.0
+
+            label = _function_label(*function)
+            stack = f"{stack};{label}" if stack else label
+            stacks[stack] += own_time * share * 1e6
+
+            if len(path) >= MAX_STACK_DEPTH:
+                return
+
+            path.add(function)
+            for child, edge_cumulative in children[function]:
+                # Recursive calls are already counted in the outer call
+                if child not in path and edge_cumulative * share > minimum:
+                    visit(child, stack, path, edge_cumulative * share)
+            path.remove(function)
+
+        for root in roots:
+            visit(root, "", set(), stats[root][3])
+
+        return {stack: round(weight) for stack, weight in stacks.items() if weight >= 1}
+
+    def report(self, top: int) -> str:
+        stream = io.StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+
+        return stream.getvalue()
+
+    def save(self, folder_path: Path, top: int) -> str:
+        # Full statistics, for pstats, snakeviz or gprof2dot
+        self.profile.dump_stats(folder_path / PROFILE_STATS_FILE)
+
+        return super().save(folder_path, top)
+
+
+class SamplingProfiler(Profiler):
+    """Samples the stack of the main thread every ``interval`` seconds of CPU time.
+
+    A SIGPROF interval timer interrupts the process, and the signal handler
+    records the stack it interrupted, so the run is only slowed down by the
+    handler itself. Python runs signal handlers between bytecodes of the main
+    thread: time in built-in functions is counted to their Python caller, and
+    time blocked on I/O, which uses no CPU, is not counted. Unix only.
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        # Stack of code objects, outermost first -> samples
+        self.stacks: Counter[tuple[CodeType, ...]] = Counter()
+        self.samples = 0
+        self.previous_handler = None
+
+    def start(self) -> None:
+        self.previous_handler = signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, self.previous_handler)
+
+    def _sample(self, signum: int, frame: Optional[FrameType]) -> None:
+        codes = []
+        while frame is not None:
+            codes.append(frame.f_code)
+            frame = frame.f_back
+
+        # Code objects are only labelled once, when saving
+        self.stacks[tuple(reversed(codes))] += 1
+        self.samples += 1
+
+    def collapsed_stacks(self) -> dict[str, int]:
+        collapsed: Counter[str] = Counter()
+        for codes, count in self.stacks.items():
+            collapsed[";".join(_code_label(code) for code in codes)] += count
+
+        return dict(collapsed)
+
+    def report(self, top: int) -> str:
+        own: Counter[CodeType] = Counter()
+        total: Counter[CodeType] = Counter()
+
+        for codes, count in self.stacks.items():
+            own[codes[-1]] += count
+            # Recursive functions count once per sample
+            for code in set(codes):
+                total[code] += count
+
+        samples = max(self.samples, 1)
+        lines = [
+            f"{self.samples} samples every {self.interval * 1000:g} ms of CPU time",
+            f"{'own %':>7} {'total %':>8} {'own':>8} {'total':>8}  function",
+        ]
+        for code, count in own.most_common(top):
+            lines.append(
+                f"{count / samples:>7.1%} {total[code] / samples:>8.1%} "
+                f"{count:>8} {total[code]:>8}  {_code_label(code)}"
+            )
+
+        return "\n".join(lines) + "\n"
+
+
+def create_profiler(kind: str, interval: float = DEFAULT_SAMPLE_INTERVAL) -> Profiler:
+    """Instantiate the profiler selected on the command line."""
+
+    if kind == "cprofile":
+        return DeterministicProfiler()
+
+    return SamplingProfiler(interval)
@@ -1,7 +1,79 @@
+import json
+from typing import Any
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
 from redis.commands.json.path import Path
 from transactions import Transaction
-from typing import Any
+
+# Store a transaction and check it against the validator's business rules in a
+# single atomic call. Mirrors TransactionValidator.validate_transaction: the
+# transaction is stored first, then the daily (and for normal IDs weekly)
+# windows are summed in cents with Monday amounts doubled.
+#
+# KEYS[1]: transaction key, KEYS[2]: customer key
+# ARGV[1]: transaction JSON, ARGV[2]: timestamp, ARGV[3]: start of UTC day,
+# ARGV[4]: start of trailing week, ARGV[5]: "1" if the transaction ID is prime
+#
+# Returns nil if the transaction is accepted, otherwise the failure message.
+VALIDATE_AND_STORE_SCRIPT = """
+local function is_monday(date_str)
+    -- Days since 1970-01-01 (a Thursday) from a YYYY-MM-DD string
+    local y = tonumber(string.sub(date_str, 1, 4))
+    local m = tonumber(string.sub(date_str, 6, 7))
+    local d = tonumber(string.sub(date_str, 9, 10))
+    if m <= 2 then y = y - 1 end
+    local era = math.floor(y / 400)
+    local yoe = y - era * 400
+    local doy = math.floor((153 * ((m + 9) % 12) + 2) / 5) + d - 1
+    local doe = yoe * 365 + math.floor(yoe / 4) - math.floor(yoe / 100) + doy
+    local days = era * 146097 + doe - 719468
+    return (days + 3) % 7 == 0
+end
+
+local function window(min_time, max_time)
+    local tx_keys = redis.call('ZREVRANGEBYSCORE', KEYS[2], max_time, min_time)
+    local total = 0
+    for _, tx_key in ipairs(tx_keys) do
+        local tx = cjson.decode(redis.call('JSON.GET', tx_key, '.'))
+        -- Sum in integer cents so limits are compared exactly
+        local amount = math.floor((tx['load_amount'] or 0) * 100 + 0.5)
+        if tx['transaction_date'] and is_monday(tx['transaction_date']) then
+            amount = amount * 2
+        end
+        total = total + amount
+    end
+    return #tx_keys, total
+end
+
+redis.call('JSON.SET', KEYS[1], '.', ARGV[1])
+redis.call('ZADD', KEYS[2], ARGV[2], KEYS[1])
+
+local max_time = math.floor(tonumber(ARGV[2]))
+local daily_count, daily_total = window(ARGV[3], max_time)
+
+if ARGV[5] == '1' then
+    if daily_count > 1 then
+        return 'Prime ID: more than one daily transaction'
+    end
+    if daily_total > 999900 then
+        return 'Prime ID: daily total exceeds 9,999'
+    end
+    return false
+end
+
+if daily_count > 3 then
+    return 'Normal ID: more than three daily transactions'
+end
+if daily_total > 500000 then
+    return 'Normal ID: daily total exceeds 5,000'
+end
+
+local _, weekly_total = window(ARGV[4], max_time)
+if weekly_total > 2000000 then
+    return 'Normal ID: weekly total exceeds 20,000'
+end
+return false
+"""
 
 
 class RedisTimeSeriesStorage:
@@ -9,6 +81,10 @@ class RedisTimeSeriesStorage:
 
     def __init__(self, host: str = "redis", port: int = 6379):
         self.redis = Redis(host=host, port=port, decode_responses=True)
+        # Sent with EVALSHA, loaded on first use
+        self.validate_and_store_script = self.redis.register_script(
+            VALIDATE_AND_STORE_SCRIPT
+        )
         print(f"Connected to Redis at {host}:{port}")
 
     def store_customer_transaction(self, transaction: Transaction):
@@ -17,15 +93,61 @@ class RedisTimeSeriesStorage:
         transaction_key = f"tx:{transaction.transaction_id}"
         customer_key = f"customer:{transaction.customer_id}"
 
+        # Queue both writes in a single MULTI/EXEC so they cost one round trip
+        pipe = self.redis.pipeline(transaction=True)
+
         # Store full transaction
-        self.redis.json().set(transaction_key, Path.root_path(), transaction.to_dict())
+        pipe.json().set(transaction_key, Path.root_path(), transaction.to_dict())
 
         # Add to customer's sorted set by timestamp
-        self.redis.zadd(
+        pipe.zadd(
             customer_key,
             {transaction_key: transaction.transaction_timetamp},
         )
 
+        pipe.execute()
+
+    def store_customer_transactions(self, transactions: list[Transaction]):
+        """Store transactions in order with a single pipelined round trip"""
+        pipe = self.redis.pipeline(transaction=False)
+
+        for transaction in transactions:
+            transaction_key = f"tx:{transaction.transaction_id}"
+            pipe.json().set(transaction_key, Path.root_path(), transaction.to_dict())
+            pipe.zadd(
+                f"customer:{transaction.customer_id}",
+                {transaction_key: transaction.transaction_timetamp},
+            )
+
+        pipe.execute()
+
+    def validate_and_store_transaction(
+        self,
+        transaction: Transaction,
+        is_prime: bool,
+        min_daily_transaction_time: int,
+        min_weekly_transaction_time: int,
+    ) -> str | None:
+        """Store transaction and apply the validation rules in one atomic call.
+
+        Returns None if the transaction is accepted, otherwise the failure message.
+        Window members are read server-side, so this assumes a non-clustered Redis.
+        """
+
+        transaction_key = f"tx:{transaction.transaction_id}"
+        customer_key = f"customer:{transaction.customer_id}"
+
+        return self.validate_and_store_script(  # type: ignore
+            keys=[transaction_key, customer_key],
+            args=[
+                json.dumps(transaction.to_dict()),
+                transaction.transaction_timetamp,
+                min_daily_transaction_time,
+                min_weekly_transaction_time,
+                1 if is_prime else 0,
+            ],
+        )
+
     def get_customer_transactions(
         self, customer_id: str, min_transaction_time: int, max_transaction_time: int
     ) -> list[Any]:
@@ -40,10 +162,14 @@ class RedisTimeSeriesStorage:
             max=max_transaction_time,
         )
 
-        transactions: list[Transaction] = []
-        for key in tx_keys:  # type: ignore
-            tx_data = self.redis.json().get(key)  # type: ignore
+        if not tx_keys:
+            return []
+
+        # Fetch every transaction in the window with a single JSON.MGET
+        tx_data_list = self.redis.json().mget(tx_keys, Path.root_path())  # type: ignore
 
+        transactions: list[Transaction] = []
+        for tx_data in tx_data_list:  # type: ignore
             if not isinstance(tx_data, dict):
                 raise TypeError(f"Expected JSON object, got: {type(tx_data).__name__}")
 
@@ -51,9 +177,69 @@ class RedisTimeSeriesStorage:
 
         return transactions
 
+    def has_transaction(self, transaction_id: str) -> bool:
+        """Whether a transaction with this ID is stored"""
+        return bool(self.redis.exists(f"tx:{transaction_id}"))
+
     def clear_all_transactions(self):
         """Delete all data from Redis"""
 
         self.redis.flushdb()  # type: ignore
 
         print("Cleared all transactions and customer data from Redis")
+
+
+class AsyncRedisTimeSeriesStorage:
+    """asyncio Redis client for the atomic validate-and-store script.
+
+    Uses the same keys and Lua script as RedisTimeSeriesStorage, so the two can
+    be mixed on one database.
+    """
+
+    def __init__(self, host: str = "redis", port: int = 6379):
+        self.redis = AsyncRedis(host=host, port=port, decode_responses=True)
+        self.validate_and_store_script = self.redis.register_script(
+            VALIDATE_AND_STORE_SCRIPT
+        )
+        print(f"Connected to Redis (asyncio) at {host}:{port}")
+
+    async def validate_and_store_transactions(
+        self, calls: list[tuple[Transaction, dict[str, Any]]]
+    ) -> list[str | None]:
+        """Run the validate-and-store script for each transaction, in order.
+
+        ``calls`` pairs each transaction with the keyword arguments of
+        ``RedisTimeSeriesStorage.validate_and_store_transaction``. All calls are
+        sent in one pipeline (one round trip); Redis runs them one after another
+        in that order, so the results are the same as calling them one by one.
+        """
+
+        pipe = self.redis.pipeline(transaction=False)
+
+        for transaction, args in calls:
+            await self.validate_and_store_script(
+                keys=[
+                    f"tx:{transaction.transaction_id}",
+                    f"customer:{transaction.customer_id}",
+                ],
+                args=[
+                    json.dumps(transaction.to_dict()),
+                    transaction.transaction_timetamp,
+                    args["min_daily_transaction_time"],
+                    args["min_weekly_transaction_time"],
+                    1 if args["is_prime"] else 0,
+                ],
+                client=pipe,
+            )
+
+        return await pipe.execute()
+
+    async def clear_all_transactions(self) -> None:
+        """Delete all data from Redis"""
+
+        await self.redis.flushdb()
+
+        print("Cleared all transactions and customer data from Redis")
+
+    async def close(self) -> None:
+        await self.redis.aclose()
@@ -0,0 +1,118 @@
+import os
+import time
+from pathlib import Path
+from typing import IO
+
+from _utils import format_validation_result
+from transactions import Transaction
+from validator import Result
+
+OUTPUT_FILE = "output.txt"
+DETAILED_OUTPUT_FILE = "output_with_detail.jsonl"
+
+# Large write buffers: a flush is one write syscall per file for many records
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+
+class ValidationResultWriter:
+    """Keeps output.txt and output_with_detail.jsonl open for the whole run.
+
+    Lines are buffered and flushed every ``flush_every`` records, when
+    ``flush_interval`` seconds have passed since the last flush, and always on
+    ``close``. With ``fsync`` each flush is also synced to disk.
+
+    The interval is only checked as records are written, so nothing is
+    flushed while no record comes; callers waiting for input call ``flush``
+    before they wait, as main does for live input.
+    """
+
+    def __init__(
+        self,
+        folder_path: Path,
+        flush_every: int | None = None,
+        flush_interval: float | None = None,
+        fsync: bool = False,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ):
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+
+        self.output: IO[str] = open(
+            folder_path / OUTPUT_FILE, "a", buffering=buffer_size
+        )
+        self.detailed_output: IO[str] = open(
+            folder_path / DETAILED_OUTPUT_FILE, "a", buffering=buffer_size
+        )
+
+        self.pending_records = 0
+        self.last_flush_time = time.monotonic()
+
+    def __enter__(self) -> "ValidationResultWriter":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        return self.output.closed
+
+    def write(self, transaction: Transaction, accepted: Result) -> None:
+        """Buffer the result lines of a transaction, flushing per the policy."""
+
+        line, detailed_line = format_validation_result(transaction, accepted)
+        self.output.write(line)
+        self.detailed_output.write(detailed_line)
+        self.pending_records += 1
+
+        if self._should_flush():
+            self.flush()
+
+    def _should_flush(self) -> bool:
+        if self.flush_every is not None and self.pending_records >= self.flush_every:
+            return True
+
+        if self.flush_interval is not None:
+            return time.monotonic() - self.last_flush_time >= self.flush_interval
+
+        return False
+
+    def flush(self) -> None:
+        """Write buffered lines to both files (and to disk with fsync)."""
+
+        for f in (self.output, self.detailed_output):
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+        self.pending_records = 0
+        self.last_flush_time = time.monotonic()
+
+    def sync(self) -> dict[str, int]:
+        """Flush and sync both files; returns their sizes by file name."""
+
+        sizes = {}
+        for name, f in (
+            (OUTPUT_FILE, self.output),
+            (DETAILED_OUTPUT_FILE, self.detailed_output),
+        ):
+            f.flush()
+            os.fsync(f.fileno())
+            sizes[name] = os.fstat(f.fileno()).st_size
+
+        self.pending_records = 0
+        self.last_flush_time = time.monotonic()
+
+        return sizes
+
+    def close(self) -> None:
+        """Flush and sync everything written so far, then close both files."""
+
+        if self.closed:
+            return
+
+        for f in (self.output, self.detailed_output):
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
@@ -0,0 +1,525 @@
+import argparse
+import asyncio
+import json
+import signal
+import time
+from collections import deque
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from _constants import BLOCKCHAIN_FOLDER, OUTPUT_FOLDER, PRIME_TABLE_FILE
+from _utils import clean_directory
+from blockchain import BaseBlockchain
+from bloom_filter import DEFAULT_CAPACITY, BloomFilter
+from main import create_storage
+from metrics import LatencyHistogram
+from pipeline import DEFAULT_BATCH_SIZE, BatchValidationError, validate_batch
+from redis_storage import AsyncRedisTimeSeriesStorage
+from result_writer import ValidationResultWriter
+from storage import TransactionStorage
+from transactions import Transaction
+from validator import Failure, Result, Success, TransactionValidator
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# Transactions waiting for validation; requests beyond it are turned away
+DEFAULT_QUEUE_CAPACITY = 10_000
+
+MAX_BODY_BYTES = 16 << 20
+RETRY_AFTER_SECONDS = 1
+
+
+class Overloaded(Exception):
+    """The validation queue has no room for a request's transactions."""
+
+
+class MicroBatcher:
+    """Coalesces transactions submitted by concurrent requests into batches.
+
+    A single consumer validates one batch at a time, in submission order, so
+    every customer's transactions are validated in the order they arrived.
+    Transactions submitted while a batch is being validated form the next
+    one, so batches grow with the load without delaying a lone request;
+    ``max_delay`` additionally waits for more transactions before a batch
+    that is not full yet.
+    """
+
+    def __init__(
+        self,
+        validate: Callable[[list[Transaction]], Awaitable[list[Result]]],
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_delay: float = 0.0,
+        capacity: int = DEFAULT_QUEUE_CAPACITY,
+    ):
+        self.validate = validate
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.capacity = capacity
+
+        self.pending: deque[tuple[Transaction, asyncio.Future]] = deque()
+        self.ready = asyncio.Event()
+
+        self.batches = 0
+        self.transactions = 0
+        self.max_batch_size = 0
+        self.overloaded = 0
+
+    def submit(self, transactions: list[Transaction]) -> list[asyncio.Future]:
+        """Queue transactions as a whole, or raise Overloaded if they do not fit."""
+
+        if len(self.pending) + len(transactions) > self.capacity:
+            self.overloaded += 1
+            raise Overloaded()
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for transaction in transactions:
+            future = loop.create_future()
+            self.pending.append((transaction, future))
+            futures.append(future)
+
+        self.ready.set()
+        return futures
+
+    async def run(self) -> None:
+        """Validate batches until cancelled."""
+
+        while True:
+            await self.ready.wait()
+
+            if self.max_delay and len(self.pending) < self.batch_size:
+                await asyncio.sleep(self.max_delay)
+
+            size = min(len(self.pending), self.batch_size)
+            batch = [self.pending.popleft() for _ in range(size)]
+            if not self.pending:
+                self.ready.clear()
+
+            error: Optional[Exception] = None
+            try:
+                results = await self.validate([transaction for transaction, _ in batch])
+            except BatchValidationError as partial:
+                # Transactions validated before the failure keep their results
+                results, error = partial.results, partial
+            except Exception as failure:
+                results, error = [], failure
+
+            for (_, future), result in zip(batch, results):
+                # Done already if the request was cancelled (client went away)
+                if not future.done():
+                    future.set_result(result)
+
+            if error is not None:
+                # Fail the rest of the batch, keep serving the next ones
+                for _, future in batch[len(results) :]:
+                    if not future.done():
+                        future.set_exception(error.__cause__ or error)
+                continue
+
+            self.batches += 1
+            self.transactions += size
+            self.max_batch_size = max(self.max_batch_size, size)
+
+
+def result_dict(transaction: Transaction, result: Result) -> dict[str, Any]:
+    """Response body of a validated transaction, as in output_with_detail.jsonl."""
+
+    return {
+        "id": transaction.transaction_id,
+        "customer_id": transaction.customer_id,
+        "accepted": isinstance(result, Success),
+        "details": (
+            result.message if isinstance(result, Failure) else "Transaction valid"
+        ),
+    }
+
+
+class ValidationService:
+    """HTTP/1.1 endpoint validating fund loads through a MicroBatcher.
+
+    ``POST /transactions`` takes a transaction object, or an array of them,
+    and answers once they are validated, stored, written to the output files
+    and, if accepted, added to the blockchain. ``GET /stats`` reports queue,
+    batch and latency figures. Requests for more transactions than the queue
+    has room for get ``503 Service Unavailable`` with ``Retry-After``.
+    """
+
+    def __init__(
+        self,
+        storage: TransactionStorage,
+        validator: TransactionValidator,
+        result_writer: ValidationResultWriter,
+        blockchain: BaseBlockchain,
+        async_storage: Optional[AsyncRedisTimeSeriesStorage] = None,
+        atomic: bool = False,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_delay: float = 0.0,
+        capacity: int = DEFAULT_QUEUE_CAPACITY,
+    ):
+        self.storage = storage
+        self.validator = validator
+        self.result_writer = result_writer
+        self.blockchain = blockchain
+        self.async_storage = async_storage
+        self.atomic = atomic
+
+        self.batcher = MicroBatcher(self._validate, batch_size, max_delay, capacity)
+        self.requests = 0
+        self.active_requests = 0
+        self.connections: set[asyncio.StreamWriter] = set()
+        # From a request being read to its response being sent
+        self.latency = LatencyHistogram()
+        self.start_time = time.monotonic()
+        self.address: Optional[tuple] = None
+
+    async def _validate(self, transactions: list[Transaction]) -> list[Result]:
+        try:
+            results = await validate_batch(
+                transactions,
+                self.storage,
+                self.validator,
+                self.atomic,
+                self.async_storage,
+            )
+        except BatchValidationError as error:
+            # Those already stored are answered and recorded like any other
+            await asyncio.to_thread(self._record_results, transactions, error.results)
+            raise
+
+        # File writes and block sealing block, so they run in a worker thread
+        # too; the batcher is the only consumer, so one batch at a time
+        await asyncio.to_thread(self._record_results, transactions, results)
+
+        return results
+
+    def _record_results(
+        self, transactions: list[Transaction], results: list[Result]
+    ) -> None:
+        for transaction, result in zip(transactions, results):
+            self.result_writer.write(transaction, result)
+            if isinstance(result, Success):
+                self.blockchain.add_transaction(transaction)
+
+        # Results are visible in the output files once answered
+        self.result_writer.flush()
+
+    async def _transactions(self, body: bytes) -> tuple[HTTPStatus, Any]:
+        try:
+            payload = json.loads(body)
+            is_batch = isinstance(payload, list)
+            transactions = [
+                Transaction(item) for item in (payload if is_batch else [payload])
+            ]
+        except (ValueError, KeyError, TypeError) as error:
+            return HTTPStatus.BAD_REQUEST, {"error": f"Invalid transaction: {error}"}
+
+        try:
+            futures = self.batcher.submit(transactions)
+        except Overloaded:
+            return HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Validation queue full"}
+
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        response = [
+            result_dict(transaction, result)
+            for transaction, result in zip(transactions, results)
+            if not isinstance(result, BaseException)
+        ]
+
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            # The batch failed, e.g. storage went away; later ones may not.
+            # Transactions with results were stored: only the others may be
+            # sent again.
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {
+                "error": f"Validation failed: {errors[0]}",
+                "results": response,
+            }
+
+        return HTTPStatus.OK, response if is_batch else response[0]
+
+    def stats(self) -> dict[str, Any]:
+        batcher = self.batcher
+
+        return {
+            "uptime_seconds": round(time.monotonic() - self.start_time, 3),
+            "requests": self.requests,
+            "transactions": batcher.transactions,
+            "batches": batcher.batches,
+            "mean_batch_size": (
+                round(batcher.transactions / batcher.batches, 2)
+                if batcher.batches
+                else 0.0
+            ),
+            "max_batch_size": batcher.max_batch_size,
+            "queued_transactions": len(batcher.pending),
+            "overloaded_requests": batcher.overloaded,
+            "latency_us": {
+                f"p{percent:g}": round(self.latency.percentile(percent) / 1000, 1)
+                for percent in (50, 90, 99, 99.9)
+            },
+        }
+
+    async def _route(
+        self, method: str, path: str, body: bytes
+    ) -> tuple[HTTPStatus, Any]:
+        if path == "/transactions":
+            if method != "POST":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Use POST"}
+            return await self._transactions(body)
+
+        if path == "/stats":
+            if method != "GET":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Use GET"}
+            return HTTPStatus.OK, self.stats()
+
+        return HTTPStatus.NOT_FOUND, {"error": f"No route for {path}"}
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve HTTP/1.1 requests of one connection, kept alive between them."""
+
+        self.connections.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                start = time.perf_counter_ns()
+                self.active_requests += 1
+
+                headers = {}
+                while True:
+                    header_line = await reader.readline()
+                    if header_line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header_line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    keep_alive = await self._handle_request(
+                        reader, writer, request_line, headers
+                    )
+                finally:
+                    self.active_requests -= 1
+
+                self.requests += 1
+                self.latency.record(time.perf_counter_ns() - start)
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    async def _handle_request(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        request_line: bytes,
+        headers: dict[str, str],
+    ) -> bool:
+        """Read the body of a request and answer it; returns keep-alive."""
+
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            await self._respond(
+                writer, HTTPStatus.BAD_REQUEST, {"error": "Bad request"}
+            )
+            return False
+
+        if "transfer-encoding" in headers:
+            # The body cannot be skipped without decoding it, so the
+            # connection is closed rather than reading it as the next request
+            await self._respond(
+                writer,
+                HTTPStatus.NOT_IMPLEMENTED,
+                {"error": "Transfer-Encoding is not supported, use Content-Length"},
+            )
+            return False
+
+        if length > MAX_BODY_BYTES:
+            await self._respond(
+                writer,
+                HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                {"error": f"Body over {MAX_BODY_BYTES} bytes"},
+            )
+            return False
+
+        body = await reader.readexactly(length)
+        status, payload = await self._route(method, target.split("?")[0], body)
+
+        keep_alive = (
+            version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        )
+        await self._respond(writer, status, payload, keep_alive)
+
+        return keep_alive
+
+    async def _respond(
+        self,
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        payload: Any,
+        keep_alive: bool = False,
+    ) -> None:
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        headers = [
+            f"HTTP/1.1 {status.value} {status.phrase}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            headers.append(f"Retry-After: {RETRY_AFTER_SECONDS}")
+
+        writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+        # Waits while the client does not read its responses (backpressure)
+        await writer.drain()
+
+    async def serve(self, host: str, port: int, stop: asyncio.Event) -> None:
+        """Serve until ``stop`` is set, then finish the queued transactions."""
+
+        batcher_task = asyncio.create_task(self.batcher.run())
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        self.address = server.sockets[0].getsockname()
+        print(f"Validating transactions on http://{self.address[0]}:{self.address[1]}")
+
+        try:
+            await stop.wait()
+        finally:
+            server.close()
+
+            # Requests already read still get their results
+            while self.active_requests and not batcher_task.done():
+                await asyncio.sleep(0.01)
+            batcher_task.cancel()
+
+            # Idle keep-alive connections
+            for writer in list(self.connections):
+                writer.close()
+            await server.wait_closed()
+
+
+async def run_service(args: argparse.Namespace) -> ValidationService:
+    output_folder = Path(OUTPUT_FOLDER)
+    # Like main, every run starts from scratch
+    clean_directory(output_folder)
+
+    storage = create_storage(args.storage)
+    storage.clear_all_transactions()
+    validator = TransactionValidator(
+        storage,
+        prime_table_path=PRIME_TABLE_FILE,
+        duplicate_filter=(
+            BloomFilter(args.duplicate_capacity) if args.reject_duplicates else None
+        ),
+    )
+    async_storage = AsyncRedisTimeSeriesStorage() if args.atomic else None
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+
+    try:
+        with BaseBlockchain(
+            storage_path=BLOCKCHAIN_FOLDER, batch_size=args.block_transactions
+        ) as blockchain, ValidationResultWriter(output_folder) as result_writer:
+            service = ValidationService(
+                storage,
+                validator,
+                result_writer,
+                blockchain,
+                async_storage=async_storage,
+                atomic=args.atomic,
+                batch_size=args.batch_size,
+                max_delay=args.batch_delay_ms / 1000,
+                capacity=args.queue_capacity,
+            )
+            await service.serve(args.host, args.port, stop)
+    finally:
+        if async_storage is not None:
+            await async_storage.close()
+
+    return service
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Serve transaction validation over HTTP until interrupted."""
+
+    parser = argparse.ArgumentParser(description="Validate fund loads over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--storage",
+        choices=["redis", "memory"],
+        default="redis",
+        help="transaction storage backend (memory needs no Redis server)",
+    )
+    parser.add_argument(
+        "--atomic",
+        action="store_true",
+        help=(
+            "validate each micro-batch with one pipelined round trip of atomic "
+            "Redis Lua calls"
+        ),
+    )
+    parser.add_argument(
+        "--reject-duplicates",
+        action="store_true",
+        help="reject transactions whose ID was already loaded, without storing them",
+    )
+    parser.add_argument(
+        "--duplicate-capacity", type=int, default=DEFAULT_CAPACITY, metavar="N"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        metavar="N",
+        help="most transactions validated together (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--batch-delay-ms",
+        type=float,
+        default=0.0,
+        metavar="T",
+        help="wait up to T ms for a batch to fill (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--queue-capacity",
+        type=int,
+        default=DEFAULT_QUEUE_CAPACITY,
+        metavar="N",
+        help=(
+            "transactions waiting for validation before requests are answered "
+            "with 503 (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        "--block-transactions",
+        type=int,
+        default=1,
+        metavar="N",
+        help="seal a block once it holds N transactions (default: 1)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.atomic and args.storage != "redis":
+        parser.error("--atomic requires --storage redis")
+
+    service = asyncio.run(run_service(args))
+
+    print(json.dumps(service.stats(), indent=2))
+
+
+if __name__ == "__main__":
+
+    main()
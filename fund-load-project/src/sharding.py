@@ -0,0 +1,302 @@
+import json
+import multiprocessing
+import queue
+import threading
+import zlib
+from collections import deque
+from itertools import islice
+from multiprocessing.connection import Connection
+from typing import Iterator, Optional
+
+from blockchain import BaseBlockchain
+from bloom_filter import BloomFilter
+from memory_storage import InMemoryTimeSeriesStorage
+from redis_storage import RedisTimeSeriesStorage
+from result_writer import ValidationResultWriter
+from storage import TransactionStorage
+from transactions import Transaction
+from validator import Failure, Result, Success, TransactionValidator
+
+# Lines dispatched to the workers per round; two rounds are kept in flight so
+# the workers validate one while the results of the other are written
+DEFAULT_CHUNK_LINES = 50_000
+
+# Stops a receiver thread: its worker exited or the connection was closed
+_CLOSED = object()
+
+
+def customer_shards(input_path: str, workers: int) -> dict[str, int]:
+    """Assign every customer of an input file to a worker.
+
+    Customers sharing a transaction ID share its ``tx:{id}`` storage key, so
+    their validation depends on each other's writes. They are grouped with a
+    union-find and each group is hashed to one worker, which then sees every
+    write to its keys in input order, exactly like a single process.
+    """
+
+    parent: dict[str, str] = {}
+
+    def find(customer_id: str) -> str:
+        root = customer_id
+        while parent[root] != root:
+            root = parent[root]
+        # Path compression
+        while parent[customer_id] != root:
+            parent[customer_id], customer_id = root, parent[customer_id]
+        return root
+
+    first_customer_by_id: dict[str, str] = {}
+
+    with open(input_path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            customer_id, transaction_id = data["customer_id"], data["id"]
+
+            parent.setdefault(customer_id, customer_id)
+            other = first_customer_by_id.setdefault(transaction_id, customer_id)
+            if other != customer_id:
+                parent[find(customer_id)] = find(other)
+
+    # crc32 rather than hash() so assignments are stable across runs
+    return {
+        customer_id: zlib.crc32(find(customer_id).encode()) % workers
+        for customer_id in parent
+    }
+
+
+def create_worker_storage(backend: str) -> TransactionStorage:
+    if backend == "memory":
+        return InMemoryTimeSeriesStorage()
+
+    return RedisTimeSeriesStorage()
+
+
+def _shard_worker(
+    connection: Connection,
+    storage_backend: str,
+    atomic: bool,
+    prime_table_path: Optional[str],
+    duplicate_capacity: Optional[int],
+) -> None:
+    """Validate batches of (line number, line) in order with this shard's state.
+
+    Sends back (line number, transaction, failure message or None) per line.
+    """
+
+    storage = create_worker_storage(storage_backend)
+    # Customers sharing IDs share a shard, so a per-worker filter sees every repeat
+    validator = TransactionValidator(
+        storage,
+        prime_table_path=prime_table_path,
+        duplicate_filter=(
+            BloomFilter(duplicate_capacity) if duplicate_capacity is not None else None
+        ),
+    )
+
+    while (batch := connection.recv()) is not None:
+        try:
+            results = []
+            for line_number, line in batch:
+                transaction = Transaction(json.loads(line))
+
+                duplicate = validator.check_duplicate(transaction)
+                if duplicate is not None:
+                    result = duplicate
+                elif atomic:
+                    result = validator.validate_and_store_transaction(transaction)
+                else:
+                    storage.store_customer_transaction(transaction)
+                    result = validator.validate_transaction(transaction)
+
+                results.append(
+                    (
+                        line_number,
+                        transaction,
+                        result.message if isinstance(result, Failure) else None,
+                    )
+                )
+            connection.send(results)
+        except Exception as error:
+            connection.send(error)
+
+    connection.close()
+
+
+def _receive_results(connection: Connection, results: queue.Queue) -> None:
+    """Read a worker's results as soon as they are sent.
+
+    A round's results can exceed the pipe buffer. Were they only read when
+    collected, a worker would block sending them while the parent blocks
+    sending it the next round, and neither would ever proceed.
+    """
+
+    while True:
+        try:
+            results.put(connection.recv())
+        except (EOFError, OSError):
+            results.put(_CLOSED)
+            return
+
+
+class ShardedValidator:
+    """Pool of worker processes, each owning the storage of one customer shard."""
+
+    def __init__(
+        self,
+        shards: dict[str, int],
+        workers: int,
+        storage_backend: str = "memory",
+        atomic: bool = False,
+        prime_table_path: Optional[str] = None,
+        duplicate_capacity: Optional[int] = None,
+    ):
+        self.shards = shards
+        self.connections: list[Connection] = []
+        self.processes: list[multiprocessing.Process] = []
+        self.results: list[queue.Queue] = []
+        self.receivers: list[threading.Thread] = []
+
+        for _ in range(workers):
+            parent_connection, child_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_shard_worker,
+                args=(
+                    child_connection,
+                    storage_backend,
+                    atomic,
+                    prime_table_path,
+                    duplicate_capacity,
+                ),
+                daemon=True,
+            )
+            process.start()
+            child_connection.close()
+
+            results: queue.Queue = queue.Queue()
+            receiver = threading.Thread(
+                target=_receive_results,
+                args=(parent_connection, results),
+                daemon=True,
+            )
+            receiver.start()
+
+            self.connections.append(parent_connection)
+            self.processes.append(process)
+            self.results.append(results)
+            self.receivers.append(receiver)
+
+    def __enter__(self) -> "ShardedValidator":
+        return self
+
+    def __exit__(self, exc_type: Optional[type], *exc_info: object) -> None:
+        # After an error, workers may still be validating rounds nobody collects
+        self.close(terminate=exc_type is not None)
+
+    def submit(self, lines: list[tuple[int, str]]) -> None:
+        """Send numbered lines to the workers owning their customers."""
+
+        batches: list[list[tuple[int, str]]] = [[] for _ in self.connections]
+        for line_number, line in lines:
+            customer_id = json.loads(line)["customer_id"]
+            batches[self.shards[customer_id]].append((line_number, line))
+
+        # Every worker gets a batch, possibly empty, so results pair up by round
+        for connection, batch in zip(self.connections, batches):
+            connection.send(batch)
+
+    def collect(self) -> list[tuple[Transaction, Result]]:
+        """Results of the oldest submitted round, merged back into line order."""
+
+        merged = []
+        for results_queue in self.results:
+            results = results_queue.get()
+            if results is _CLOSED:
+                raise EOFError("Shard worker exited before sending its results")
+            if isinstance(results, Exception):
+                raise results
+            merged.extend(results)
+
+        merged.sort(key=lambda result: result[0])
+
+        return [
+            (transaction, Failure(message) if message is not None else Success())
+            for _, transaction, message in merged
+        ]
+
+    def close(self, terminate: bool = False) -> None:
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+
+        for process in self.processes:
+            if terminate:
+                process.terminate()
+            process.join()
+
+        # Workers closed their ends on exit, which ends the receivers
+        for receiver in self.receivers:
+            receiver.join()
+        for connection in self.connections:
+            connection.close()
+
+
+def _numbered_lines(input_path: str) -> Iterator[tuple[int, str]]:
+    with open(input_path, "r") as f:
+        for line_number, line in enumerate(f):
+            if line.strip():
+                yield line_number, line
+
+
+def run_sharded(
+    input_path: str,
+    workers: int,
+    result_writer: ValidationResultWriter,
+    blockchain: BaseBlockchain,
+    storage_backend: str = "memory",
+    atomic: bool = False,
+    prime_table_path: Optional[str] = None,
+    chunk_lines: int = DEFAULT_CHUNK_LINES,
+    duplicate_capacity: Optional[int] = None,
+) -> int:
+    """Validate an input file across customer-sharded worker processes.
+
+    Results are written and accepted transactions appended to the blockchain
+    in input order. With ``duplicate_capacity``, repeated transaction IDs are
+    rejected using a Bloom filter sized for that many IDs per worker. Returns
+    the number of processed transactions.
+    """
+
+    shards = customer_shards(input_path, workers)
+    lines = _numbered_lines(input_path)
+    processed = 0
+
+    with ShardedValidator(
+        shards, workers, storage_backend, atomic, prime_table_path, duplicate_capacity
+    ) as validator:
+        in_flight = 0
+        pending = deque()
+
+        while True:
+            chunk = list(islice(lines, chunk_lines))
+            if chunk:
+                validator.submit(chunk)
+                pending.append(len(chunk))
+                in_flight += 1
+
+            if not chunk or in_flight == 2:
+                if not pending:
+                    break
+
+                for transaction, result in validator.collect():
+                    result_writer.write(transaction, result)
+                    if isinstance(result, Success):
+                        blockchain.add_transaction(transaction)
+
+                processed += pending.popleft()
+                in_flight -= 1
+
+    return processed
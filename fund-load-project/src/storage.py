@@ -0,0 +1,43 @@
+from typing import Any, Protocol, runtime_checkable
+from transactions import Transaction
+
+
+class TransactionStorage(Protocol):
+    """Time series storage interface used by the validator and main loop"""
+
+    def store_customer_transaction(self, transaction: Transaction) -> None:
+        """Store transaction indexed by customer and timestamp"""
+        ...
+
+    def store_customer_transactions(self, transactions: list[Transaction]) -> None:
+        """Store transactions in order, as one store_customer_transaction call each"""
+        ...
+
+    def get_customer_transactions(
+        self, customer_id: str, min_transaction_time: int, max_transaction_time: int
+    ) -> list[Any]:
+        """Get customer's transactions between two timestamps, latest first."""
+        ...
+
+    def has_transaction(self, transaction_id: str) -> bool:
+        """Whether a transaction with this ID is stored"""
+        ...
+
+    def clear_all_transactions(self) -> None:
+        """Delete all stored transactions"""
+        ...
+
+
+@runtime_checkable
+class AtomicTransactionStorage(TransactionStorage, Protocol):
+    """Storage that can validate and store a transaction in one atomic call"""
+
+    def validate_and_store_transaction(
+        self,
+        transaction: Transaction,
+        is_prime: bool,
+        min_daily_transaction_time: int,
+        min_weekly_transaction_time: int,
+    ) -> str | None:
+        """Store transaction and apply validation rules; return failure message or None."""
+        ...
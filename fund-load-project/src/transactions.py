@@ -1,15 +1,31 @@
-from datetime import date, datetime, time
+from datetime import date, datetime, time, timedelta
 import re
+import sys
 from _constants import (
     TRANSACTION_ID_FORMAT,
     CUSTOMER_ID_FORMAT,
     AMOUNT_PATTERN,
     DATETIME_FORMAT,
+    DATETIME_PATTERN,
 )
 
+# Compiled once at import instead of on every field validation
+TRANSACTION_ID_REGEX = re.compile(TRANSACTION_ID_FORMAT)
+CUSTOMER_ID_REGEX = re.compile(CUSTOMER_ID_FORMAT)
+AMOUNT_REGEX = re.compile(AMOUNT_PATTERN)
+DATETIME_REGEX = re.compile(DATETIME_PATTERN)
+
+# Timestamps are UTC ("Z" suffix), stored as whole seconds since the epoch
+EPOCH = datetime(1970, 1, 1)
+ONE_SECOND = timedelta(seconds=1)
+
 
 class Transaction:
 
+    # Compact representation: derived views (datetime, date, time, float amount,
+    # dictionary) are computed on access instead of being stored per instance
+    __slots__ = ("transaction_id", "customer_id", "timestamp", "load_amount_cents")
+
     def __init__(self, transaction_data: dict[str, str]):
         """
         Initialize Transaction from dictionary data.
@@ -26,28 +42,45 @@ class Transaction:
         # Process transaction ID
         self.transaction_id = self._validate_transaction_id(str(transaction_data["id"]))
 
-        # Process customer ID
-        self.customer_id = self._validate_customer_id(
-            str(transaction_data["customer_id"])
+        # Process customer ID, interned as it repeats across transactions
+        self.customer_id = sys.intern(
+            self._validate_customer_id(str(transaction_data["customer_id"]))
         )
 
         # Process timestamp
-        (
-            transaction_datetime,
-            transaction_date,
-            transaction_time,
-            transaction_timetamp,
-        ) = self._process_timestamp_field(transaction_data["time"])
-
-        self.transaction_datetime = transaction_datetime
-        self.transaction_date = transaction_date
-        self.transaction_time = transaction_time
-        self.transaction_timetamp = transaction_timetamp
+        self.timestamp = self._process_timestamp_field(transaction_data["time"])
 
         # Process amount
-        self.load_amount = self._process_amount_field(transaction_data["load_amount"])
+        self.load_amount_cents = self._process_amount_field(
+            transaction_data["load_amount"]
+        )
+
+    @property
+    def transaction_datetime(self) -> datetime:
+        return EPOCH + self.timestamp * ONE_SECOND
+
+    @property
+    def transaction_date(self) -> date:
+        return self.transaction_datetime.date()
+
+    @property
+    def transaction_time(self) -> time:
+        return self.transaction_datetime.time()
+
+    @property
+    def transaction_timetamp(self) -> int:
+        """Unix timestamp in seconds."""
+        return self.timestamp
+
+    @property
+    def load_amount(self) -> float:
+        """Load amount in dollars."""
+        return self.load_amount_cents / 100
 
-        self.transaction_data_dict = self.to_dict()
+    @property
+    def transaction_data_dict(self) -> dict[str, str | float]:
+        """Dictionary view of the transaction, built on access."""
+        return self.to_dict()
 
     @classmethod
     def _validate_required_fields(cls, data: dict[str, str]) -> None:
@@ -63,7 +96,7 @@ class Transaction:
     def _validate_transaction_id(cls, transaction_id: str) -> str:
         """Clean and validate transaction ID."""
 
-        if not re.match(TRANSACTION_ID_FORMAT, transaction_id):
+        if not TRANSACTION_ID_REGEX.match(transaction_id):
             raise ValueError(f"Invalid transaction ID format: {transaction_id}")
 
         return transaction_id
@@ -72,47 +105,57 @@ class Transaction:
     def _validate_customer_id(cls, customer_id: str) -> str:
         """Clean and validate customer ID."""
 
-        if not re.match(CUSTOMER_ID_FORMAT, customer_id):
+        if not CUSTOMER_ID_REGEX.match(customer_id):
             raise ValueError(f"Invalid customer ID format: {customer_id}")
 
         return customer_id
 
     @classmethod
-    def _process_timestamp_field(
-        cls, transaction_datetime: str
-    ) -> tuple[datetime, date, time, float]:
-        """Clean and validate timestamp, returns (date, time, full_timestamp)."""
+    def _process_timestamp_field(cls, transaction_datetime: str) -> int:
+        """Clean and validate timestamp, returns Unix timestamp in seconds."""
 
         try:
-            datetime.strptime(transaction_datetime, DATETIME_FORMAT)
+            clean_transaction_datetime = cls._parse_datetime(transaction_datetime)
         except ValueError:
             raise ValueError(f"Invalid timestamp format: {transaction_datetime}")
 
-        clean_transaction_datetime = datetime.strptime(
-            transaction_datetime, DATETIME_FORMAT
-        )
-        transaction_date = clean_transaction_datetime.date()
-        transaction_time = clean_transaction_datetime.time()
-        transaction_timetamp = clean_transaction_datetime.timestamp()
-
-        return (
-            clean_transaction_datetime,
-            transaction_date,
-            transaction_time,
-            transaction_timetamp,
-        )
+        return (clean_transaction_datetime - EPOCH) // ONE_SECOND
 
     @classmethod
-    def _process_amount_field(cls, transaction_amount: str) -> float:
-        """Clean and validate amount."""
+    def _parse_datetime(cls, transaction_datetime: str) -> datetime:
+        """Parse DATETIME_FORMAT, building the datetime directly for padded input."""
+
+        match = DATETIME_REGEX.fullmatch(transaction_datetime)
+
+        # strptime also accepts unpadded fields, keep it as the general fallback
+        if match is None:
+            return datetime.strptime(transaction_datetime, DATETIME_FORMAT)
+
+        # Raises ValueError for out of range fields, as strptime does
+        return datetime(*map(int, match.groups()))
 
-        if not re.match(AMOUNT_PATTERN, transaction_amount):
+    @classmethod
+    def _process_amount_field(cls, transaction_amount: str) -> int:
+        """Clean and validate amount, returns integer cents."""
+
+        if not AMOUNT_REGEX.match(transaction_amount):
             raise ValueError(f"Invalid amount format: {transaction_amount}")
 
-        clean_transaction_amount = transaction_amount.replace("$", "")
-        clean_transaction_amount = float(clean_transaction_amount.replace("USD", ""))
+        # The pattern guarantees dollars, ".", and two cent digits after the "$"
+        dollars, _, cents = transaction_amount[
+            transaction_amount.index("$") + 1 :
+        ].partition(".")
 
-        return clean_transaction_amount
+        return int(dollars) * 100 + int(cents)
+
+    def to_canonical_bytes(self) -> bytes:
+        """Compact, unambiguous encoding used for hashing (IDs are digits only)."""
+        return b"%s,%s,%d,%d" % (
+            self.transaction_id.encode(),
+            self.customer_id.encode(),
+            self.timestamp,
+            self.load_amount_cents,
+        )
 
     def to_dict(self) -> dict[str, str | float]:
         """Convert transaction to dictionary format."""
@@ -149,8 +192,9 @@ class Transaction:
         transformed_data: dict[str, str] = {
             "id": str(data["id"]),
             "customer_id": str(data["customer_id"]),
-            "time": str(data["transaction_datetime"]),
-            "load_amount": "$" + str(data["load_amount"]),
+            # to_dict writes "YYYY-MM-DD HH:MM:SS" and amounts as floats
+            "time": str(data["transaction_datetime"]).replace(" ", "T") + "Z",
+            "load_amount": f"${float(data['load_amount']):.2f}",
         }
 
         # Now create the instance using __init__
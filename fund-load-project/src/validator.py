@@ -1,30 +1,22 @@
-from datetime import date, datetime, timezone
+from datetime import date, datetime
 from functools import cached_property
 from typing import Any
 
+from aggregates import CustomerAggregate, RollingAggregates
+from bloom_filter import BloomFilter
+from prime_table import (
+    PrimeSieve,
+    generate_prime_sieve,
+    is_prime_in_sieve,
+    is_prime_miller_rabin,
+    load_prime_sieve,
+)
 from transactions import Transaction
 
-from redis_storage import RedisTimeSeriesStorage
+from storage import AtomicTransactionStorage, TransactionStorage
 
-
-def generate_prime_set(maximum: int) -> set[int]:
-    from math import sqrt
-
-    primes = [2]
-
-    for num in range(3, maximum, 2):
-        _is_prime = True
-        square_root = sqrt(num)
-        for prime in primes:
-            if num % prime == 0:
-                _is_prime = False
-                break
-            if prime > square_root:
-                break
-        if _is_prime:
-            primes.append(num)
-
-    return {x for x in primes}
+# Upper bound of the window reads that also return later stored transactions
+MAX_TRANSACTION_TIME = 2**53
 
 
 class Success:
@@ -41,33 +33,61 @@ Result = Success | Failure
 
 
 class TransactionValidator:
-    def __init__(self, storage: RedisTimeSeriesStorage, prime_limit: int = 1_000_000):
+    def __init__(
+        self,
+        storage: TransactionStorage,
+        prime_limit: int = 1_000_000,
+        rolling_aggregates: bool = True,
+        prime_table_path: str | None = None,
+        duplicate_filter: BloomFilter | None = None,
+    ):
         self.prime_limit = prime_limit
+        # On-disk sieve cache shared by worker processes; None sieves in memory
+        self.prime_table_path = prime_table_path
         self.storage = storage
+        # Incremental per-customer window state; None re-fetches windows from storage
+        self.rolling_aggregates = RollingAggregates() if rolling_aggregates else None
+        # IDs seen so far, to reject repeated IDs; None accepts them again
+        self.duplicate_filter = duplicate_filter
 
     @cached_property
-    def prime_set(self):
-        return generate_prime_set(self.prime_limit)
+    def prime_sieve(self) -> PrimeSieve:
+        if self.prime_table_path is not None:
+            return load_prime_sieve(self.prime_table_path, self.prime_limit)
+
+        return generate_prime_sieve(self.prime_limit)
 
     def _is_prime(self, n: str) -> bool:
-        return int(n) in self.prime_set
+        number = int(n)
+
+        if number < self.prime_limit:
+            return is_prime_in_sieve(self.prime_sieve, number)
+
+        # IDs beyond the precomputed table
+        return is_prime_miller_rabin(number)
 
     def _is_monday(self, date: date) -> bool:
         # Check if the given date is Monday (0 = Monday, 6 = Sunday)
         return date.weekday() == 0
 
+    def _start_of_day(self, transaction: Transaction) -> int:
+        """Return the Unix timestamp of the transaction's UTC midnight."""
+
+        # Transaction timestamps are UTC seconds, so midnight is a whole day multiple
+        return transaction.transaction_timetamp - transaction.transaction_timetamp % (
+            24 * 3600
+        )
+
+    def _start_of_week(self, transaction: Transaction) -> int:
+        """Return the Unix timestamp 7 days before the transaction."""
+        return int(transaction.transaction_timetamp - 7 * 24 * 3600)
+
     def _get_daily_transactions(
         self,
         transaction: Transaction,
     ) -> list[Any]:
 
-        # Convert to datetime at 00:00:00 (midnight)
-        start_of_day = datetime.combine(
-            transaction.transaction_date, datetime.min.time(), tzinfo=timezone.utc
-        )
-
-        # Get Unix timestamp in seconds
-        min_transaction_time = int(start_of_day.timestamp())
+        min_transaction_time = self._start_of_day(transaction)
         max_transaction_time = int(transaction.transaction_timetamp)
 
         current_days_transactions = self.storage.get_customer_transactions(
@@ -83,7 +103,7 @@ class TransactionValidator:
         transaction: Transaction,
     ) -> list[Any]:
 
-        min_transaction_time = int(transaction.transaction_timetamp - 7 * 24 * 3600)
+        min_transaction_time = self._start_of_week(transaction)
         max_transaction_time = int(transaction.transaction_timetamp)
 
         current_days_transactions = self.storage.get_customer_transactions(
@@ -101,11 +121,12 @@ class TransactionValidator:
     def _total_load_amount(self, transactions: list[dict[str, Any]]) -> float:
         """Return the sum of 'load_amount' for all transactions.
         If the transaction date is a Monday, double the amount.
+        The sum is taken in integer cents so limits are compared exactly.
         """
-        total = 0.0
+        total = 0
         for tx in transactions:
 
-            amount = tx.get("load_amount", 0)
+            amount = round(tx.get("load_amount", 0) * 100)
 
             tx_date_str = tx.get("transaction_date")
 
@@ -118,22 +139,115 @@ class TransactionValidator:
 
             total += amount
 
-        return total
+        return total / 100
+
+    def _record_aggregate(self, transaction: Transaction) -> CustomerAggregate | None:
+        """Add a just-stored transaction to its customer's rolling aggregate.
+
+        Falls back to reseeding the aggregate from the stored weekly window when
+        it cannot be updated incrementally. Returns None for out-of-order
+        transactions, for customers with later transactions already stored and
+        for customers whose window lists a transaction ID reused by another
+        customer, which are validated against storage instead.
+        """
+        if self.rolling_aggregates is None:
+            return None
+
+        if self.rolling_aggregates.is_out_of_order(transaction):
+            # Later transactions are already stored; rebuild on the next in-order one
+            self.rolling_aggregates.discard_overwritten(transaction)
+            self.rolling_aggregates.discard_customer(transaction.customer_id)
+            return None
+
+        start_of_day = self._start_of_day(transaction)
+
+        aggregate = self.rolling_aggregates.record_transaction(
+            transaction, start_of_day
+        )
+        if aggregate is None:
+            # Read past the transaction, to know whether later ones are stored
+            aggregate = self.rolling_aggregates.seed_customer(
+                transaction,
+                start_of_day,
+                self.storage.get_customer_transactions(
+                    customer_id=transaction.customer_id,
+                    min_transaction_time=self._start_of_week(transaction),
+                    max_transaction_time=MAX_TRANSACTION_TIME,
+                ),
+            )
+
+        return aggregate
+
+    def _daily_count_and_total(
+        self, transaction: Transaction, aggregate: CustomerAggregate | None
+    ) -> tuple[int, float]:
+        """Return the customer's daily transaction count and Monday-weighted total."""
+
+        if aggregate is not None:
+            return aggregate.daily_count, aggregate.daily_total / 100
+
+        daily_transactions = self._get_daily_transactions(transaction)
+
+        return (
+            self._transaction_count(daily_transactions),
+            self._total_load_amount(daily_transactions),
+        )
+
+    def _weekly_total(
+        self, transaction: Transaction, aggregate: CustomerAggregate | None
+    ) -> float:
+        """Return the customer's trailing 7 day Monday-weighted total."""
+
+        if aggregate is not None:
+            return aggregate.weekly_total / 100
+
+        weekly_transactions = self._get_weekly_transactions(transaction)
+
+        return self._total_load_amount(weekly_transactions)
+
+    def check_duplicate(
+        self, transaction: Transaction, unstored_ids: set[str] | None = None
+    ) -> Failure | None:
+        """Failure if the transaction ID was seen before, otherwise record it.
+
+        Must run before the transaction is stored. The Bloom filter answers
+        most new IDs without touching storage; only its hits are checked
+        exactly, against storage and ``unstored_ids`` (IDs recorded but not
+        stored yet, e.g. earlier in a batch sent to storage as a whole).
+        """
+
+        if self.duplicate_filter is None:
+            return None
+
+        transaction_id = transaction.transaction_id
+
+        if self.duplicate_filter.add(transaction_id) and (
+            (unstored_ids is not None and transaction_id in unstored_ids)
+            or self.storage.has_transaction(transaction_id)
+        ):
+            return Failure("Duplicate transaction ID")
+
+        if unstored_ids is not None:
+            unstored_ids.add(transaction_id)
+
+        return None
 
     def validate_transaction(self, transaction: Transaction) -> Result:
         """Validate transaction against business rules."""
 
+        aggregate = self._record_aggregate(transaction)
+
         # validate is prime id
         if self._is_prime(transaction.transaction_id):
 
             # If custumer ID is prime, apply special rules
-            daily_transactions = self._get_daily_transactions(transaction)
+            daily_count, daily_total = self._daily_count_and_total(
+                transaction, aggregate
+            )
 
-            daily_count = self._transaction_count(daily_transactions)
             if daily_count > 1:
                 return Failure("Prime ID: more than one daily transaction")
 
-            daily_total = self._total_load_amount(daily_transactions)
             if daily_total > 9_999:
                 return Failure("Prime ID: daily total exceeds 9,999")
 
@@ -141,19 +255,55 @@ class TransactionValidator:
 
         else:
             # Normal customer ID, apply standard rules
-            daily_transactions = self._get_daily_transactions(transaction)
+            daily_count, daily_total = self._daily_count_and_total(
+                transaction, aggregate
+            )
 
-            daily_count = self._transaction_count(daily_transactions)
             if daily_count > 3:
                 return Failure("Normal ID: more than three daily transactions")
 
-            daily_total = self._total_load_amount(daily_transactions)
             if daily_total > 5_000:
                 return Failure("Normal ID: daily total exceeds 5,000")
 
-            weekly_transactions = self._get_weekly_transactions(transaction)
-            weekly_total = self._total_load_amount(weekly_transactions)
+            weekly_total = self._weekly_total(transaction, aggregate)
             if weekly_total > 20_000:
                 return Failure("Normal ID: weekly total exceeds 20,000")
 
             return Success()
+
+    def validate_and_store_transaction(self, transaction: Transaction) -> Result:
+        """Store and validate transaction in a single atomic storage call.
+
+        The window queries, Monday-weighted sums and limit checks run inside the
+        storage (a Redis Lua script), which makes it safe for several workers to
+        process the same customer concurrently.
+        """
+
+        if not isinstance(self.storage, AtomicTransactionStorage):
+            raise TypeError(
+                f"{type(self.storage).__name__} does not support atomic validation"
+            )
+
+        failure_message = self.storage.validate_and_store_transaction(
+            transaction, **self.atomic_validation_args(transaction)
+        )
+
+        return self.result_from_failure_message(failure_message)
+
+    def atomic_validation_args(self, transaction: Transaction) -> dict[str, Any]:
+        """Keyword arguments of an atomic storage validate-and-store call."""
+
+        return {
+            "is_prime": self._is_prime(transaction.transaction_id),
+            "min_daily_transaction_time": self._start_of_day(transaction),
+            "min_weekly_transaction_time": self._start_of_week(transaction),
+        }
+
+    @staticmethod
+    def result_from_failure_message(failure_message: str | None) -> Result:
+        """Result of an atomic storage call, which returns None on success."""
+
+        if failure_message is not None:
+            return Failure(failure_message)
+
+        return Success()
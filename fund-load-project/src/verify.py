@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+from _constants import BLOCKCHAIN_FOLDER
+from blockchain import Block
+from chain_storage import list_segment_paths
+
+# Ranges per worker, so uneven blocks still spread over every process
+RANGES_PER_WORKER = 4
+
+
+class RangeResult:
+    """Summary of one verified byte range of a segment file."""
+
+    def __init__(self):
+        self.block_count = 0
+        self.first_index: Optional[int] = None
+        self.first_previous_hash: Optional[str] = None
+        self.last_index: Optional[int] = None
+        self.last_hash: Optional[str] = None
+        # First corrupt block in the range and why
+        self.error_index: Optional[int] = None
+        self.error: Optional[str] = None
+
+
+class VerificationReport:
+    def __init__(
+        self,
+        block_count: int,
+        seconds: float,
+        corrupt_index: Optional[int] = None,
+        error: Optional[str] = None,
+    ):
+        self.block_count = block_count
+        self.seconds = seconds
+        self.corrupt_index = corrupt_index
+        self.error = error
+
+    @property
+    def is_valid(self) -> bool:
+        return self.corrupt_index is None
+
+    @property
+    def blocks_per_second(self) -> float:
+        return self.block_count / self.seconds if self.seconds else 0.0
+
+
+def split_ranges(paths: list[Path], parts: int) -> list[tuple[str, int, int]]:
+    """Split segment files into about ``parts`` byte ranges, in chain order."""
+
+    sizes = [path.stat().st_size for path in paths]
+    range_size = max(-(-sum(sizes) // max(parts, 1)), 1)
+
+    ranges = []
+    for path, size in zip(paths, sizes):
+        for start in range(0, size, range_size):
+            ranges.append((str(path), start, min(start + range_size, size)))
+
+    return ranges
+
+
+def _block_error(block_data: dict[str, Any]) -> Optional[str]:
+    """Recompute the Merkle root and header hash of a stored block.
+
+    They are compared with the stored values, not the ones ``Block.from_dict``
+    fills in when they are missing, so a block without them is corrupt.
+    """
+
+    stored_merkle_root = block_data.get("merkle_root")
+    stored_hash = block_data.get("hash")
+    if not isinstance(stored_merkle_root, str):
+        return "missing Merkle root"
+    if not isinstance(stored_hash, str):
+        return "missing block hash"
+
+    block = Block.from_dict(block_data)
+
+    if block.compute_merkle_root() != stored_merkle_root:
+        return "Merkle root mismatch"
+
+    if block.compute_hash() != stored_hash:
+        return "block hash mismatch"
+
+    return None
+
+
+def verify_range(path: str, start: int, end: int) -> RangeResult:
+    """Verify the blocks whose lines start within [start, end) of a segment."""
+
+    result = RangeResult()
+
+    with open(path, "rb") as f:
+        # A line crossing the range start belongs to the previous range
+        if start > 0:
+            f.seek(start - 1)
+            if f.read(1) != b"\n":
+                f.readline()
+
+        while f.tell() < end:
+            line = f.readline()
+            if not line:
+                break
+
+            expected_index = (
+                result.last_index + 1 if result.last_index is not None else None
+            )
+
+            try:
+                block_data = json.loads(line)
+                index = block_data["index"]
+            except (json.JSONDecodeError, KeyError):
+                result.error_index = expected_index
+                result.error = f"unreadable block at byte {f.tell() - len(line)}"
+                return result
+
+            if result.first_index is None:
+                result.first_index = index
+                result.first_previous_hash = block_data.get("previous_hash")
+            elif index != expected_index:
+                result.error_index = expected_index
+                result.error = f"expected index {expected_index}, found {index}"
+                return result
+            elif block_data.get("previous_hash") != result.last_hash:
+                result.error_index = index
+                result.error = "previous_hash does not match the previous block"
+                return result
+
+            try:
+                error = _block_error(block_data)
+            except (KeyError, ValueError) as e:
+                error = f"invalid block data: {e}"
+
+            if error is not None:
+                result.error_index = index
+                result.error = error
+                return result
+
+            result.block_count += 1
+            result.last_index = index
+            result.last_hash = block_data.get("hash")
+
+    return result
+
+
+def verify_chain(directory: str, workers: int = 1) -> VerificationReport:
+    """Verify every block and the linkage between them, using a process pool.
+
+    With a single worker the ranges are verified in this process.
+    """
+
+    start_time = time.perf_counter()
+
+    paths = list_segment_paths(directory)
+    ranges = split_ranges(paths, workers * RANGES_PER_WORKER)
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(verify_range, *zip(*ranges)))
+    else:
+        results = [verify_range(*block_range) for block_range in ranges]
+
+    block_count = 0
+    # Index and hash of the last verified block, none yet
+    last_index = 0
+    last_hash: Optional[str] = None
+
+    def report(corrupt_index: Optional[int] = None, error: Optional[str] = None):
+        return VerificationReport(
+            block_count, time.perf_counter() - start_time, corrupt_index, error
+        )
+
+    for result in results:
+        # Check the linkage between the last block of one range and the next
+        if result.first_index is not None:
+            if result.first_index != last_index + 1:
+                return report(
+                    last_index + 1,
+                    f"expected index {last_index + 1}, found {result.first_index}",
+                )
+            if last_hash is not None and result.first_previous_hash != last_hash:
+                return report(
+                    result.first_index,
+                    "previous_hash does not match the previous block",
+                )
+
+        block_count += result.block_count
+
+        if result.error is not None:
+            # An unreadable first line of a range follows the previous range
+            corrupt_index = result.error_index
+            if corrupt_index is None:
+                corrupt_index = last_index + 1
+            return report(corrupt_index, result.error)
+
+        if result.last_index is not None:
+            last_index = result.last_index
+            last_hash = result.last_hash
+
+    return report()
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Verify the stored blockchain; exit status 1 if a block is corrupt."""
+
+    parser = argparse.ArgumentParser(description="Verify the blockchain hashes.")
+    parser.add_argument(
+        "path",
+        nargs="?",
+        default=BLOCKCHAIN_FOLDER,
+        help="blockchain segment folder (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="verification processes (default: CPU count)",
+    )
+    args = parser.parse_args(argv)
+
+    report = verify_chain(args.path, workers=args.workers)
+
+    if not report.is_valid:
+        print(f"Corrupt block at index {report.corrupt_index}: {report.error}")
+        return 1
+
+    print(
+        f"Verified {report.block_count} blocks in {report.seconds:.2f}s "
+        f"({report.blocks_per_second:,.0f} blocks/sec)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+
+    sys.exit(main())
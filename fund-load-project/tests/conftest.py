@@ -1,9 +1,51 @@
+import importlib
+import sys
+from pathlib import Path
+
 import pytest
+from redis.exceptions import ConnectionError
+
+# Source modules import each other by flat name ("from validator import
+# Success") while tests import them through the package ("..src.validator").
+# Bind the package names to the flat modules, so each module is loaded once
+# and classes such as Success are the same whichever name imported them.
+SRC_PACKAGE = importlib.import_module(__package__.rpartition(".")[0] + ".src")
+for path in sorted(Path(SRC_PACKAGE.__file__).parent.glob("*.py")):
+    if path.stem == "__init__":
+        continue
+    try:
+        module = importlib.import_module(path.stem)
+    except ImportError:
+        # Optional dependency missing (numpy); its tests are skipped
+        continue
+    sys.modules[f"{SRC_PACKAGE.__name__}.{path.stem}"] = module
+    setattr(SRC_PACKAGE, path.stem, module)
 
+from ..src.memory_storage import InMemoryTimeSeriesStorage
 from ..src.redis_storage import RedisTimeSeriesStorage
+from ..src.storage import TransactionStorage
 
 
 @pytest.fixture
 def redis_storage() -> RedisTimeSeriesStorage:
     storage = RedisTimeSeriesStorage()
+
+    # Skip Redis-backed tests when the docker-compose Redis service is not running
+    try:
+        storage.redis.ping()
+    except ConnectionError:
+        pytest.skip("Redis server is not available")
+
+    return storage
+
+
+@pytest.fixture
+def memory_storage() -> InMemoryTimeSeriesStorage:
+    storage = InMemoryTimeSeriesStorage()
     return storage
+
+
+@pytest.fixture(params=["memory", "redis"])
+def storage(request: pytest.FixtureRequest) -> TransactionStorage:
+    """Run a test once against every storage backend."""
+    return request.getfixturevalue(f"{request.param}_storage")
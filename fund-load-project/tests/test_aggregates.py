@@ -0,0 +1,137 @@
+from datetime import date
+
+import pytest
+
+from ..src.aggregates import CustomerAggregate, weighted_cents
+from ..src.memory_storage import InMemoryTimeSeriesStorage
+from ..src.transactions import Transaction
+from ..src.validator import TransactionValidator
+
+DAY = 24 * 3600
+
+
+def test__weighted_cents():
+    assert weighted_cents(10010, date(2025, 8, 16)) == 10010  # Saturday
+    assert weighted_cents(10010, date(2025, 8, 18)) == 20020  # Monday
+
+
+def test__customer_aggregate__daily_window_resets():
+
+    aggregate = CustomerAggregate()
+
+    aggregate.append(0, "tx:1", 100)
+    aggregate.slide(day_start=0, week_start=-7 * DAY)
+    aggregate.append(3600, "tx:2", 200)
+    aggregate.slide(day_start=0, week_start=3600 - 7 * DAY)
+
+    assert aggregate.daily_count == 2
+    assert aggregate.daily_total == 300
+
+    # Next day: daily aggregates only hold the new transaction
+    aggregate.append(DAY, "tx:3", 400)
+    aggregate.slide(day_start=DAY, week_start=-6 * DAY)
+
+    assert aggregate.daily_count == 1
+    assert aggregate.daily_total == 400
+    assert aggregate.weekly_total == 700
+
+
+def test__customer_aggregate__weekly_window_expires():
+
+    aggregate = CustomerAggregate()
+
+    aggregate.append(0, "tx:1", 100)
+    aggregate.slide(day_start=0, week_start=-7 * DAY)
+
+    # Exactly 7 days later the first transaction is still in the window
+    aggregate.append(7 * DAY, "tx:2", 200)
+    aggregate.slide(day_start=7 * DAY, week_start=0)
+    assert aggregate.weekly_total == 300
+
+    aggregate.append(7 * DAY + 1, "tx:3", 400)
+    aggregate.slide(day_start=7 * DAY, week_start=1)
+
+    assert aggregate.weekly_total == 600
+    assert aggregate.keys == {"tx:2", "tx:3"}
+    assert not aggregate.can_append(7 * DAY + 1, "tx:2")
+
+
+def validate_all(
+    rows: list[tuple[str, str, str, str]], rolling_aggregates: bool
+) -> list[str | None]:
+    """Failure messages (None if accepted) of (id, customer, amount, time) loads."""
+
+    storage = InMemoryTimeSeriesStorage()
+    validator = TransactionValidator(storage, rolling_aggregates=rolling_aggregates)
+
+    messages = []
+    for transaction_id, customer_id, load_amount, time in rows:
+        transaction = Transaction(
+            {
+                "id": transaction_id,
+                "customer_id": customer_id,
+                "load_amount": load_amount,
+                "time": time,
+            }
+        )
+        storage.store_customer_transaction(transaction)
+        messages.append(
+            getattr(validator.validate_transaction(transaction), "message", None)
+        )
+
+    return messages
+
+
+@pytest.mark.parametrize(
+    "rows, expected",
+    [
+        # Customer 2 overwrites tx:10, which customer 1's daily window still
+        # lists, now with $1
+        (
+            [
+                ("10", "1", "$4000.00", "2000-01-04T00:00:00Z"),
+                ("10", "2", "$1.00", "2000-01-04T01:00:00Z"),
+                ("12", "1", "$1500.00", "2000-01-04T02:00:00Z"),
+            ],
+            [None, None, None],
+        ),
+        # Customer 1's window lists customer 2's tx:10, then customer 3
+        # overwrites it again
+        (
+            [
+                ("10", "1", "$4000.00", "2000-01-04T00:00:00Z"),
+                ("10", "2", "$1.00", "2000-01-04T01:00:00Z"),
+                ("12", "1", "$100.00", "2000-01-04T02:00:00Z"),
+                ("10", "3", "$4500.00", "2000-01-04T03:00:00Z"),
+                ("14", "1", "$500.00", "2000-01-04T04:00:00Z"),
+            ],
+            [None, None, None, None, "Normal ID: daily total exceeds 5,000"],
+        ),
+        # Customer 1's window lists tx:10 at its own time, two days before the
+        # time of customer 2's record, so it is not part of the day
+        (
+            [
+                ("10", "1", "$4000.00", "2000-01-04T00:00:00Z"),
+                ("10", "2", "$4000.00", "2000-01-06T01:00:00Z"),
+                ("12", "1", "$4000.00", "2000-01-06T02:00:00Z"),
+            ],
+            [None, None, None],
+        ),
+        # Two loads older than customer 1's latest: the second one must not
+        # seed an aggregate that misses the 10:00 load for the next ones
+        (
+            [
+                ("10", "1", "$3000.00", "2000-01-04T10:00:00Z"),
+                ("12", "1", "$100.00", "2000-01-04T05:00:00Z"),
+                ("14", "1", "$100.00", "2000-01-04T06:00:00Z"),
+                ("16", "1", "$100.00", "2000-01-04T11:00:00Z"),
+            ],
+            [None, None, None, "Normal ID: more than three daily transactions"],
+        ),
+    ],
+)
+def test__rolling_aggregates__matches_storage(
+    rows: list[tuple[str, str, str, str]], expected: list[str | None]
+):
+    assert validate_all(rows, rolling_aggregates=False) == expected
+    assert validate_all(rows, rolling_aggregates=True) == expected
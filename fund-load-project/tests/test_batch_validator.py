@@ -0,0 +1,202 @@
+import json
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from ..src.batch_validator import (
+    RESULT_MESSAGES,
+    read_transaction_columns,
+    validate_columns,
+    validate_file,
+)
+from ..src.memory_storage import InMemoryTimeSeriesStorage
+from ..src.transactions import Transaction
+from ..src.validator import TransactionValidator
+
+BATCH_TRANSACTIONS_DATA = [
+    # Prime ID twice in a day
+    {
+        "id": "7",
+        "customer_id": "1",
+        "load_amount": "$10.00",
+        "time": "2000-01-03T08:00:00Z",
+    },
+    {
+        "id": "100",
+        "customer_id": "1",
+        "load_amount": "$10.00",
+        "time": "2000-01-03T09:00:00Z",
+    },
+    {
+        "id": "11",
+        "customer_id": "1",
+        "load_amount": "$10.00",
+        "time": "2000-01-03T10:00:00Z",
+    },
+    # Monday amounts count double towards the daily limit
+    {
+        "id": "200",
+        "customer_id": "2",
+        "load_amount": "$2400.00",
+        "time": "2000-01-03T08:00:00Z",
+    },
+    {
+        "id": "202",
+        "customer_id": "2",
+        "load_amount": "$200.00",
+        "time": "2000-01-03T09:00:00Z",
+    },
+    {
+        "id": "204",
+        "customer_id": "2",
+        "load_amount": "USD$4000.00",
+        "time": "2000-01-04T09:00:00Z",
+    },
+    {
+        "id": "206",
+        "customer_id": "2",
+        "load_amount": "$4000.00",
+        "time": "2000-01-05T09:00:00Z",
+    },
+    {
+        "id": "208",
+        "customer_id": "2",
+        "load_amount": "$4000.00",
+        "time": "2000-01-06T09:00:00Z",
+    },
+    {
+        "id": "210",
+        "customer_id": "2",
+        "load_amount": "$4000.00",
+        "time": "2000-01-07T09:00:00Z",
+    },
+    # Out-of-order arrival and a duplicate ID are replayed through storage
+    {
+        "id": "300",
+        "customer_id": "3",
+        "load_amount": "$1.00",
+        "time": "2000-01-04T12:00:00Z",
+    },
+    {
+        "id": "302",
+        "customer_id": "3",
+        "load_amount": "$1.00",
+        "time": "2000-01-04T11:00:00Z",
+    },
+    {
+        "id": "304",
+        "customer_id": "3",
+        "load_amount": "$1.00",
+        "time": "2000-01-04T13:00:00Z",
+    },
+    {
+        "id": "306",
+        "customer_id": "3",
+        "load_amount": "$1.00",
+        "time": "2000-01-04T14:00:00Z",
+    },
+    {
+        "id": "100",
+        "customer_id": "4",
+        "load_amount": "$4999.00",
+        "time": "2000-01-04T15:00:00Z",
+    },
+    {
+        "id": "400",
+        "customer_id": "4",
+        "load_amount": "$2.00",
+        "time": "2000-01-04T16:00:00Z",
+    },
+    # Prime ID above the sieve limit
+    {
+        "id": "1000003",
+        "customer_id": "5",
+        "load_amount": "$1.00",
+        "time": "2000-01-04T16:00:00Z",
+    },
+    {
+        "id": "1000005",
+        "customer_id": "5",
+        "load_amount": "$1.00",
+        "time": "2000-01-04T17:00:00Z",
+    },
+]
+
+
+def write_input(path: Path, rows: list[dict[str, str]], separators=(",", ":")) -> None:
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row, separators=separators) + "\n")
+
+
+def streaming_messages(rows: list[dict[str, str]]) -> list[str]:
+    storage = InMemoryTimeSeriesStorage()
+    validator = TransactionValidator(storage)
+
+    messages = []
+    for row in rows:
+        transaction = Transaction(row)
+        storage.store_customer_transaction(transaction)
+        result = validator.validate_transaction(transaction)
+        messages.append(getattr(result, "message", "Transaction valid"))
+
+    return messages
+
+
+@pytest.mark.parametrize("separators", [(",", ":"), (", ", ": ")])
+def test_batch_matches_streaming(tmp_path: Path, separators) -> None:
+    # Spaced separators are not canonical and take the Transaction fallback
+    input_path = tmp_path / "input.txt"
+    write_input(input_path, BATCH_TRANSACTIONS_DATA, separators)
+
+    codes = validate_file(
+        str(input_path), tmp_path, TransactionValidator(InMemoryTimeSeriesStorage())
+    )
+
+    expected = streaming_messages(BATCH_TRANSACTIONS_DATA)
+    assert [RESULT_MESSAGES[code] for code in codes] == expected
+
+    # Same lines as append_validation_result writes
+    with open(tmp_path / "output_with_detail.jsonl") as f:
+        for row, message, line in zip(BATCH_TRANSACTIONS_DATA, expected, f):
+            result = {
+                "id": row["id"],
+                "customer_id": row["customer_id"],
+                "accepted": message == "Transaction valid",
+            }
+            assert line == json.dumps({**result, "details": message}) + "\n"
+
+    with open(tmp_path / "output.txt") as f:
+        assert [json.loads(line)["accepted"] for line in f] == [
+            message == "Transaction valid" for message in expected
+        ]
+
+
+def test_read_transaction_columns(tmp_path: Path) -> None:
+    input_path = tmp_path / "input.txt"
+    write_input(input_path, BATCH_TRANSACTIONS_DATA[:1])
+
+    columns = read_transaction_columns(str(input_path))
+
+    assert columns.transaction_ids.tolist() == [b"7"]
+    assert columns.customer_ids.tolist() == [b"1"]
+    assert columns.timestamps.tolist() == [946886400]
+    assert columns.cents.tolist() == [1000]
+
+
+def test_validate_columns_result_codes(tmp_path: Path) -> None:
+    input_path = tmp_path / "input.txt"
+    write_input(input_path, BATCH_TRANSACTIONS_DATA[:3])
+
+    codes = validate_columns(
+        read_transaction_columns(str(input_path)),
+        TransactionValidator(InMemoryTimeSeriesStorage()),
+    )
+
+    assert [RESULT_MESSAGES[code] for code in codes] == [
+        "Transaction valid",
+        "Transaction valid",
+        "Prime ID: more than one daily transaction",
+    ]
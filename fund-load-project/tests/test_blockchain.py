@@ -0,0 +1,136 @@
+import time
+from pathlib import Path
+
+from ..src.blockchain import BaseBlockchain
+from ..src.transactions import Transaction
+
+
+def make_transaction(transaction_id: int) -> Transaction:
+    return Transaction(
+        {
+            "id": str(transaction_id),
+            "customer_id": "528",
+            "load_amount": "$3318.47",
+            "time": "2000-01-01T00:00:00Z",
+        }
+    )
+
+
+def block_sizes(blockchain: BaseBlockchain) -> list[int]:
+    return [len(block["transactions"]) for block in blockchain.get_chain()]
+
+
+def test_seals_on_transaction_count(tmp_path: Path) -> None:
+    blockchain = BaseBlockchain(storage_path=str(tmp_path), batch_size=2)
+
+    for transaction_id in range(5):
+        blockchain.add_transaction(make_transaction(transaction_id))
+
+    assert block_sizes(blockchain) == [2, 2]
+
+    # Pending transactions are sealed on close
+    blockchain.close()
+    assert block_sizes(blockchain) == [2, 2, 1]
+    assert block_sizes(BaseBlockchain(storage_path=str(tmp_path))) == [2, 2, 1]
+
+
+def test_seals_on_bytes(tmp_path: Path) -> None:
+    # Each transaction encodes to 163 bytes
+    transaction_bytes = 163
+    with BaseBlockchain(
+        storage_path=str(tmp_path),
+        batch_size=100,
+        max_block_bytes=2 * transaction_bytes,
+    ) as blockchain:
+        for transaction_id in range(10000, 10006):
+            blockchain.add_transaction(make_transaction(transaction_id))
+
+    assert block_sizes(blockchain) == [2, 2, 2]
+
+
+def test_background_sealer_seals_aged_block(tmp_path: Path) -> None:
+    with BaseBlockchain(
+        storage_path=str(tmp_path),
+        batch_size=100,
+        max_block_age=0.01,
+        background_sealing=True,
+    ) as blockchain:
+        blockchain.add_transaction(make_transaction(1))
+
+        deadline = time.monotonic() + 5
+        while not blockchain.chain and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert block_sizes(blockchain) == [1]
+
+        blockchain.add_transaction(make_transaction(2))
+
+    assert block_sizes(blockchain) == [1, 1]
+    assert [block["index"] for block in blockchain.get_chain()] == [1, 2]
+
+
+def test_blocks_are_hashed_and_linked(tmp_path: Path) -> None:
+    with BaseBlockchain(storage_path=str(tmp_path), batch_size=2) as blockchain:
+        for transaction_id in range(5):
+            blockchain.add_transaction(make_transaction(transaction_id))
+
+    chain = blockchain.chain
+    assert chain[0].previous_hash == "1"
+    for previous, block in zip(chain, chain[1:]):
+        assert block.previous_hash == previous.hash
+
+    for block in chain:
+        assert block.merkle_root == block.compute_merkle_root()
+        assert block.hash == block.compute_hash()
+
+    # Stored hashes are read back, not recomputed
+    reloaded = BaseBlockchain(storage_path=str(tmp_path))
+    assert [block.hash for block in reloaded.chain] == [block.hash for block in chain]
+
+
+def test_tampered_transaction_changes_hashes(tmp_path: Path) -> None:
+    with BaseBlockchain(storage_path=str(tmp_path), batch_size=2) as blockchain:
+        blockchain.add_transaction(make_transaction(1))
+        blockchain.add_transaction(make_transaction(2))
+
+    block = blockchain.chain[0]
+    block.transactions[1] = make_transaction(3)
+
+    assert block.compute_merkle_root() != block.merkle_root
+
+
+def test_chain_is_loaded_lazily(tmp_path: Path) -> None:
+    with BaseBlockchain(storage_path=str(tmp_path)) as blockchain:
+        for transaction_id in range(3):
+            blockchain.add_transaction(make_transaction(transaction_id))
+
+    reopened = BaseBlockchain(storage_path=str(tmp_path))
+
+    assert len(reopened.chain) == 3
+    assert reopened.chain[-1].hash == blockchain.chain[2].hash
+    assert [block.index for block in reopened.chain[:2]] == [1, 2]
+
+    # The next block links to the tip without reading the rest of the chain
+    reopened.add_transaction(make_transaction(3))
+    assert reopened.chain[3].previous_hash == reopened.chain[2].hash
+
+
+def test_tip_while_block_is_sealed(tmp_path: Path) -> None:
+    with BaseBlockchain(storage_path=str(tmp_path)) as blockchain:
+        blockchain.add_transaction(make_transaction(0))
+
+        # Called between storing a block and recording it as the tip, where
+        # another thread may read the chain while the sealer runs
+        seen = []
+        add_block = blockchain.lookup.add_block
+
+        def lookup_add_block(index, transactions):
+            seen.append((len(blockchain.chain), blockchain.chain[-1].index))
+            seen.append(blockchain.get_chain()[-1]["index"])
+            add_block(index, transactions)
+
+        blockchain.lookup.add_block = lookup_add_block
+        blockchain.add_transaction(make_transaction(1))
+
+    assert seen == [(2, 2), 2]
+    assert blockchain.chain[-1].index == 2
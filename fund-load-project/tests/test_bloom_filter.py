@@ -0,0 +1,51 @@
+from ..src.bloom_filter import BloomFilter
+
+
+def test_added_items_are_always_found() -> None:
+    bloom_filter = BloomFilter(capacity=10_000)
+
+    # Items reported as already added are false positives
+    already_added = sum(bloom_filter.add(str(n)) for n in range(10_000))
+    assert already_added < 100
+
+    assert all(str(n) in bloom_filter for n in range(10_000))
+    assert bloom_filter.add("42") is True
+
+
+def test_false_positive_rate_at_capacity() -> None:
+    bloom_filter = BloomFilter(capacity=10_000, error_rate=0.01)
+    for n in range(10_000):
+        bloom_filter.add(str(n))
+
+    false_positives = sum(str(n) in bloom_filter for n in range(10_000, 60_000))
+
+    # Expected about 1% of 50,000
+    assert false_positives < 1_000
+
+
+def test_sizing() -> None:
+    bloom_filter = BloomFilter(capacity=1_000_000, error_rate=0.001)
+
+    # The first layer takes about 15.8 bits and 11 hash functions per item at
+    # 0.05%, half the overall rate
+    assert len(bloom_filter.layers) == 1
+    assert 1_900_000 < bloom_filter.nbytes < 2_100_000
+    assert bloom_filter.layers[0].hash_count == 11
+
+
+def test_grows_past_capacity() -> None:
+    bloom_filter = BloomFilter(capacity=1_000, error_rate=0.01)
+
+    already_added = sum(bloom_filter.add(str(n)) for n in range(50_000))
+    assert already_added < 500
+    assert bloom_filter.count == 50_000 - already_added
+
+    # Layers for 1,000, 2,000, ..., 32,000 items
+    assert [layer.capacity for layer in bloom_filter.layers] == [
+        1_000 * 2**n for n in range(6)
+    ]
+    assert all(str(n) in bloom_filter for n in range(50_000))
+
+    # The false positive rate stays under the target past the initial capacity
+    false_positives = sum(str(n) in bloom_filter for n in range(50_000, 150_000))
+    assert false_positives < 1_000
@@ -0,0 +1,83 @@
+from pathlib import Path
+
+from ..src.blockchain import BaseBlockchain
+from ..src.chain_lookup import LOOKUP_FILE, ChainLookupIndex
+from ..src.chain_storage import SegmentedChainStorage
+from ..src.transactions import Transaction
+
+
+def make_transaction(transaction_id: str, customer_id: str) -> Transaction:
+    return Transaction(
+        {
+            "id": transaction_id,
+            "customer_id": customer_id,
+            "load_amount": "$100.00",
+            "time": "2000-01-01T00:00:00Z",
+        }
+    )
+
+
+TRANSACTIONS = [
+    ("1", "10"),
+    ("2", "20"),
+    ("3", "10"),
+    ("4", "30"),
+    # Transaction IDs are not unique across customers
+    ("2", "30"),
+]
+
+
+def fill_chain(path: Path) -> None:
+    with BaseBlockchain(storage_path=str(path), batch_size=2) as blockchain:
+        for transaction_id, customer_id in TRANSACTIONS:
+            blockchain.add_transaction(make_transaction(transaction_id, customer_id))
+
+
+def test_locate_transaction(tmp_path: Path) -> None:
+    fill_chain(tmp_path)
+    blockchain = BaseBlockchain(storage_path=str(tmp_path))
+
+    assert blockchain.locate_transaction("3") == [(2, 0)]
+    assert blockchain.locate_transaction("2") == [(1, 1), (3, 0)]
+    assert blockchain.locate_transaction("99") == []
+
+
+def test_get_customer_transactions(tmp_path: Path) -> None:
+    fill_chain(tmp_path)
+    blockchain = BaseBlockchain(storage_path=str(tmp_path))
+
+    assert blockchain.lookup.find_customer_blocks("30") == [2, 3]
+    assert [tx.transaction_id for tx in blockchain.get_customer_transactions("30")] == [
+        "4",
+        "2",
+    ]
+    assert blockchain.get_customer_transactions("99") == []
+
+
+def test_index_catches_up_with_chain(tmp_path: Path) -> None:
+    fill_chain(tmp_path)
+
+    # Lookup index lost, e.g. deleted or never committed
+    (tmp_path / LOOKUP_FILE).unlink()
+
+    blockchain = BaseBlockchain(storage_path=str(tmp_path))
+    assert blockchain.lookup.indexed_blocks == 3
+    assert blockchain.locate_transaction("4") == [(2, 1)]
+
+
+def test_index_drops_blocks_missing_from_chain(tmp_path: Path) -> None:
+    fill_chain(tmp_path)
+
+    storage = SegmentedChainStorage(str(tmp_path))
+    lookup = ChainLookupIndex(str(tmp_path))
+    assert lookup.indexed_blocks == 3
+
+    # Torn last block, truncated when the storage is reopened
+    storage.close()
+    segment = storage.segment_paths()[-1]
+    with open(segment, "rb+") as f:
+        f.truncate(f.seek(0, 2) - 1)
+
+    assert lookup.catch_up(SegmentedChainStorage(str(tmp_path))) == 0
+    assert lookup.indexed_blocks == 2
+    assert lookup.find_transaction("2") == [(1, 1)]
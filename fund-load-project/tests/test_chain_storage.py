@@ -0,0 +1,177 @@
+import json
+from pathlib import Path
+
+from ..src.blockchain import BaseBlockchain
+from ..src.chain_storage import (
+    INDEX_FILE,
+    INDEX_RECORD,
+    SegmentedChainStorage,
+    main,
+    migrate_legacy_chain,
+)
+from ..src.transactions import Transaction
+
+BLOCK_DATA = {
+    "index": 1,
+    "previous_hash": "1",
+    "timestamp": 1755459207,
+    "transactions": [
+        {
+            "id": "15887",
+            "customer_id": "528",
+            "transaction_date": "2000-01-01",
+            "transaction_time": "00:00:00",
+            "transaction_datetime": "2000-01-01 00:00:00",
+            "load_amount": 3318.47,
+        }
+    ],
+}
+
+
+def test_append_and_iter_blocks(tmp_path: Path) -> None:
+    storage = SegmentedChainStorage(str(tmp_path))
+    assert storage.is_empty()
+
+    storage.append_block(BLOCK_DATA)
+    storage.append_block({**BLOCK_DATA, "index": 2})
+    storage.close()
+
+    reopened = SegmentedChainStorage(str(tmp_path))
+    assert [block["index"] for block in reopened.iter_blocks()] == [1, 2]
+
+
+def test_segments_rotate(tmp_path: Path) -> None:
+    storage = SegmentedChainStorage(str(tmp_path), max_segment_bytes=1)
+
+    for index in range(1, 4):
+        storage.append_block({**BLOCK_DATA, "index": index})
+
+    assert len(storage.segment_paths()) == 3
+    assert [block["index"] for block in storage.iter_blocks()] == [1, 2, 3]
+
+
+def test_partial_last_line_is_truncated(tmp_path: Path) -> None:
+    storage = SegmentedChainStorage(str(tmp_path))
+    storage.append_block(BLOCK_DATA)
+    storage.close()
+
+    # Simulate a crash in the middle of writing the second block
+    with open(storage.segment_paths()[-1], "ab") as f:
+        f.write(b'{"index":2,"previous')
+
+    reopened = SegmentedChainStorage(str(tmp_path))
+    reopened.append_block({**BLOCK_DATA, "index": 3})
+
+    assert [block["index"] for block in reopened.iter_blocks()] == [1, 3]
+
+
+def test_migrate_legacy_chain(tmp_path: Path) -> None:
+    legacy_path = tmp_path / "blockchain.json"
+    with open(legacy_path, "w") as f:
+        json.dump([BLOCK_DATA, {**BLOCK_DATA, "index": 2}], f, indent=2)
+
+    storage = SegmentedChainStorage(str(tmp_path / "blockchain"))
+
+    assert migrate_legacy_chain(str(legacy_path), storage) == 2
+    assert list(storage.iter_blocks())[1]["transactions"] == BLOCK_DATA["transactions"]
+
+
+def test_migrate_command_refuses_non_empty_chain(tmp_path: Path) -> None:
+    legacy_path = tmp_path / "blockchain.json"
+    with open(legacy_path, "w") as f:
+        json.dump([BLOCK_DATA], f, indent=2)
+    chain_path = str(tmp_path / "blockchain")
+
+    assert main([str(legacy_path), chain_path]) == 0
+    # Migrating twice would duplicate the blocks
+    assert main([str(legacy_path), chain_path]) == 1
+
+    assert BaseBlockchain(storage_path=chain_path).get_chain()[0]["index"] == 1
+
+
+def test_blockchain_appends_blocks_and_migrates(tmp_path: Path) -> None:
+    legacy_path = tmp_path / "blockchain.json"
+    with open(legacy_path, "w") as f:
+        json.dump([BLOCK_DATA], f, indent=2)
+
+    blockchain = BaseBlockchain(
+        storage_path=str(tmp_path / "blockchain"),
+        legacy_storage_path=str(legacy_path),
+    )
+    blockchain.add_transaction(Transaction.from_dict(BLOCK_DATA["transactions"][0]))
+    blockchain.close()
+
+    reloaded = BaseBlockchain(storage_path=str(tmp_path / "blockchain"))
+
+    assert [block.index for block in reloaded.chain] == [1, 2]
+    assert reloaded.get_chain()[1]["transactions"] == BLOCK_DATA["transactions"]
+
+    # The migrated block had no hashes; they are computed on load
+    assert reloaded.chain[1].previous_hash == reloaded.chain[0].hash
+
+
+def test_read_block_through_index(tmp_path: Path) -> None:
+    storage = SegmentedChainStorage(str(tmp_path), max_segment_bytes=1)
+    for index in range(1, 5):
+        storage.append_block({**BLOCK_DATA, "index": index})
+
+    assert storage.block_count == 4
+    assert storage.read_block(2)["index"] == 3
+    assert storage.read_block(3)["index"] == 4
+
+
+def test_index_is_rebuilt_from_segments(tmp_path: Path) -> None:
+    storage = SegmentedChainStorage(str(tmp_path), max_segment_bytes=500)
+    for index in range(1, 6):
+        storage.append_block({**BLOCK_DATA, "index": index})
+    storage.close()
+
+    # Chain written before the index existed
+    (tmp_path / INDEX_FILE).unlink()
+
+    reopened = SegmentedChainStorage(str(tmp_path))
+    assert reopened.block_count == 5
+    assert [reopened.read_block(i)["index"] for i in range(5)] == [1, 2, 3, 4, 5]
+
+
+def test_index_is_repaired_after_crash(tmp_path: Path) -> None:
+    storage = SegmentedChainStorage(str(tmp_path))
+    for index in range(1, 4):
+        storage.append_block({**BLOCK_DATA, "index": index})
+    storage.close()
+
+    # Crash after writing the third line, before indexing it
+    index_path = tmp_path / INDEX_FILE
+    index_path.write_bytes(index_path.read_bytes()[: 2 * INDEX_RECORD.size + 3])
+
+    reopened = SegmentedChainStorage(str(tmp_path))
+    assert reopened.block_count == 3
+    assert reopened.read_block(2)["index"] == 3
+
+    # Torn last line: its index record is dropped with it
+    with open(reopened.segment_paths()[-1], "rb+") as f:
+        f.truncate(f.seek(0, 2) - 10)
+    reopened.close()
+
+    reopened = SegmentedChainStorage(str(tmp_path))
+    assert reopened.block_count == 2
+    reopened.append_block({**BLOCK_DATA, "index": 3})
+    assert reopened.read_block(2)["index"] == 3
+
+
+def test_truncate_drops_later_blocks(tmp_path: Path) -> None:
+    storage = SegmentedChainStorage(str(tmp_path), max_segment_bytes=1)
+    for index in range(1, 7):
+        storage.append_block({**BLOCK_DATA, "index": index})
+    assert storage.read_block(5)["index"] == 6
+
+    storage.truncate(3)
+
+    assert storage.block_count == 3
+    assert len(storage.segment_paths()) == 3
+    storage.append_block({**BLOCK_DATA, "index": 4})
+    storage.close()
+
+    reopened = SegmentedChainStorage(str(tmp_path))
+    assert [block["index"] for block in reopened.iter_blocks()] == [1, 2, 3, 4]
+    assert reopened.read_block(3)["index"] == 4
@@ -0,0 +1,241 @@
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from ..src.blockchain import BaseBlockchain
+from ..src.bloom_filter import BloomFilter
+from ..src.chain_storage import SegmentedChainStorage
+from ..src.checkpoint import (
+    Checkpoint,
+    CheckpointJournal,
+    input_identity,
+    load_checkpoint,
+    remove_checkpoint,
+    replay_journal,
+    rewind_outputs,
+    save_checkpoint,
+    take_checkpoint,
+)
+from ..src.main import checkpoint_settings, main, parse_args, process_transaction_line
+from ..src.result_writer import ValidationResultWriter
+from ..src.storage import AtomicTransactionStorage, TransactionStorage
+from ..src.validator import TransactionValidator
+from .test_pipeline import PIPELINE_TRANSACTIONS_DATA, write_input
+
+# Lines after the checkpoint whose results change if writes made after it
+# stay in storage on resume: customer 5, first seen after the checkpoint,
+# loads with a prime ID at 05:00 and then at 04:00. The repeated IDs, one
+# from before the checkpoint, need the rebuilt duplicate filter.
+RESUME_TRANSACTIONS_DATA = PIPELINE_TRANSACTIONS_DATA[:10] + [
+    {
+        "id": "11",
+        "customer_id": "5",
+        "load_amount": "$100.00",
+        "time": "2000-01-04T05:00:00Z",
+    },
+    {
+        "id": "100",
+        "customer_id": "5",
+        "load_amount": "$100.00",
+        "time": "2000-01-04T04:00:00Z",
+    },
+    {
+        "id": "3",
+        "customer_id": "5",
+        "load_amount": "$100.00",
+        "time": "2000-01-04T06:00:00Z",
+    },
+    {
+        "id": "100",
+        "customer_id": "5",
+        "load_amount": "$100.00",
+        "time": "2000-01-04T07:00:00Z",
+    },
+]
+CHECKPOINT_LINES = 10
+
+
+def process_lines(
+    lines: list[bytes],
+    validator: TransactionValidator,
+    result_writer: ValidationResultWriter,
+    blockchain: BaseBlockchain,
+    atomic: bool,
+    journal: Optional[CheckpointJournal] = None,
+) -> None:
+    for line in lines:
+        if not line.strip():
+            continue
+        stored = process_transaction_line(
+            line, validator.storage, validator, result_writer, blockchain, atomic
+        )
+        if journal is not None and stored is not None:
+            journal.record(stored)
+
+
+def new_validator(storage: TransactionStorage) -> TransactionValidator:
+    return TransactionValidator(storage, duplicate_filter=BloomFilter(1_000))
+
+
+def chain_transactions(blockchain_folder: Path) -> list[dict]:
+    storage = SegmentedChainStorage(str(blockchain_folder))
+    try:
+        return [
+            transaction
+            for block in storage.iter_blocks()
+            for transaction in block["transactions"]
+        ]
+    finally:
+        storage.close()
+
+
+@pytest.mark.parametrize(
+    "change, message",
+    [
+        ("append", "another --input or input file contents"),
+        ("--block-transactions", "another --block-transactions"),
+    ],
+)
+def test_resume_refuses_other_input_or_options(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch, change: str, message: str
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    write_input(tmp_path / "input.txt", PIPELINE_TRANSACTIONS_DATA)
+    argv = ["--storage", "memory", "--input", "input.txt", "--checkpoint-every", "5"]
+
+    output_folder = tmp_path / "outputs"
+    output_folder.mkdir()
+    save_checkpoint(
+        output_folder,
+        Checkpoint(
+            input_offset=100,
+            processed_lines=1,
+            output_sizes={},
+            block_count=0,
+            pending_transactions=[],
+            journal_size=0,
+            settings=checkpoint_settings(parse_args(argv)),
+        ),
+    )
+
+    if change == "append":
+        # Rewritten with more lines, so the offset may point anywhere
+        write_input(tmp_path / "input.txt", PIPELINE_TRANSACTIONS_DATA * 2)
+    else:
+        argv += [change, "2"]
+
+    with pytest.raises(SystemExit, match=message):
+        main(argv + ["--resume"])
+
+
+def test_load_checkpoint_without_checkpoint(tmp_path: Path) -> None:
+    assert load_checkpoint(tmp_path) is None
+    remove_checkpoint(tmp_path)
+
+
+@pytest.mark.parametrize(
+    "rows",
+    [PIPELINE_TRANSACTIONS_DATA, RESUME_TRANSACTIONS_DATA],
+    ids=["pipeline", "later-writes"],
+)
+@pytest.mark.parametrize("atomic", [False, True], ids=["store", "atomic"])
+def test_resume_matches_uninterrupted_run(
+    tmp_path: Path, storage: TransactionStorage, rows: list[dict], atomic: bool
+) -> None:
+    if atomic and not isinstance(storage, AtomicTransactionStorage):
+        pytest.skip("Atomic validation needs Redis")
+
+    input_path = tmp_path / "input.txt"
+    write_input(input_path, rows)
+    lines = input_path.read_bytes().splitlines(keepends=True)
+
+    expected_folder = tmp_path / "uninterrupted"
+    expected_folder.mkdir()
+    storage.clear_all_transactions()
+    with BaseBlockchain(
+        storage_path=str(expected_folder / "blockchain"), batch_size=4
+    ) as blockchain, ValidationResultWriter(expected_folder) as result_writer:
+        process_lines(lines, new_validator(storage), result_writer, blockchain, atomic)
+
+    output_folder = tmp_path / "resumed"
+    output_folder.mkdir()
+    blockchain_folder = output_folder / "blockchain"
+
+    storage.clear_all_transactions()
+    validator = new_validator(storage)
+    with BaseBlockchain(
+        storage_path=str(blockchain_folder), batch_size=4
+    ) as blockchain, ValidationResultWriter(
+        output_folder
+    ) as result_writer, CheckpointJournal(
+        output_folder
+    ) as journal:
+        process_lines(
+            lines[:CHECKPOINT_LINES],
+            validator,
+            result_writer,
+            blockchain,
+            atomic,
+            journal,
+        )
+        save_checkpoint(
+            output_folder,
+            take_checkpoint(
+                sum(len(line) for line in lines[:CHECKPOINT_LINES]),
+                CHECKPOINT_LINES,
+                journal,
+                result_writer,
+                blockchain,
+                {"--input": input_identity(str(input_path))},
+            ),
+        )
+
+        # Crash after the rest of the input reached storage and the outputs
+        process_lines(
+            lines[CHECKPOINT_LINES:],
+            validator,
+            result_writer,
+            blockchain,
+            atomic,
+            journal,
+        )
+        journal.sync()
+
+    checkpoint = load_checkpoint(output_folder)
+    assert checkpoint.processed_lines == CHECKPOINT_LINES
+    assert checkpoint.pending_transactions
+
+    rewind_outputs(checkpoint, output_folder, str(blockchain_folder))
+
+    storage.clear_all_transactions()
+    validator = new_validator(storage)
+    replayed = replay_journal(
+        checkpoint, output_folder, storage, validator.duplicate_filter
+    )
+    assert replayed == CHECKPOINT_LINES
+
+    with BaseBlockchain(
+        storage_path=str(blockchain_folder), batch_size=4
+    ) as blockchain, ValidationResultWriter(
+        output_folder
+    ) as result_writer, CheckpointJournal(
+        output_folder, checkpoint.journal_size
+    ) as journal:
+        blockchain.restore_pending(checkpoint.pending_transactions)
+
+        with open(input_path, "rb") as f:
+            f.seek(checkpoint.input_offset)
+            process_lines(
+                f.readlines(), validator, result_writer, blockchain, atomic, journal
+            )
+
+    storage.clear_all_transactions()
+
+    for name in ("output.txt", "output_with_detail.jsonl"):
+        assert (output_folder / name).read_bytes() == (
+            expected_folder / name
+        ).read_bytes()
+    assert chain_transactions(blockchain_folder) == chain_transactions(
+        expected_folder / "blockchain"
+    )
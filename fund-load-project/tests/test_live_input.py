@@ -0,0 +1,97 @@
+import os
+import sys
+
+import pytest
+
+from ..src.live_input import FileFollower, read_stdin_lines
+
+
+def _lines(timed_lines) -> list[bytes]:
+    return [line for line, _ in timed_lines]
+
+
+def _append(path, data: bytes) -> None:
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def test_follows_appended_lines(tmp_path) -> None:
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"1\n2\n")
+    idle_calls = []
+
+    follower = FileFollower(
+        str(path), on_idle=lambda: idle_calls.append(True), idle_timeout=0.05
+    )
+    lines = iter(follower)
+
+    assert _lines([next(lines), next(lines)]) == [b"1", b"2"]
+
+    # A line is only returned once its newline is written
+    _append(path, b'{"id": ')
+    _append(path, b'"3"}\n4')
+    line, arrival = next(lines)
+    assert line == b'{"id": "3"}'
+    assert arrival > 0
+    # Data was ready at every read so far
+    assert not idle_calls
+
+    # A last line without newline is returned when following stops
+    assert _lines(lines) == [b"4"]
+    assert len(idle_calls) == 1
+    assert follower.fd is None
+
+
+def test_rename_rotation(tmp_path) -> None:
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"1\n")
+
+    follower = FileFollower(str(path), idle_timeout=0.05)
+    lines = iter(follower)
+    assert next(lines)[0] == b"1"
+
+    # Written to the old file after the rename, then the new file is created
+    _append(path, b"2\n3")
+    os.rename(path, tmp_path / "input.txt.1")
+    path.write_bytes(b"4\n")
+
+    assert _lines(lines) == [b"2", b"3", b"4"]
+    assert follower.rotations == 1
+
+
+def test_copytruncate_rotation(tmp_path) -> None:
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"1\n2\n")
+
+    follower = FileFollower(str(path), idle_timeout=0.05)
+    lines = iter(follower)
+    assert _lines([next(lines), next(lines)]) == [b"1", b"2"]
+
+    with open(path, "r+b") as f:
+        f.truncate(0)
+    _append(path, b"3\n")
+
+    assert _lines(lines) == [b"3"]
+    assert follower.rotations == 1
+
+
+def test_missing_file(tmp_path) -> None:
+    with pytest.raises(FileNotFoundError):
+        list(FileFollower(str(tmp_path / "missing.txt"), idle_timeout=0))
+
+
+def test_read_stdin_lines(monkeypatch) -> None:
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"1\n2\n3")
+    os.close(write_fd)
+    idle_calls = []
+
+    with open(read_fd, "rb") as stdin:
+        monkeypatch.setattr(sys, "stdin", stdin)
+        lines = list(read_stdin_lines(on_idle=lambda: idle_calls.append(True)))
+
+    assert _lines(lines) == [b"1", b"2", b"3"]
+    # Lines read together arrive together
+    assert lines[0][1] == lines[1][1]
+    # The closed pipe is readable, so reading never waited
+    assert not idle_calls
@@ -0,0 +1,157 @@
+from ..src.transactions import Transaction
+from ..src.memory_storage import InMemoryTimeSeriesStorage
+
+
+def test__memory_storage_instance(memory_storage: InMemoryTimeSeriesStorage) -> None:
+    assert isinstance(memory_storage, InMemoryTimeSeriesStorage)
+
+
+def test_clear_all_transactions(memory_storage: InMemoryTimeSeriesStorage) -> None:
+    memory_storage.store_customer_transaction(
+        Transaction(
+            {
+                "id": "15887",
+                "customer_id": "528",
+                "load_amount": "$3318.47",
+                "time": "2000-01-01T00:00:00Z",
+            }
+        )
+    )
+
+    memory_storage.clear_all_transactions()
+
+    # storage should now be empty
+    assert memory_storage.transactions == {}
+    assert memory_storage.customer_keys == {}
+
+
+def test__store_and_get_transaction(
+    memory_storage: InMemoryTimeSeriesStorage,
+) -> None:
+
+    memory_storage.clear_all_transactions()
+
+    # sample transaction
+    transaction = Transaction(
+        {
+            "id": "15887",
+            "customer_id": "528",
+            "load_amount": "$3318.47",
+            "time": "2000-01-01T00:00:00Z",
+        }
+    )
+
+    # Store a sample transaction
+    memory_storage.store_customer_transaction(transaction)
+
+    # Retrieve transactions for the customer within a wide time range
+    min_time = int(transaction.transaction_timetamp)
+    max_time = int(transaction.transaction_timetamp)
+
+    retrieved_transaction = memory_storage.get_customer_transactions(
+        transaction.customer_id, min_time, max_time
+    )
+
+    assert len(retrieved_transaction) == 1
+
+    # Check that the stored transaction is in the retrieved list
+    assert [tx["id"] for tx in retrieved_transaction] == [transaction.transaction_id]
+
+    # Clean up after test
+    memory_storage.clear_all_transactions()
+
+
+def test__get_transaction__date_out_of_range(
+    memory_storage: InMemoryTimeSeriesStorage,
+) -> None:
+
+    memory_storage.clear_all_transactions()
+
+    # sample transaction
+    transaction = Transaction(
+        {
+            "id": "15887",
+            "customer_id": "528",
+            "load_amount": "$3318.47",
+            "time": "2000-01-01T00:00:00Z",
+        }
+    )
+
+    # Store a sample transaction
+    memory_storage.store_customer_transaction(transaction)
+
+    # Retrieve transactions for the customer within a wide time range
+    min_time = int(transaction.transaction_timetamp) - 10
+    max_time = int(transaction.transaction_timetamp) - 1
+
+    retrieved_transaction = memory_storage.get_customer_transactions(
+        transaction.customer_id, min_time, max_time
+    )
+
+    assert len(retrieved_transaction) == 0
+
+    # Clean up after test
+    memory_storage.clear_all_transactions()
+
+
+def test__get_transactions__multiple_in_window(
+    memory_storage: InMemoryTimeSeriesStorage,
+) -> None:
+
+    memory_storage.clear_all_transactions()
+
+    # sample transactions for the same customer, one hour apart
+    transactions = [
+        Transaction(
+            {
+                "id": str(transaction_id),
+                "customer_id": "528",
+                "load_amount": "$100.00",
+                "time": f"2000-01-01T0{hour}:00:00Z",
+            }
+        )
+        for transaction_id, hour in ((1, 0), (2, 1), (3, 2))
+    ]
+
+    for transaction in transactions:
+        memory_storage.store_customer_transaction(transaction)
+
+    min_time = int(transactions[0].transaction_timetamp)
+    max_time = int(transactions[-1].transaction_timetamp)
+
+    retrieved_transaction = memory_storage.get_customer_transactions(
+        "528", min_time, max_time
+    )
+
+    # All members are fetched in one bulk read, latest first
+    assert [tx["id"] for tx in retrieved_transaction] == ["3", "2", "1"]  # type: ignore
+
+    # Clean up after test
+    memory_storage.clear_all_transactions()
+
+
+def test__store_transaction__same_id_updates_timestamp(
+    memory_storage: InMemoryTimeSeriesStorage,
+) -> None:
+
+    # Same transaction ID stored twice for a customer, as a ZADD score update
+    for time in ("2000-01-01T00:00:00Z", "2000-01-03T00:00:00Z"):
+        memory_storage.store_customer_transaction(
+            Transaction(
+                {
+                    "id": "15887",
+                    "customer_id": "528",
+                    "load_amount": "$100.00",
+                    "time": time,
+                }
+            )
+        )
+
+    assert memory_storage.customer_keys["customer:528"] == ["tx:15887"]
+
+    # The first timestamp no longer matches
+    retrieved_transaction = memory_storage.get_customer_transactions(
+        "528", 946684800, 946684800
+    )
+
+    assert len(retrieved_transaction) == 0
@@ -0,0 +1,47 @@
+from hashlib import sha256
+
+from ..src.merkle import (
+    EMPTY_ROOT,
+    MerkleAccumulator,
+    leaf_hash,
+    merkle_root,
+    node_hash,
+)
+
+
+def reference_root(leaves: list[bytes]) -> bytes:
+    """Recursive RFC 6962 definition: split at the largest power of two below n."""
+    if not leaves:
+        return sha256(b"").digest()
+    if len(leaves) == 1:
+        return leaf_hash(leaves[0])
+
+    split = 1
+    while split * 2 < len(leaves):
+        split *= 2
+
+    return node_hash(reference_root(leaves[:split]), reference_root(leaves[split:]))
+
+
+def test_empty_root() -> None:
+    assert merkle_root([]) == EMPTY_ROOT
+
+
+def test_leaf_and_node_hashes_are_domain_separated() -> None:
+    assert leaf_hash(b"a") == sha256(b"\x00a").digest()
+    assert node_hash(b"a", b"b") == sha256(b"\x01ab").digest()
+
+
+def test_incremental_root_matches_reference() -> None:
+    leaves = [str(i).encode() for i in range(33)]
+    accumulator = MerkleAccumulator()
+
+    for n, leaf in enumerate(leaves, start=1):
+        accumulator.append(leaf)
+        assert accumulator.root() == reference_root(leaves[:n])
+
+    assert accumulator.leaf_count == 33
+
+
+def test_root_depends_on_order() -> None:
+    assert merkle_root([b"a", b"b"]) != merkle_root([b"b", b"a"])
@@ -0,0 +1,162 @@
+import random
+
+from ..src.metrics import (
+    BUCKET_COUNT,
+    LatencyHistogram,
+    Metrics,
+    MetricsExporter,
+    _bucket_index,
+    _bucket_upper_bound,
+)
+from ..src.validator import Failure, Success
+
+
+def test_bucket_bounds() -> None:
+    for value in [0, 1, 31, 32, 33, 1_000, 123_456, 10**9, 2**40 - 1]:
+        index = _bucket_index(value)
+        upper_bound = _bucket_upper_bound(index)
+
+        # A value lies below its bucket's upper bound, within 1/16 of it
+        assert value < upper_bound
+        assert upper_bound - value <= max(value / 16, 1)
+        if index:
+            assert _bucket_upper_bound(index - 1) <= value
+
+    assert _bucket_index(2**60) == BUCKET_COUNT - 1
+
+
+def test_percentiles_within_relative_error() -> None:
+    rng = random.Random(0)
+    values = sorted(int(rng.lognormvariate(10, 1.5)) for _ in range(10_000))
+
+    histogram = LatencyHistogram()
+    for value in values:
+        histogram.record(value)
+
+    assert histogram.count == len(values)
+    assert histogram.total == sum(values)
+    assert histogram.max == values[-1]
+
+    for percent in [50, 90, 99, 99.9]:
+        exact = values[int(len(values) * percent / 100) - 1]
+        assert exact <= histogram.percentile(percent) <= exact * 1.0625 + 1
+
+    assert histogram.percentile(100) == values[-1]
+    assert LatencyHistogram().percentile(50) == 0
+
+
+def test_cumulative_counts() -> None:
+    histogram = LatencyHistogram()
+    for value in [10, 100, 1_000, 1_000, 10_000]:
+        histogram.record(value)
+
+    cumulative = dict(histogram.cumulative_counts())
+
+    assert cumulative[32] == 1
+    assert cumulative[128] == 2
+    assert cumulative[1024] == 4
+    # Stops at the first boundary above the max
+    assert max(cumulative) == 16384
+    assert cumulative[16384] == 5
+
+
+def test_record_transaction() -> None:
+    metrics = Metrics()
+    metrics.record_transaction(
+        Success(), parse=10, store=20, validate=30, write=40, blockchain=50
+    )
+    metrics.record_transaction(
+        Failure("Daily load limit exceeded"),
+        parse=10,
+        store=20,
+        validate=30,
+        write=40,
+        blockchain=None,
+    )
+    metrics.record_transaction(
+        Failure("Duplicate transaction ID"),
+        parse=10,
+        store=None,
+        validate=5,
+        write=40,
+        blockchain=None,
+    )
+
+    assert metrics.transactions == 3
+    assert metrics.results == {
+        None: 1,
+        "Daily load limit exceeded": 1,
+        "Duplicate transaction ID": 1,
+    }
+    assert metrics.histograms["store"].count == 2
+    assert metrics.histograms["blockchain"].count == 1
+    assert metrics.histograms["transaction"].total == 150 + 100 + 55
+
+    summary = metrics.summary()
+    assert "Processed 3 transactions" in summary
+    assert "rejected             1  Duplicate transaction ID" in summary
+
+
+def test_prometheus_format() -> None:
+    metrics = Metrics()
+    metrics.record_transaction(
+        Success(),
+        parse=1_000,
+        store=2_000,
+        validate=3_000,
+        write=4_000,
+        blockchain=None,
+    )
+    metrics.record_transaction(
+        Failure('Bad "amount"'),
+        parse=1_000,
+        store=2_000,
+        validate=3_000,
+        write=4_000,
+        blockchain=None,
+    )
+
+    lines = metrics.to_prometheus().splitlines()
+
+    assert "fund_load_transactions_total 2" in lines
+    assert 'fund_load_results_total{accepted="true",reason=""} 1' in lines
+    assert (
+        'fund_load_results_total{accepted="false",reason="Bad \\"amount\\""} 1' in lines
+    )
+    assert 'fund_load_stage_seconds_bucket{stage="parse",le="1.024e-06"} 2' in lines
+    assert 'fund_load_stage_seconds_bucket{stage="parse",le="+Inf"} 2' in lines
+    assert 'fund_load_stage_seconds_sum{stage="transaction"} 2e-05' in lines
+    assert 'fund_load_stage_seconds_count{stage="blockchain"} 0' in lines
+
+    # Every sample line is a name, optional labels and a value
+    for line in lines:
+        if not line.startswith("#"):
+            float(line.rsplit(" ", 1)[1])
+
+
+def test_exporter_writes_on_stop(tmp_path) -> None:
+    metrics = Metrics()
+    path = tmp_path / "metrics.prom"
+
+    with MetricsExporter(metrics, path, interval=60):
+        metrics.record_transaction(
+            Success(), parse=1, store=1, validate=1, write=1, blockchain=1
+        )
+
+    assert "fund_load_transactions_total 1" in path.read_text()
+    assert not path.with_suffix(".tmp").exists()
+
+
+def test_latency() -> None:
+    metrics = Metrics()
+    assert "fund_load_latency_seconds" not in metrics.to_prometheus()
+    assert "end_to_end" not in metrics.summary()
+
+    metrics.record_latency(250_000)
+    metrics.record_latency(2_000_000)
+
+    lines = metrics.to_prometheus().splitlines()
+    assert 'fund_load_latency_seconds_bucket{le="+Inf"} 2' in lines
+    assert "fund_load_latency_seconds_count 2" in lines
+    assert "fund_load_latency_seconds_sum 0.00225" in lines
+    assert "end_to_end           2     1.1ms" in metrics.summary()
@@ -0,0 +1,112 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from ..src.blockchain import BaseBlockchain
+from ..src.memory_storage import InMemoryTimeSeriesStorage
+from ..src.result_writer import ValidationResultWriter
+from ..src.pipeline import run_pipeline
+from ..src.transactions import Transaction
+from ..src.validator import Success, TransactionValidator
+
+PIPELINE_TRANSACTIONS_DATA = [
+    {
+        "id": str(transaction_id),
+        "customer_id": str(transaction_id % 3),
+        "load_amount": f"${1000 + transaction_id * 100}.00",
+        "time": f"2000-01-{3 + transaction_id // 5:02d}T{transaction_id % 24:02d}:00:00Z",
+    }
+    for transaction_id in range(30)
+]
+
+
+def write_input(path: Path, rows: list[dict[str, str]]) -> None:
+    with open(path, "w") as f:
+        for row in rows:
+            f.write(json.dumps(row, separators=(",", ":")) + "\n")
+        # Blank lines are skipped
+        f.write("\n")
+
+
+def run_sequential(input_path: Path, output_folder: Path) -> None:
+    storage = InMemoryTimeSeriesStorage()
+    validator = TransactionValidator(storage)
+
+    with BaseBlockchain(
+        storage_path=str(output_folder / "blockchain")
+    ) as blockchain, ValidationResultWriter(output_folder) as result_writer:
+        for line in open(input_path):
+            if not line.strip():
+                continue
+            transaction = Transaction(json.loads(line))
+            storage.store_customer_transaction(transaction)
+            result = validator.validate_transaction(transaction)
+            result_writer.write(transaction, result)
+            if isinstance(result, Success):
+                blockchain.add_transaction(transaction)
+
+
+def run_async(input_path: Path, output_folder: Path, **kwargs):
+    storage = InMemoryTimeSeriesStorage()
+
+    with BaseBlockchain(
+        storage_path=str(output_folder / "blockchain")
+    ) as blockchain, ValidationResultWriter(output_folder) as result_writer:
+        return asyncio.run(
+            run_pipeline(
+                str(input_path),
+                storage,
+                TransactionValidator(storage),
+                result_writer,
+                blockchain,
+                **kwargs,
+            )
+        )
+
+
+@pytest.mark.parametrize("batch_size, queue_size", [(1, 1), (7, 2), (256, 8)])
+def test_pipeline_matches_sequential(
+    tmp_path: Path, batch_size: int, queue_size: int
+) -> None:
+    input_path = tmp_path / "input.txt"
+    write_input(input_path, PIPELINE_TRANSACTIONS_DATA)
+
+    (tmp_path / "sequential").mkdir()
+    (tmp_path / "async").mkdir()
+    run_sequential(input_path, tmp_path / "sequential")
+    stats = run_async(
+        input_path, tmp_path / "async", batch_size=batch_size, queue_size=queue_size
+    )
+
+    for name in ["output.txt", "output_with_detail.jsonl"]:
+        assert (tmp_path / "async" / name).read_text() == (
+            tmp_path / "sequential" / name
+        ).read_text()
+
+    chains = [
+        [
+            block["transactions"]
+            for block in BaseBlockchain(
+                storage_path=str(tmp_path / folder / "blockchain")
+            ).get_chain()
+        ]
+        for folder in ["sequential", "async"]
+    ]
+    assert chains[0] == chains[1]
+
+    assert stats.stages["reader"].items == 31
+    assert stats.stages["validator"].items == 30
+    assert stats.stages["blockchain"].items == sum(len(block) for block in chains[0])
+    assert stats.stages["parser"].max_queue_depth <= queue_size
+
+
+def test_pipeline_raises_stage_error(tmp_path: Path) -> None:
+    input_path = tmp_path / "input.txt"
+    write_input(input_path, PIPELINE_TRANSACTIONS_DATA[:3])
+    with open(input_path, "a") as f:
+        f.write('{"id": "x"}\n')
+
+    with pytest.raises(ValueError):
+        run_async(input_path, tmp_path, batch_size=1)
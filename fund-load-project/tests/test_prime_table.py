@@ -0,0 +1,66 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from ..src.prime_table import (
+    PRIME_TABLE_HEADER,
+    PRIME_TABLE_MAGIC,
+    generate_prime_sieve,
+    is_prime_in_sieve,
+    is_prime_miller_rabin,
+    load_prime_sieve,
+)
+
+
+def test__prime_sieve__matches_miller_rabin():
+    sieve = generate_prime_sieve(10_000)
+
+    for n in range(10_000):
+        assert is_prime_in_sieve(sieve, n) is is_prime_miller_rabin(n)
+
+
+def test__load_prime_sieve__writes_and_maps_cache(tmp_path: Path):
+    path = str(tmp_path / "cache" / "prime_table.bin")
+
+    sieve = load_prime_sieve(path, 1_000)
+
+    assert os.path.exists(path)
+    assert isinstance(sieve, memoryview)
+    assert bytes(sieve) == bytes(generate_prime_sieve(1_000))
+
+    # A second load maps the existing file without rewriting it
+    modified_time = os.stat(path).st_mtime_ns
+    assert bytes(load_prime_sieve(path, 500)) == bytes(sieve)
+    assert os.stat(path).st_mtime_ns == modified_time
+
+
+def test__load_prime_sieve__regenerates_when_limit_grows(tmp_path: Path):
+    path = str(tmp_path / "prime_table.bin")
+
+    load_prime_sieve(path, 1_000)
+    sieve = load_prime_sieve(path, 2_000)
+
+    assert len(sieve) == 1_000
+    assert is_prime_in_sieve(sieve, 1_999) is True
+
+
+def test__load_prime_sieve__regenerates_other_version(tmp_path: Path):
+    path = tmp_path / "prime_table.bin"
+
+    # Table written by an unknown format version
+    path.write_bytes(PRIME_TABLE_HEADER.pack(PRIME_TABLE_MAGIC, 999, 100) + bytes(50))
+
+    sieve = load_prime_sieve(str(path), 100)
+
+    assert is_prime_in_sieve(sieve, 97) is True
+
+
+@pytest.mark.parametrize("content", [b"", b"not a prime table"])
+def test__load_prime_sieve__regenerates_corrupt_file(tmp_path: Path, content: bytes):
+    path = tmp_path / "prime_table.bin"
+    path.write_bytes(content)
+
+    sieve = load_prime_sieve(str(path), 100)
+
+    assert is_prime_in_sieve(sieve, 89) is True
@@ -0,0 +1,76 @@
+import time
+
+from ..src.profiling import (
+    PROFILE_REPORT_FILE,
+    PROFILE_STACKS_FILE,
+    PROFILE_STATS_FILE,
+    DeterministicProfiler,
+    SamplingProfiler,
+)
+
+
+def _inner(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+def _outer(rounds: int) -> int:
+    total = 0
+    for _ in range(rounds):
+        total += _inner(10_000)
+
+    return total
+
+
+def _calls(stack: str, caller: str, callee: str) -> bool:
+    """Whether a collapsed stack has ``caller`` directly calling ``callee``."""
+
+    names = [frame.split(" ")[0] for frame in stack.split(";")]
+    return any(pair == (caller, callee) for pair in zip(names, names[1:]))
+
+
+def test_deterministic_profiler(tmp_path) -> None:
+    with DeterministicProfiler() as profiler:
+        _outer(20)
+
+    stacks = profiler.collapsed_stacks()
+
+    assert any(_calls(stack, "_outer", "_inner") for stack in stacks)
+    assert all(weight > 0 for weight in stacks.values())
+
+    report = profiler.save(tmp_path, top=5)
+
+    assert "_inner" in report
+    assert (tmp_path / PROFILE_STATS_FILE).exists()
+    assert (tmp_path / PROFILE_REPORT_FILE).read_text() == report
+
+    lines = (tmp_path / PROFILE_STACKS_FILE).read_text().splitlines()
+    assert len(lines) == len(stacks)
+    # "frame;frame weight" lines
+    stack, weight = lines[0].rsplit(" ", 1)
+    assert stacks[stack] == int(weight)
+
+
+def test_sampling_profiler(tmp_path) -> None:
+    profiler = SamplingProfiler(interval=0.001)
+
+    with profiler:
+        end = time.process_time() + 0.2
+        while time.process_time() < end:
+            _outer(1)
+
+    # Sampling stops with the profiler
+    samples = profiler.samples
+    _outer(20)
+    assert profiler.samples == samples
+
+    assert samples > 20
+    stacks = profiler.collapsed_stacks()
+    assert sum(stacks.values()) == samples
+    assert any(_calls(stack, "_outer", "_inner") for stack in stacks)
+
+    report = profiler.save(tmp_path, top=3)
+
+    assert report.startswith(f"{samples} samples every 1 ms")
+    assert len(report.splitlines()) <= 5
+    assert "(test_profiling.py:" in report
+    assert not (tmp_path / PROFILE_STATS_FILE).exists()
@@ -43,7 +43,7 @@ def test__store_and_get_transaction(
     assert len(retrieved_transaction) == 1
 
     # Check that the stored transaction is in the retrieved list
-    assert [tx["id"] == transaction.transaction_id for tx in retrieved_transaction]  # type: ignore
+    assert [tx["id"] for tx in retrieved_transaction] == [transaction.transaction_id]
 
     # Clean up after test
     redis_storage.clear_all_transactions()
@@ -80,3 +80,39 @@ def test__get_transaction__date_out_of_range(
 
     # Clean up after test
     redis_storage.clear_all_transactions()
+
+
+def test__get_transactions__multiple_in_window(
+    redis_storage: RedisTimeSeriesStorage,
+) -> None:
+
+    redis_storage.clear_all_transactions()
+
+    # sample transactions for the same customer, one hour apart
+    transactions = [
+        Transaction(
+            {
+                "id": str(transaction_id),
+                "customer_id": "528",
+                "load_amount": "$100.00",
+                "time": f"2000-01-01T0{hour}:00:00Z",
+            }
+        )
+        for transaction_id, hour in ((1, 0), (2, 1), (3, 2))
+    ]
+
+    for transaction in transactions:
+        redis_storage.store_customer_transaction(transaction)
+
+    min_time = int(transactions[0].transaction_timetamp)
+    max_time = int(transactions[-1].transaction_timetamp)
+
+    retrieved_transaction = redis_storage.get_customer_transactions(
+        "528", min_time, max_time
+    )
+
+    # All members are fetched in one bulk read, latest first
+    assert [tx["id"] for tx in retrieved_transaction] == ["3", "2", "1"]  # type: ignore
+
+    # Clean up after test
+    redis_storage.clear_all_transactions()
@@ -0,0 +1,114 @@
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from ..src.blockchain import BaseBlockchain
+from ..src.main import exit_on_sigterm, parse_args, run_live_input
+from ..src.memory_storage import InMemoryTimeSeriesStorage
+from ..src.metrics import Metrics
+from ..src.result_writer import ValidationResultWriter
+from ..src.transactions import Transaction
+from ..src.validator import Failure, Success, TransactionValidator
+
+TRANSACTION = Transaction(
+    {
+        "id": "15887",
+        "customer_id": "528",
+        "load_amount": "$3318.47",
+        "time": "2000-01-01T00:00:00Z",
+    }
+)
+
+
+def read_lines(path: Path) -> list[str]:
+    with open(path) as f:
+        return f.readlines()
+
+
+def test_writes_result_lines(tmp_path: Path) -> None:
+    with ValidationResultWriter(tmp_path) as writer:
+        writer.write(TRANSACTION, Success())
+        writer.write(TRANSACTION, Failure("Normal ID: daily total exceeds 5,000"))
+
+    assert read_lines(tmp_path / "output.txt") == [
+        '{"id":"15887","customer_id":"528","accepted":true}\n',
+        '{"id":"15887","customer_id":"528","accepted":false}\n',
+    ]
+    assert read_lines(tmp_path / "output_with_detail.jsonl") == [
+        '{"id": "15887", "customer_id": "528", "accepted": true, "details": "Transaction valid"}\n',
+        '{"id": "15887", "customer_id": "528", "accepted": false, "details": "Normal ID: daily total exceeds 5,000"}\n',
+    ]
+
+
+def test_flush_every_records(tmp_path: Path) -> None:
+    writer = ValidationResultWriter(tmp_path, flush_every=2)
+
+    writer.write(TRANSACTION, Success())
+    assert read_lines(tmp_path / "output.txt") == []
+
+    writer.write(TRANSACTION, Success())
+    assert len(read_lines(tmp_path / "output.txt")) == 2
+    assert len(read_lines(tmp_path / "output_with_detail.jsonl")) == 2
+
+    writer.close()
+    writer.close()
+    assert writer.closed
+
+
+def test_flush_interval(tmp_path: Path) -> None:
+    with ValidationResultWriter(tmp_path, flush_interval=0) as writer:
+        writer.write(TRANSACTION, Success())
+        assert len(read_lines(tmp_path / "output.txt")) == 1
+
+
+def test_sigterm_flushes_buffered_results(tmp_path: Path) -> None:
+    with pytest.raises(SystemExit):
+        with exit_on_sigterm(), ValidationResultWriter(tmp_path) as writer:
+            writer.write(TRANSACTION, Success())
+            os.kill(os.getpid(), signal.SIGTERM)
+
+    assert len(read_lines(tmp_path / "output.txt")) == 1
+    assert signal.getsignal(signal.SIGTERM) is signal.SIG_DFL
+
+
+def test_live_input_flushes_results_while_idle(tmp_path: Path) -> None:
+    input_path = tmp_path / "input.txt"
+    input_path.write_text(
+        '{"id":"15887","customer_id":"528","load_amount":"$3318.47",'
+        '"time":"2000-01-01T00:00:00Z"}\n'
+    )
+    args = parse_args(
+        ["--input", str(input_path), "--follow", "--follow-timeout", "1"]
+        # Far longer than the test: the interval alone never flushes
+        + ["--flush-interval-ms", "3600000"]
+    )
+    storage = InMemoryTimeSeriesStorage()
+
+    with BaseBlockchain(
+        storage_path=str(tmp_path / "blockchain")
+    ) as blockchain, ValidationResultWriter(tmp_path, flush_interval=3600) as writer:
+        follower = threading.Thread(
+            target=run_live_input,
+            args=(
+                args,
+                storage,
+                TransactionValidator(storage),
+                writer,
+                blockchain,
+                Metrics(),
+            ),
+        )
+        follower.start()
+
+        # Visible while the input is idle, long before following stops
+        deadline = time.monotonic() + 0.8
+        while not read_lines(tmp_path / "output.txt"):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert follower.is_alive()
+
+        follower.join()
@@ -0,0 +1,292 @@
+import asyncio
+import json
+from pathlib import Path
+
+import pytest
+
+from ..src.blockchain import BaseBlockchain
+from ..src.memory_storage import InMemoryTimeSeriesStorage
+from ..src.pipeline import BatchValidationError
+from ..src.result_writer import ValidationResultWriter
+from ..src.service import MicroBatcher, Overloaded, ValidationService
+from ..src.validator import TransactionValidator
+
+
+def load(transaction_id: int, customer_id: str = "1", hour: int = 0) -> dict:
+    return {
+        "id": str(transaction_id),
+        "customer_id": customer_id,
+        "load_amount": "$100.00",
+        # A Tuesday
+        "time": f"2000-01-04T{hour:02d}:00:00Z",
+    }
+
+
+def test_micro_batcher_coalesces_in_order() -> None:
+    batches = []
+
+    async def validate(transactions):
+        batches.append(list(transactions))
+        return [f"result {transaction}" for transaction in transactions]
+
+    async def run():
+        batcher = MicroBatcher(validate, batch_size=3)
+        # Submitted before the consumer runs, as by concurrent requests
+        first = batcher.submit(["a", "b"])
+        second = batcher.submit(["c", "d", "e"])
+
+        task = asyncio.create_task(batcher.run())
+        results = await asyncio.gather(*first, *second)
+        task.cancel()
+
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+
+    assert batches == [["a", "b", "c"], ["d", "e"]]
+    assert results == [f"result {item}" for item in "abcde"]
+    assert (batcher.batches, batcher.transactions, batcher.max_batch_size) == (
+        2,
+        5,
+        3,
+    )
+
+
+def test_micro_batcher_backpressure_and_errors() -> None:
+    async def validate(transactions):
+        if "bad" in transactions:
+            raise ValueError("storage down")
+        return transactions
+
+    async def run():
+        batcher = MicroBatcher(validate, batch_size=2, capacity=3)
+        failing = batcher.submit(["bad", "x"])
+
+        # Requests are admitted as a whole or not at all
+        with pytest.raises(Overloaded):
+            batcher.submit(["y", "z"])
+        assert batcher.overloaded == 1
+        assert len(batcher.pending) == 2
+
+        task = asyncio.create_task(batcher.run())
+        with pytest.raises(ValueError, match="storage down"):
+            await asyncio.gather(*failing)
+
+        # The next batch is still served
+        results = await asyncio.gather(*batcher.submit(["y", "z"]))
+        task.cancel()
+
+        return results
+
+    assert asyncio.run(run()) == ["y", "z"]
+
+
+def test_micro_batcher_keeps_results_before_a_failure() -> None:
+    async def validate(transactions):
+        try:
+            raise ValueError("storage down")
+        except ValueError as error:
+            raise BatchValidationError(["result a"]) from error
+
+    async def run():
+        batcher = MicroBatcher(validate, batch_size=3)
+        # Requests in the same batch, the first one validated before the failure
+        first = batcher.submit(["a"])
+        second = batcher.submit(["b", "c"])
+
+        task = asyncio.create_task(batcher.run())
+        results = await asyncio.gather(*first, *second, return_exceptions=True)
+        task.cancel()
+
+        return results
+
+    first, second, third = asyncio.run(run())
+
+    assert first == "result a"
+    assert isinstance(second, ValueError) and isinstance(third, ValueError)
+
+
+async def raw_request(port: int, request: bytes) -> list[int]:
+    """Status codes of every response to raw request bytes."""
+
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(request)
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+
+    return [
+        int(line.split()[1])
+        for line in response.split(b"\r\n")
+        if line.startswith(b"HTTP/1.1 ")
+    ]
+
+
+async def http_request(port: int, method: str, path: str, body: bytes = b""):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n".encode() + body
+    )
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+
+    head, _, response_body = response.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(response_body)
+
+
+def test_service(tmp_path: Path) -> None:
+    storage = InMemoryTimeSeriesStorage()
+    validator = TransactionValidator(storage)
+
+    async def run(result_writer, blockchain):
+        service = ValidationService(storage, validator, result_writer, blockchain)
+        stop = asyncio.Event()
+        task = asyncio.create_task(service.serve("127.0.0.1", 0, stop))
+        while service.address is None:
+            await asyncio.sleep(0.01)
+        port = service.address[1]
+
+        single = await http_request(
+            port, "POST", "/transactions", json.dumps(load(4)).encode()
+        )
+        # Concurrent requests for other customers
+        batches = await asyncio.gather(
+            *(
+                http_request(
+                    port,
+                    "POST",
+                    "/transactions",
+                    json.dumps(
+                        [
+                            load(n, customer_id, hour=n % 24)
+                            for n in range(start, start + 8, 2)
+                        ]
+                    ).encode(),
+                )
+                for customer_id, start in [("2", 100), ("3", 200)]
+            )
+        )
+        invalid = await http_request(port, "POST", "/transactions", b'{"id": "1"}')
+        chunked = await raw_request(
+            port,
+            b"POST /transactions HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n"
+            b"5\r\nhello\r\n0\r\n\r\n",
+        )
+        not_found = await http_request(port, "GET", "/missing")
+        stats = await http_request(port, "GET", "/stats")
+
+        stop.set()
+        await task
+
+        return single, batches, invalid, chunked, not_found, stats
+
+    with BaseBlockchain(
+        storage_path=str(tmp_path / "blockchain")
+    ) as blockchain, ValidationResultWriter(tmp_path) as result_writer:
+        single, batches, invalid, chunked, not_found, stats = asyncio.run(
+            run(result_writer, blockchain)
+        )
+
+        assert single == (
+            200,
+            {
+                "id": "4",
+                "customer_id": "1",
+                "accepted": True,
+                "details": "Transaction valid",
+            },
+        )
+
+        for status, results in batches:
+            assert status == 200
+            # A fourth daily load is rejected, so order was kept
+            assert [result["accepted"] for result in results] == [
+                True,
+                True,
+                True,
+                False,
+            ]
+            assert results[3]["details"] == (
+                "Normal ID: more than three daily transactions"
+            )
+
+        assert invalid[0] == 400
+        # Answered once, the rest of the body is not read as another request
+        assert chunked == [501]
+        assert not_found[0] == 404
+
+        status, stats = stats
+        assert status == 200
+        assert stats["transactions"] == 9
+        assert stats["overloaded_requests"] == 0
+        assert stats["queued_transactions"] == 0
+
+        # Results are in the output files once answered
+        assert len((tmp_path / "output.txt").read_text().splitlines()) == 9
+        assert len(blockchain.chain) == 7
+
+
+class FailingStorage(InMemoryTimeSeriesStorage):
+    def store_customer_transaction(self, transaction) -> None:
+        if transaction.transaction_id == "13":
+            raise RuntimeError("storage down")
+        super().store_customer_transaction(transaction)
+
+
+def test_service_answers_failed_validation_with_error(tmp_path: Path) -> None:
+    storage = FailingStorage()
+    validator = TransactionValidator(storage)
+
+    async def run(result_writer, blockchain):
+        service = ValidationService(storage, validator, result_writer, blockchain)
+        stop = asyncio.Event()
+        task = asyncio.create_task(service.serve("127.0.0.1", 0, stop))
+        while service.address is None:
+            await asyncio.sleep(0.01)
+        port = service.address[1]
+
+        failed = await http_request(
+            port, "POST", "/transactions", json.dumps([load(12), load(13)]).encode()
+        )
+        # Later batches are still validated
+        after = await http_request(
+            port, "POST", "/transactions", json.dumps(load(14)).encode()
+        )
+
+        stop.set()
+        await task
+
+        return failed, after
+
+    with BaseBlockchain(
+        storage_path=str(tmp_path / "blockchain")
+    ) as blockchain, ValidationResultWriter(tmp_path) as result_writer:
+        failed, after = asyncio.run(run(result_writer, blockchain))
+
+    # The load stored before the failure is answered, so it is not sent again
+    assert failed == (
+        500,
+        {
+            "error": "Validation failed: storage down",
+            "results": [
+                {
+                    "id": "12",
+                    "customer_id": "1",
+                    "accepted": True,
+                    "details": "Transaction valid",
+                }
+            ],
+        },
+    )
+    assert after[0] == 200
+    assert after[1]["accepted"] is True
+
+    # Recorded like any other result
+    assert [
+        json.loads(line)["id"]
+        for line in (tmp_path / "output_with_detail.jsonl").read_text().splitlines()
+    ] == ["12", "14"]
@@ -0,0 +1,138 @@
+import json
+import threading
+from pathlib import Path
+
+import pytest
+
+from ..src.blockchain import BaseBlockchain
+from ..src.result_writer import ValidationResultWriter
+from ..src.sharding import customer_shards, run_sharded
+from .test_pipeline import PIPELINE_TRANSACTIONS_DATA, run_sequential, write_input
+
+# Transaction IDs 0-4 reused by other customers, sharing their storage keys
+SHARDING_TRANSACTIONS_DATA = PIPELINE_TRANSACTIONS_DATA + [
+    {**row, "customer_id": str(10 + int(row["id"]))}
+    for row in PIPELINE_TRANSACTIONS_DATA[:5]
+]
+
+
+def test_customers_sharing_ids_share_a_shard(tmp_path: Path) -> None:
+    input_path = tmp_path / "input.txt"
+    write_input(input_path, SHARDING_TRANSACTIONS_DATA)
+
+    shards = customer_shards(str(input_path), 4)
+
+    assert set(shards) == {"0", "1", "2", "10", "11", "12", "13", "14"}
+    # Customer 10 + n reuses ID n, which belongs to customer n % 3
+    assert shards["0"] == shards["10"] == shards["13"]
+    assert shards["1"] == shards["11"] == shards["14"]
+    assert shards["2"] == shards["12"]
+
+
+def test_independent_customers_spread_over_shards(tmp_path: Path) -> None:
+    input_path = tmp_path / "input.txt"
+    write_input(
+        input_path,
+        [
+            {**PIPELINE_TRANSACTIONS_DATA[0], "id": str(n), "customer_id": str(n)}
+            for n in range(100)
+        ],
+    )
+
+    shards = customer_shards(str(input_path), 4)
+
+    assert set(shards.values()) == {0, 1, 2, 3}
+
+
+@pytest.mark.parametrize("workers, chunk_lines", [(1, 50_000), (3, 4)])
+def test_sharded_matches_sequential(
+    tmp_path: Path, workers: int, chunk_lines: int
+) -> None:
+    input_path = tmp_path / "input.txt"
+    write_input(input_path, SHARDING_TRANSACTIONS_DATA)
+
+    (tmp_path / "sequential").mkdir()
+    (tmp_path / "sharded").mkdir()
+    run_sequential(input_path, tmp_path / "sequential")
+
+    with BaseBlockchain(
+        storage_path=str(tmp_path / "sharded" / "blockchain")
+    ) as blockchain, ValidationResultWriter(tmp_path / "sharded") as result_writer:
+        processed = run_sharded(
+            str(input_path),
+            workers,
+            result_writer,
+            blockchain,
+            chunk_lines=chunk_lines,
+        )
+
+    assert processed == len(SHARDING_TRANSACTIONS_DATA)
+
+    for name in ["output.txt", "output_with_detail.jsonl"]:
+        assert (tmp_path / "sharded" / name).read_text() == (
+            tmp_path / "sequential" / name
+        ).read_text()
+
+    chains = [
+        [
+            block["transactions"]
+            for block in BaseBlockchain(
+                storage_path=str(tmp_path / folder / "blockchain")
+            ).get_chain()
+        ]
+        for folder in ["sequential", "sharded"]
+    ]
+    assert chains[0] == chains[1]
+
+
+def test_sharded_raises_worker_error(tmp_path: Path) -> None:
+    input_path = tmp_path / "input.txt"
+    write_input(input_path, PIPELINE_TRANSACTIONS_DATA[:3])
+    with open(input_path, "a") as f:
+        f.write(json.dumps({"id": "x", "customer_id": "0"}) + "\n")
+
+    with BaseBlockchain(
+        storage_path=str(tmp_path / "blockchain")
+    ) as blockchain, ValidationResultWriter(tmp_path) as result_writer:
+        with pytest.raises(ValueError):
+            run_sharded(str(input_path), 2, result_writer, blockchain)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_sharded_rounds_larger_than_pipe_buffer(tmp_path: Path, workers: int) -> None:
+    # Long customer IDs make every round's lines and results exceed the pipe
+    # buffer, so workers send results while the next round is being sent
+    rows = [
+        {
+            **PIPELINE_TRANSACTIONS_DATA[0],
+            "id": str(n),
+            "customer_id": "9" * 1000 + str(n),
+        }
+        for n in range(2000)
+    ]
+    input_path = tmp_path / "input.txt"
+    write_input(input_path, rows)
+
+    def run() -> None:
+        with BaseBlockchain(
+            storage_path=str(tmp_path / "blockchain")
+        ) as blockchain, ValidationResultWriter(tmp_path) as result_writer:
+            processed.append(
+                run_sharded(
+                    str(input_path),
+                    workers,
+                    result_writer,
+                    blockchain,
+                    chunk_lines=500,
+                )
+            )
+
+    processed: list[int] = []
+    # A deadlocked run would never return
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=60)
+
+    assert not thread.is_alive()
+    assert processed == [len(rows)]
+    assert len((tmp_path / "output.txt").read_text().splitlines()) == len(rows)
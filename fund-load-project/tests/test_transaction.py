@@ -170,3 +170,85 @@ def test__invalid_transaction__invalid_time_field():
         match=f"Invalid timestamp format: {invalid_transaction_data['time']}",
     ):
         Transaction(invalid_transaction_data)
+
+
+def test__valid_transaction__parsed_fields():
+
+    transaction = Transaction(
+        {
+            "id": "15887",
+            "customer_id": "528",
+            "load_amount": "USD$3318.47",
+            "time": "2000-01-03T04:05:06Z",
+        }
+    )
+
+    assert transaction.load_amount == 3318.47
+    assert str(transaction.transaction_datetime) == "2000-01-03 04:05:06"
+    assert str(transaction.transaction_date) == "2000-01-03"
+    assert str(transaction.transaction_time) == "04:05:06"
+
+
+def test__valid_transaction__unpadded_time_field():
+
+    # Accepted by strptime, so the fast path must fall back to it
+    transaction = Transaction(
+        {
+            "id": "15887",
+            "customer_id": "528",
+            "load_amount": "$3318.47",
+            "time": "2000-1-3T4:5:6Z",
+        }
+    )
+
+    assert str(transaction.transaction_datetime) == "2000-01-03 04:05:06"
+
+
+@pytest.mark.parametrize(
+    "time", ["2000-13-01T00:00:00Z", "2000-02-30T00:00:00Z", "2000-01-01T00:00:00Z\n"]
+)
+def test__invalid_transaction__out_of_range_time_field(time: str):
+
+    invalid_transaction_data = {
+        "id": "15887",
+        "customer_id": "528",
+        "load_amount": "$3318.47",
+        "time": time,
+    }
+
+    with pytest.raises(ValueError, match="Invalid timestamp format"):
+        Transaction(invalid_transaction_data)
+
+
+def test__valid_transaction__compact_representation():
+
+    transaction = Transaction(
+        {
+            "id": "15887",
+            "customer_id": "528",
+            "load_amount": "$0.29",
+            "time": "2000-01-01T00:00:01Z",
+        }
+    )
+
+    # Integer cents and epoch seconds, no per-instance __dict__
+    assert transaction.load_amount_cents == 29
+    assert transaction.transaction_timetamp == 946684801
+    assert not hasattr(transaction, "__dict__")
+
+
+def test__transaction__to_dict_from_dict_round_trip():
+
+    transaction = Transaction(
+        {
+            "id": "15887",
+            "customer_id": "528",
+            "load_amount": "$3318.40",
+            "time": "2000-01-01T10:20:30Z",
+        }
+    )
+
+    restored = Transaction.from_dict(transaction.to_dict())
+
+    assert restored.to_dict() == transaction.to_dict()
+    assert restored.load_amount_cents == 331840
@@ -1,11 +1,15 @@
 from ..src.transactions import Transaction
+import pytest
+
+from ..src.bloom_filter import BloomFilter
+from ..src.memory_storage import InMemoryTimeSeriesStorage
 from ..src.redis_storage import RedisTimeSeriesStorage
+from ..src.storage import TransactionStorage
 from ..src.validator import TransactionValidator
 
 
-def test__is_id_prime():
+def test__is_id_prime(storage: TransactionStorage):
     """Test the _is_prime helper function."""
-    storage = RedisTimeSeriesStorage()
     storage.clear_all_transactions()
     validator = TransactionValidator(storage)
 
@@ -24,11 +28,28 @@ def test__is_id_prime():
     assert validator._is_prime(25703) is True  # type: ignore
 
 
-def test__is_monday():
+def test__is_id_prime__above_prime_limit(storage: TransactionStorage):
+    """IDs beyond the sieve fall back to Miller-Rabin."""
+    validator = TransactionValidator(storage, prime_limit=100)
+
+    assert validator._is_prime("97") is True  # type: ignore
+    assert validator._is_prime("101") is True  # type: ignore
+    assert validator._is_prime("1000003") is True  # type: ignore
+    assert (
+        validator._is_prime("2305843009213693951") is True
+    )  # 2**61 - 1 # type: ignore
+
+    assert validator._is_prime("100") is False  # type: ignore
+    assert validator._is_prime("1000001") is False  # type: ignore
+    assert (
+        validator._is_prime("3215031751") is False
+    )  # strong pseudoprime # type: ignore
+
+
+def test__is_monday(storage: TransactionStorage):
     """Test the _is_monday helper function."""
     from datetime import date
 
-    storage = RedisTimeSeriesStorage()
     storage.clear_all_transactions()
 
     validator = TransactionValidator(storage)
@@ -44,9 +65,8 @@ def test__is_monday():
     assert validator._is_monday(date(2025, 8, 18)) is True  # Monday # type: ignore
 
 
-def test__get_daily_transactions():
+def test__get_daily_transactions(storage: TransactionStorage):
 
-    storage = RedisTimeSeriesStorage()
     storage.clear_all_transactions()
 
     validator = TransactionValidator(storage)
@@ -97,9 +117,8 @@ def test__get_daily_transactions():
     storage.clear_all_transactions()
 
 
-def test__get_weekly_transactions():
+def test__get_weekly_transactions(storage: TransactionStorage):
 
-    storage = RedisTimeSeriesStorage()
     storage.clear_all_transactions()
 
     validator = TransactionValidator(storage)
@@ -156,9 +175,8 @@ def test__get_weekly_transactions():
     storage.clear_all_transactions()
 
 
-def test__get_daily_transaction_count():
+def test__get_daily_transaction_count(storage: TransactionStorage):
 
-    storage = RedisTimeSeriesStorage()
     storage.clear_all_transactions()
 
     validator = TransactionValidator(storage)
@@ -210,9 +228,8 @@ def test__get_daily_transaction_count():
     storage.clear_all_transactions()
 
 
-def test__daily_total_load_amount__no_mondays():
+def test__daily_total_load_amount__no_mondays(storage: TransactionStorage):
 
-    storage = RedisTimeSeriesStorage()
     storage.clear_all_transactions()
 
     validator = TransactionValidator(storage)
@@ -270,9 +287,8 @@ def test__daily_total_load_amount__no_mondays():
     storage.clear_all_transactions()
 
 
-def test__daily_total_load_amount__with_mondays():
+def test__daily_total_load_amount__with_mondays(storage: TransactionStorage):
 
-    storage = RedisTimeSeriesStorage()
     storage.clear_all_transactions()
 
     validator = TransactionValidator(storage)
@@ -330,9 +346,8 @@ def test__daily_total_load_amount__with_mondays():
     storage.clear_all_transactions()
 
 
-def test__weekly_total_load_amount__no_mondays():
+def test__weekly_total_load_amount__no_mondays(storage: TransactionStorage):
 
-    storage = RedisTimeSeriesStorage()
     storage.clear_all_transactions()
 
     validator = TransactionValidator(storage)
@@ -390,9 +405,8 @@ def test__weekly_total_load_amount__no_mondays():
     storage.clear_all_transactions()
 
 
-def test__weekly_total_load_amount__with_mondays():
+def test__weekly_total_load_amount__with_mondays(storage: TransactionStorage):
 
-    storage = RedisTimeSeriesStorage()
     storage.clear_all_transactions()
 
     validator = TransactionValidator(storage)
@@ -448,3 +462,161 @@ def test__weekly_total_load_amount__with_mondays():
     assert weekly_total == 500
 
     storage.clear_all_transactions()
+
+
+RULES_TRANSACTIONS_DATA = [
+    ("1", "$3000.00", "2025-08-15T00:00:00Z"),
+    ("4", "$1500.00", "2025-08-15T10:00:00Z"),
+    ("6", "$600.00", "2025-08-15T11:00:00Z"),
+    ("8", "$100.00", "2025-08-15T12:00:00Z"),
+    ("9", "$4000.00", "2025-08-18T00:00:00Z"),  # Monday, counts double
+    ("10", "$3000.00", "2025-08-19T00:00:00Z"),
+    ("12", "$100.00", "2025-08-14T00:00:00Z"),  # out of order
+    ("14", "$4000.00", "2025-08-20T00:00:00Z"),
+    ("15", "$100.00", "2025-08-23T00:00:00Z"),
+]
+
+
+def test__validate_transaction__rolling_aggregates_match_storage(
+    storage: TransactionStorage,
+):
+
+    storage.clear_all_transactions()
+
+    # Same storage, one validator per strategy
+    rolling_validator = TransactionValidator(storage, rolling_aggregates=True)
+    storage_validator = TransactionValidator(storage, rolling_aggregates=False)
+
+    for transaction_id, load_amount, time in RULES_TRANSACTIONS_DATA:
+        transaction = Transaction(
+            {
+                "id": transaction_id,
+                "customer_id": "1",
+                "load_amount": load_amount,
+                "time": time,
+            }
+        )
+        storage.store_customer_transaction(transaction)
+
+        rolling_result = rolling_validator.validate_transaction(transaction)
+        storage_result = storage_validator.validate_transaction(transaction)
+
+        assert type(rolling_result) is type(storage_result)
+        assert getattr(rolling_result, "message", None) == getattr(
+            storage_result, "message", None
+        )
+
+    storage.clear_all_transactions()
+
+
+def test__validate_and_store_transaction__matches_validate_transaction(
+    redis_storage: RedisTimeSeriesStorage,
+):
+
+    validator = TransactionValidator(redis_storage)
+
+    transactions = [
+        Transaction(
+            {
+                "id": transaction_id,
+                "customer_id": "1",
+                "load_amount": load_amount,
+                "time": time,
+            }
+        )
+        for transaction_id, load_amount, time in RULES_TRANSACTIONS_DATA
+    ]
+
+    # Client-side store then validate
+    redis_storage.clear_all_transactions()
+    expected_results = []
+    for transaction in transactions:
+        redis_storage.store_customer_transaction(transaction)
+        expected_results.append(validator.validate_transaction(transaction))
+
+    # Server-side atomic validate and store
+    redis_storage.clear_all_transactions()
+    for transaction, expected_result in zip(transactions, expected_results):
+        result = validator.validate_and_store_transaction(transaction)
+
+        assert type(result) is type(expected_result)
+        assert getattr(result, "message", None) == getattr(
+            expected_result, "message", None
+        )
+
+    redis_storage.clear_all_transactions()
+
+
+def test__validate_and_store_transaction__unsupported_storage(
+    memory_storage: InMemoryTimeSeriesStorage,
+):
+
+    validator = TransactionValidator(memory_storage)
+
+    transaction = Transaction(
+        {
+            "id": "1",
+            "customer_id": "1",
+            "load_amount": "$100.00",
+            "time": "2025-08-15T00:00:00Z",
+        }
+    )
+
+    with pytest.raises(TypeError, match="does not support atomic validation"):
+        validator.validate_and_store_transaction(transaction)
+
+
+@pytest.mark.parametrize("capacity", [1, 1000])
+def test__check_duplicate(storage: TransactionStorage, capacity: int):
+    """Repeated IDs are rejected; a saturated filter falls back to exact checks."""
+    storage.clear_all_transactions()
+    validator = TransactionValidator(storage, duplicate_filter=BloomFilter(capacity))
+
+    for transaction_id, customer_id in [("1", "1"), ("2", "1"), ("1", "2"), ("3", "2")]:
+        transaction = Transaction(
+            {
+                "id": transaction_id,
+                "customer_id": customer_id,
+                "load_amount": "$100.00",
+                "time": "2025-08-15T00:00:00Z",
+            }
+        )
+        duplicate = validator.check_duplicate(transaction)
+
+        if transaction_id == "1" and customer_id == "2":
+            assert duplicate is not None
+            assert duplicate.message == "Duplicate transaction ID"
+        else:
+            assert duplicate is None
+            storage.store_customer_transaction(transaction)
+
+    # IDs recorded for a batch that is not stored yet
+    unstored_ids: set[str] = set()
+    transaction = Transaction(
+        {
+            "id": "4",
+            "customer_id": "1",
+            "load_amount": "$100.00",
+            "time": "2025-08-15T00:00:00Z",
+        }
+    )
+    assert validator.check_duplicate(transaction, unstored_ids) is None
+    assert validator.check_duplicate(transaction, unstored_ids) is not None
+
+    storage.clear_all_transactions()
+
+
+def test__check_duplicate__disabled(memory_storage: InMemoryTimeSeriesStorage):
+    validator = TransactionValidator(memory_storage)
+
+    transaction = Transaction(
+        {
+            "id": "1",
+            "customer_id": "1",
+            "load_amount": "$100.00",
+            "time": "2025-08-15T00:00:00Z",
+        }
+    )
+    memory_storage.store_customer_transaction(transaction)
+
+    assert validator.check_duplicate(transaction) is None
@@ -0,0 +1,116 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from ..src.blockchain import BaseBlockchain
+from ..src.chain_storage import list_segment_paths
+from ..src.transactions import Transaction
+from ..src.verify import split_ranges, verify_chain
+
+BLOCK_COUNT = 12
+
+
+def make_transaction(transaction_id: int) -> Transaction:
+    return Transaction(
+        {
+            "id": str(transaction_id),
+            "customer_id": "528",
+            "load_amount": "$3318.47",
+            "time": "2000-01-01T00:00:00Z",
+        }
+    )
+
+
+@pytest.fixture
+def chain_path(tmp_path: Path) -> Path:
+    # Small segments so the chain spans several files
+    with BaseBlockchain(storage_path=str(tmp_path), batch_size=2) as blockchain:
+        blockchain.storage.max_segment_bytes = 2000
+        for transaction_id in range(2 * BLOCK_COUNT):
+            blockchain.add_transaction(make_transaction(transaction_id))
+
+    return tmp_path
+
+
+def rewrite_block(chain_path: Path, index: int, edit) -> None:
+    """Apply edit to the stored JSON of a block, or drop it if edit returns None."""
+    for path in list_segment_paths(chain_path):
+        lines = path.read_bytes().splitlines(keepends=True)
+        output = []
+        for line in lines:
+            block_data = json.loads(line)
+            if block_data["index"] == index:
+                block_data = edit(block_data)
+                if block_data is None:
+                    continue
+                line = json.dumps(block_data, separators=(",", ":")).encode() + b"\n"
+            output.append(line)
+        path.write_bytes(b"".join(output))
+
+
+def test_split_ranges_cover_every_byte(chain_path: Path) -> None:
+    paths = list_segment_paths(chain_path)
+    ranges = split_ranges(paths, 7)
+
+    for path in paths:
+        covered = [(start, end) for p, start, end in ranges if p == str(path)]
+        assert covered[0][0] == 0
+        assert covered[-1][1] == path.stat().st_size
+        assert all(a[1] == b[0] for a, b in zip(covered, covered[1:]))
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_valid_chain(chain_path: Path, workers: int) -> None:
+    assert len(list_segment_paths(chain_path)) > 1
+
+    report = verify_chain(str(chain_path), workers=workers)
+
+    assert report.is_valid
+    assert report.block_count == BLOCK_COUNT
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_tampered_transaction(chain_path: Path, workers: int) -> None:
+    def edit(block_data):
+        block_data["transactions"][0]["load_amount"] = 1.0
+        return block_data
+
+    rewrite_block(chain_path, 7, edit)
+    report = verify_chain(str(chain_path), workers=workers)
+
+    assert report.corrupt_index == 7
+    assert report.error == "Merkle root mismatch"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_tampered_tail_block_without_hashes(chain_path: Path, workers: int) -> None:
+    # No next block checks the last one's hash through its previous_hash
+    def edit(block_data):
+        block_data["transactions"][0]["load_amount"] = 1.0
+        del block_data["hash"], block_data["merkle_root"]
+        return block_data
+
+    rewrite_block(chain_path, BLOCK_COUNT, edit)
+    report = verify_chain(str(chain_path), workers=workers)
+
+    assert report.corrupt_index == BLOCK_COUNT
+    assert report.error == "missing Merkle root"
+
+
+def test_edited_block_header(chain_path: Path) -> None:
+    def edit(block_data):
+        block_data["timestamp"] += 1
+        return block_data
+
+    rewrite_block(chain_path, 5, edit)
+    assert verify_chain(str(chain_path)).corrupt_index == 5
+
+
+def test_missing_block(chain_path: Path) -> None:
+    rewrite_block(chain_path, 9, lambda block_data: None)
+
+    report = verify_chain(str(chain_path))
+
+    assert report.corrupt_index == 9
+    assert report.error == "expected index 9, found 10"